@@ -0,0 +1,132 @@
+import importlib
+import os
+import sys
+
+from flask import Flask
+from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# demo: respostas simuladas (routes.simple_*); full: OpenAI + ffmpeg + banco (pacote src.*)
+APP_MODES = ('demo', 'full')
+APP_MODE = os.environ.get('APP_MODE', 'demo')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+# Proxies à frente do app que acrescentam X-Forwarded-For: 1 = balanceador do Render,
+# 2 = rewrite do Vercel -> Render. Só esses itens (os da direita) são confiáveis; 0 ignora o cabeçalho
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+# Dependências pesadas que os módulos carregam via lazy_import no primeiro uso.
+# Com gunicorn --preload são importadas no master (warm_up) e compartilhadas via copy-on-write.
+HEAVY_MODULES = {
+    'demo': (),
+    'full': ('openai', 'ffmpeg'),
+}
+
+def create_app(mode=APP_MODE):
+    """Cria o app Flask do modo pedido, importando só os blueprints desse modo"""
+    if mode not in APP_MODES:
+        raise ValueError(f'Modo desconhecido: {mode} (use {", ".join(APP_MODES)})')
+
+    app = Flask(__name__, static_folder=os.path.join(BASE_DIR, 'static'))
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'asdf#FGSgvasgf$5$WGT')
+    app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
+    app.config['APP_MODE'] = mode
+    if TRUSTED_PROXY_HOPS > 0:
+        # request.remote_addr passa a ser o IP visto pelo proxy mais externo confiável
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_HOPS)
+
+    if mode == 'full':
+        static_manifest_class = _setup_full(app)
+    else:
+        static_manifest_class = _setup_demo(app)
+
+    # Arquivos do frontend indexados uma vez, com variantes gzip/brotli e cache imutável dos bundles
+    static_manifest = static_manifest_class(app.static_folder)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve(path):
+        return static_manifest.response(path)
+
+    return app
+
+def _setup_demo(app):
+    from routes.simple_video import simple_video_bp
+    from routes.simple_content import simple_content_bp
+    from routes.auth import auth_bp
+    from routes.demo_latency import DEMO_LATENCY, cooperative_sleep_enabled
+    from services.static_assets import StaticManifest
+
+    # Configurar CORS para permitir acesso do frontend
+    CORS(app,
+         origins="*",
+         supports_credentials=True,
+         allow_headers=['Content-Type', 'Authorization', 'X-Requested-With'],
+         expose_headers=['Retry-After'],
+         methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
+
+    app.register_blueprint(simple_video_bp, url_prefix='/api/video')
+    app.register_blueprint(simple_content_bp, url_prefix='/api/content')
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+
+    @app.route('/api/health', methods=['GET'])
+    def health():
+        return {
+            'status': 'healthy',
+            'service': 'ViralAffiliateAI',
+            'version': '1.0.0',
+            'mode': 'demonstration',
+            'simulated_latency_stages': sorted(DEMO_LATENCY),
+            'cooperative_sleep': cooperative_sleep_enabled()
+        }
+
+    return StaticManifest
+
+def _setup_full(app):
+    # O modo completo importa o projeto como pacote `src` (diretório pai no sys.path)
+    parent_dir = os.path.dirname(BASE_DIR)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
+
+    from src.models.user import db
+    from src.routes.user import user_bp
+    from src.routes.video_processing import video_bp
+    from src.routes.content_generation import content_bp
+    from src.routes.history import history_bp
+    from src.services.job_queue import start_worker_pool
+    from src.services.scratch_space import start_janitor
+    from src.services.sqlite_store import enable_wal
+    from src.services.static_assets import StaticManifest
+
+    # Configurar CORS para permitir acesso do frontend
+    CORS(app, origins="*", expose_headers=['Retry-After'])
+
+    app.register_blueprint(user_bp, url_prefix='/api')
+    app.register_blueprint(video_bp, url_prefix='/api/video')
+    app.register_blueprint(content_bp, url_prefix='/api/content')
+    app.register_blueprint(history_bp, url_prefix='/api/history')
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(BASE_DIR, 'database', 'app.db')}"
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Workers de tarefas escrevem no mesmo arquivo SQLite; aguardar locks em vez de falhar
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 30}}
+    db.init_app(app)
+    with app.app_context():
+        enable_wal(db.engine)
+        db.create_all()
+        # Com --preload o fork não pode levar conexões abertas do master para os workers
+        db.engine.dispose()
+
+    # Workers locais que processam uploads em segundo plano
+    start_worker_pool(app, JOB_WORKERS)
+    # Remove workspaces temporários órfãos (uploads abandonados, processos que morreram)
+    start_janitor()
+
+    return StaticManifest
+
+def warm_up(mode=APP_MODE):
+    """Carrega as dependências pesadas adiadas do modo (chamado no master com --preload)"""
+    for name in HEAVY_MODULES[mode]:
+        # Acessar um atributo conclui o carregamento de módulos criados por lazy_import
+        getattr(importlib.import_module(name), '__file__', None)
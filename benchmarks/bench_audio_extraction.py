@@ -0,0 +1,102 @@
+"""Compara a extração em WAV (arquivo), o envio via pipe em codecs comprimidos e a cópia da trilha.
+
+Uso:
+    python benchmarks/bench_audio_extraction.py video.mp4 [--runs 3] [--transcribe]
+
+Sem --transcribe mede apenas o ffmpeg (bytes gerados e tempo); com --transcribe
+inclui o envio ao Whisper (requer OPENAI_API_KEY). A cópia sem recodificar só
+entra na tabela quando o codec do vídeo é aceito pelo Whisper (ex.: AAC em MP4).
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.audio_pipeline import (AUDIO_FORMATS, STREAM_COPY_FORMATS, CountingReader,  # noqa: E402
+                                         audio_filename, check_media, copy_audio_to_file,
+                                         extract_audio_to_file, finish_audio_stream, open_audio_stream,
+                                         plan_audio_extraction, probe_media)
+
+def run_file_path(video_path, transcribe):
+    from src.routes.video_processing import transcribe_audio
+
+    temp_dir = tempfile.mkdtemp()
+    audio_path = os.path.join(temp_dir, audio_filename('audio', 'wav'))
+    start = time.perf_counter()
+    extract_audio_to_file(video_path, audio_path, 'wav')
+    if transcribe:
+        transcribe_audio(audio_path)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(audio_path)
+    os.remove(audio_path)
+    os.rmdir(temp_dir)
+    return size, elapsed
+
+def run_copy_path(video_path, codec, transcribe):
+    from src.routes.video_processing import transcribe_audio
+
+    temp_dir = tempfile.mkdtemp()
+    audio_path = os.path.join(temp_dir, f"audio.{STREAM_COPY_FORMATS[codec]['extension']}")
+    start = time.perf_counter()
+    copy_audio_to_file(video_path, audio_path, codec)
+    if transcribe:
+        transcribe_audio(audio_path)
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(audio_path)
+    os.remove(audio_path)
+    os.rmdir(temp_dir)
+    return size, elapsed
+
+def run_pipe_path(video_path, codec, transcribe):
+    start = time.perf_counter()
+    process = open_audio_stream(video_path, codec)
+    reader = CountingReader(process.stdout)
+    if transcribe:
+        from src.routes.video_processing import _request_transcription
+        _request_transcription((audio_filename('audio', codec), reader), retry=False)
+    else:
+        while reader.read(64 * 1024):
+            pass
+    finish_audio_stream(process)
+    return reader.bytes_read, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--transcribe', action='store_true')
+    args = parser.parse_args()
+
+    probe_times = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        media = probe_media(args.video)
+        probe_times.append(time.perf_counter() - start)
+    check_media(media)
+    plan = plan_audio_extraction(media)
+    print(f"probe: {min(probe_times) * 1000:.1f} ms | duração {media['duration']}s | "
+          f"áudio {media['audio']['codec']} | caminho escolhido: {plan['method']} ({plan['reason']})\n")
+
+    cases = [('wav (arquivo)', lambda: run_file_path(args.video, args.transcribe))]
+    for codec in AUDIO_FORMATS:
+        cases.append((f'{codec} (pipe)', lambda codec=codec: run_pipe_path(args.video, codec, args.transcribe)))
+    source_codec = media['audio']['codec']
+    if source_codec in STREAM_COPY_FORMATS:
+        cases.append((f'{source_codec} (cópia)', lambda: run_copy_path(args.video, source_codec, args.transcribe)))
+
+    print(f"{'modo':<16}{'bytes':>14}{'melhor (s)':>12}{'média (s)':>12}")
+    baseline = None
+    for name, case in cases:
+        times = []
+        for _ in range(args.runs):
+            size, elapsed = case()
+            times.append(elapsed)
+        baseline = baseline or size
+        print(f"{name:<16}{size:>14}{min(times):>12.3f}{sum(times) / len(times):>12.3f}"
+              f"   ({size / baseline:.1%} dos bytes do WAV)")
+
+if __name__ == '__main__':
+    main()
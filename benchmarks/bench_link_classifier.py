@@ -0,0 +1,109 @@
+"""Compara a detecção de plataforma antiga (substrings) com o classificador por domínio.
+
+Uso:
+    python benchmarks/bench_link_classifier.py [--links 100000] [--distinct 2000] [--runs 5]
+
+Gera links sintéticos de afiliado (semente fixa) com `--distinct` hosts diferentes e mede
+as duas implementações, o classificador com cache frio e quente. Antes imprime a tabela
+de links problemáticos com o resultado de cada uma.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.routes.link_classifier import classify_host, detect_platform  # noqa: E402
+
+def legacy_platform(product_link):
+    """Cadeia de substrings usada antes em simple_video.upload_video"""
+    platform = 'Produto Digital'
+    if product_link:
+        if 'shopee.com' in product_link:
+            platform = 'Shopee'
+        elif 'mercadolivre.com' in product_link or 'mercadolibre.com' in product_link:
+            platform = 'Mercado Livre'
+        elif 'amazon.com' in product_link:
+            platform = 'Amazon'
+        elif 'aliexpress.com' in product_link:
+            platform = 'AliExpress'
+        elif 'hotmart.com' in product_link:
+            platform = 'Hotmart'
+        elif 'eduzz.com' in product_link:
+            platform = 'Eduzz'
+    return platform
+
+# (link, plataforma esperada)
+TRICKY_LINKS = [
+    ('https://www.amazon.com.br/dp/B0C1234567', 'Amazon'),
+    ('https://amzn.to/3xYzAbC', 'Amazon'),
+    ('https://notamazon.com.evil/dp/B0C1234567', 'Produto Digital'),
+    ('https://loja.exemplo.com/?ref=amazon.com', 'Produto Digital'),
+    ('https://amazon.xyz/oferta', 'Produto Digital'),
+    ('shopee.com.br/Fone-Bluetooth-i.123.456', 'Shopee'),
+    ('https://shope.ee/9zKq1', 'Shopee'),
+    ('HTTPS://SHOPEE.COM.BR./produto', 'Shopee'),
+    ('https://produto.mercadolivre.com.br/MLB-123', 'Mercado Livre'),
+    ('https://meli.la/2AbCdEf', 'Mercado Livre'),
+    ('https://articulo.mercadolibre.com.mx/MLM-123', 'Mercado Livre'),
+    ('https://s.click.aliexpress.com/e/_DmXyZ', 'AliExpress'),
+    ('https://go.hotmart.com/A1234567B', 'Hotmart'),
+    ('https://www.magazineluiza.com.br/fone/p/123', 'Magazine Luiza'),
+    ('https://pay.kiwify.com.br/AbCdEf', 'Kiwify'),
+    ('https://user@amazon.com:443/dp/B0C1234567', 'Amazon'),
+    ('https://[::1', 'Produto Digital'),
+]
+
+HOST_TEMPLATES = [
+    'www.amazon.com.br', 'amzn.to', 'shopee.com.br', 'shope.ee', 'produto.mercadolivre.com.br', 'meli.la',
+    's.click.aliexpress.com', 'go.hotmart.com', 'sun.eduzz.com', 'www.magazineluiza.com.br', 'loja{n}.com.br',
+]
+
+def synthetic_links(count, distinct, seed=42):
+    rng = random.Random(seed)
+    hosts = [f'sub{i}.' + rng.choice(HOST_TEMPLATES).format(n=i) for i in range(distinct)]
+    return [f'https://{rng.choice(hosts)}/produto/{rng.randrange(10 ** 6)}?aff={rng.randrange(10 ** 4)}'
+            for _ in range(count)]
+
+def measure(function, links, runs, before_run=None):
+    best = float('inf')
+    for _ in range(runs):
+        if before_run:
+            before_run()
+        start = time.perf_counter()
+        for link in links:
+            function(link)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=100000)
+    parser.add_argument('--distinct', type=int, default=2000, help='hosts diferentes entre os links')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'link':<48}{'esperado':<18}{'antigo':<18}{'novo':<18}")
+    wrong = {'antigo': 0, 'novo': 0}
+    for link, expected in TRICKY_LINKS:
+        old, new = legacy_platform(link), detect_platform(link)
+        wrong['antigo'] += old != expected
+        wrong['novo'] += new != expected
+        print(f"{link[:46]:<48}{expected:<18}{old:<18}{new:<18}")
+    print(f"\nerros: antigo {wrong['antigo']}/{len(TRICKY_LINKS)}, novo {wrong['novo']}/{len(TRICKY_LINKS)}\n")
+
+    links = synthetic_links(args.links, args.distinct)
+    results = [
+        ('substrings (antigo)', measure(legacy_platform, links, args.runs)),
+        ('classificador, cache frio', measure(detect_platform, links, args.runs, classify_host.cache_clear)),
+        ('classificador, cache quente', measure(detect_platform, links, args.runs)),
+    ]
+    for name, seconds in results:
+        print(f"{name:<30}{seconds * 1000:>9.1f} ms  ({args.links / seconds / 1000:>7.0f} mil links/s)")
+    info = classify_host.cache_info()
+    print(f"\ncache: {info.hits} acertos, {info.misses} faltas, {info.currsize}/{info.maxsize} hosts")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""Teste de carga ponta a ponta: upload -> transcrição -> /generate-all, com concorrência alvo.
+
+Uso:
+    # terminal 1: OpenAI simulada
+    python benchmarks/fake_openai.py --latency-ms 400 --error-rate 0.02
+    # terminal 2: app apontando para ela, sem os limites por sessão/IP (a carga vem toda de um IP)
+    OPENAI_BASE_URL=http://127.0.0.1:8090/v1 OPENAI_API_KEY=fake \
+    RATE_LIMIT_UPLOAD_SESSION_PER_MINUTE=0 RATE_LIMIT_UPLOAD_IP_PER_MINUTE=0 \
+    RATE_LIMIT_UPLOAD_SESSION_CONCURRENCY=0 RATE_LIMIT_UPLOAD_IP_CONCURRENCY=0 \
+    RATE_LIMIT_CONTENT_SESSION_PER_MINUTE=0 RATE_LIMIT_CONTENT_IP_PER_MINUTE=0 \
+    RATE_LIMIT_CONTENT_SESSION_CONCURRENCY=0 RATE_LIMIT_CONTENT_IP_CONCURRENCY=0 \
+    python main_full.py
+    # terminal 3: carga
+    python benchmarks/bench_load.py video.mp4 [--base-url http://127.0.0.1:5000] [--concurrency 8]
+                                    [--requests 40] [--mode pipeline] [--unique]
+
+Cada iteração envia o vídeo, acompanha a tarefa de transcrição e gera o conteúdo. Ao final mostra
+vazão e p50/p95/p99 por etapa, incluindo os tempos internos devolvidos em `timings_ms`.
+Cada usuário simulado (thread) tem o próprio cliente HTTP e, portanto, a própria sessão; sem
+desativar os limites RATE_LIMIT_* no alvo a medição vira uma contagem de respostas 429.
+Com --unique cada envio recebe bytes extras no fim do arquivo, evitando o cache de transcrição.
+"""
+import argparse
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+def percentile(sorted_values, fraction):
+    """Percentil por posição mais próxima (valores já ordenados)"""
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = defaultdict(list)
+        self.errors = Counter()
+        self.completed = 0
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.stages[stage].append(seconds * 1000)
+
+    def fail(self, reason):
+        with self.lock:
+            self.errors[reason] += 1
+
+    def done(self):
+        with self.lock:
+            self.completed += 1
+
+def wait_for_job(client, job_id, poll_interval, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get(f'/api/video/jobs/{job_id}/result')
+        if response.status_code != 202:
+            return response
+        time.sleep(poll_interval)
+    raise TimeoutError(f'tarefa {job_id} não terminou em {timeout}s')
+
+def run_iteration(client, video, args, recorder):
+    started = time.perf_counter()
+    if args.unique:
+        video = video + os.urandom(16)
+
+    # Upload (e transcrição, se o vídeo estiver em cache a resposta já vem com ela)
+    start = time.perf_counter()
+    response = client.post('/api/video/upload', files={'video': (os.path.basename(args.video), video, 'video/mp4')})
+    recorder.add('upload', time.perf_counter() - start)
+    if response.status_code not in (200, 202):
+        return recorder.fail(f'upload {response.status_code}')
+
+    body = response.json()
+    if response.status_code == 202:
+        start = time.perf_counter()
+        response = wait_for_job(client, body['job_id'], args.poll_interval, args.timeout)
+        recorder.add('transcription', time.perf_counter() - start)
+        if response.status_code != 200:
+            return recorder.fail(f'transcrição {response.status_code}')
+        body = response.json()
+
+    start = time.perf_counter()
+    headers = {'Cache-Control': 'no-cache'} if args.no_cache else {}
+    response = client.post('/api/content/generate-all', headers=headers,
+                           json={'transcription': body['transcription'], 'tone': 'entusiasmado', 'mode': args.mode})
+    recorder.add('generate_all', time.perf_counter() - start)
+    if response.status_code != 200:
+        return recorder.fail(f'generate-all {response.status_code}')
+
+    for stage, ms in response.json().get('timings_ms', {}).items():
+        if stage != 'total':
+            recorder.add(f'  {stage} (servidor)', ms / 1000)
+
+    recorder.add('total', time.perf_counter() - started)
+    recorder.done()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--mode', default='pipeline', choices=['pipeline', 'single'])
+    parser.add_argument('--unique', action='store_true', help='evita o cache de transcrição')
+    parser.add_argument('--no-cache', action='store_true', help='evita o cache de respostas do GPT')
+    parser.add_argument('--poll-interval', type=float, default=0.25)
+    parser.add_argument('--timeout', type=float, default=600)
+    args = parser.parse_args()
+
+    with open(args.video, 'rb') as f:
+        video = f.read()
+
+    recorder = Recorder()
+    clients = []
+    clients_lock = threading.Lock()
+    local = threading.local()
+
+    def worker_client():
+        """Um cliente por thread: cada usuário simulado tem a sua sessão (cookie) e conexão"""
+        if not hasattr(local, 'client'):
+            local.client = httpx.Client(base_url=args.base_url, timeout=args.timeout)
+            with clients_lock:
+                clients.append(local.client)
+        return local.client
+
+    def iteration(_):
+        try:
+            run_iteration(worker_client(), video, args, recorder)
+        except Exception as e:
+            recorder.fail(type(e).__name__)
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(iteration, range(args.requests)))
+    finally:
+        for client in clients:
+            client.close()
+    elapsed = time.perf_counter() - started
+
+    print(f"{args.requests} iterações, concorrência {args.concurrency}, modo {args.mode}: "
+          f"{recorder.completed} ok, {sum(recorder.errors.values())} erros em {elapsed:.1f}s "
+          f"({recorder.completed / elapsed:.2f} pipelines/s)\n")
+    print(f"{'etapa':<28}{'n':>6}{'média':>10}{'p50':>10}{'p95':>10}{'p99':>10}   (ms)")
+    for stage, values in recorder.stages.items():
+        values.sort()
+        print(f"{stage:<28}{len(values):>6}{sum(values) / len(values):>10.0f}{percentile(values, 0.5):>10.0f}"
+              f"{percentile(values, 0.95):>10.0f}{percentile(values, 0.99):>10.0f}")
+    if recorder.errors:
+        print('\nerros: ' + ', '.join(f'{reason} x{count}' for reason, count in recorder.errors.most_common()))
+
+if __name__ == '__main__':
+    main()
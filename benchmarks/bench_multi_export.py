@@ -0,0 +1,71 @@
+"""Compara a exportação multi-formato em um único ffmpeg (split) com um ffmpeg por formato.
+
+Uso:
+    python benchmarks/bench_multi_export.py video.mp4 [--runs 2] [--profiles vertical square landscape]
+                                            [--fit crop] [--preset veryfast] [--threads 2]
+
+Mede tempo de parede e tempo de CPU dos processos filhos (usuário + sistema) de cada modo.
+Requer o binário ffmpeg no PATH.
+"""
+import argparse
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.audio_pipeline import probe_duration  # noqa: E402
+from src.services.video_export import EXPORT_PROFILES, export_profile, export_profiles  # noqa: E402
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def measure(func):
+    cpu, start = children_cpu(), time.perf_counter()
+    func()
+    return time.perf_counter() - start, children_cpu() - cpu
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video')
+    parser.add_argument('--runs', type=int, default=2)
+    parser.add_argument('--profiles', nargs='+', default=list(EXPORT_PROFILES), choices=list(EXPORT_PROFILES))
+    parser.add_argument('--fit', default='crop', choices=['crop', 'pad'])
+    parser.add_argument('--preset', default='veryfast')
+    parser.add_argument('--threads', type=int, default=2)
+    args = parser.parse_args()
+
+    duration = probe_duration(args.video)
+    temp_dir = tempfile.mkdtemp()
+    outputs = {name: os.path.join(temp_dir, f'{name}.mp4') for name in args.profiles}
+    options = {'preset': args.preset, 'threads': args.threads}
+
+    def single_process():
+        export_profiles(args.video, outputs, duration, args.fit, **options)
+
+    def sequential():
+        for name, path in outputs.items():
+            export_profile(args.video, name, path, duration, args.fit, **options)
+
+    print(f"{len(outputs)} formatos, vídeo de {duration:.1f}s, preset {args.preset}, {args.threads} threads\n")
+    print(f"{'modo':<26}{'parede (s)':>12}{'CPU (s)':>10}")
+    try:
+        results = {}
+        for name, func in (('sequencial (1 por formato)', sequential), ('único ffmpeg (split)', single_process)):
+            runs = [measure(func) for _ in range(args.runs)]
+            wall = min(r[0] for r in runs)
+            cpu = min(r[1] for r in runs)
+            results[name] = (wall, cpu)
+            print(f"{name:<26}{wall:>12.2f}{cpu:>10.2f}")
+
+        (seq_wall, seq_cpu), (split_wall, split_cpu) = results.values()
+        print(f"\nparede: {1 - split_wall / seq_wall:.0%} menor | CPU: {1 - split_cpu / seq_cpu:.0%} menor")
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
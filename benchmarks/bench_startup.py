@@ -0,0 +1,101 @@
+"""Mede o tempo de import e de boot do app (create_app) em cada modo, com detalhamento do -X importtime.
+
+Uso:
+    python benchmarks/bench_startup.py [--mode demo|full|all] [--runs 5] [--top 15] [--max-boot-ms 800]
+
+Cada execução roda um interpretador novo com `python -X importtime`, cria o app e informa o tempo
+de boot e quais dependências pesadas foram carregadas (devem ficar adiadas até o primeiro uso).
+Mostra a mediana das execuções e os pacotes que mais pesam no import (tempo próprio somado por
+pacote raiz). Com --max-boot-ms termina com código 1 se a mediana passar do limite (uso em CI).
+O modo full importa o projeto como pacote `src` (diretório do repositório precisa se chamar src).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Submódulo que só existe em sys.modules se o pacote foi de fato carregado (não só criado por lazy_import)
+LOADED_MARKERS = {
+    'openai': 'openai._client',
+    'pydantic': 'pydantic.main',
+    'httpx': 'httpx._client',
+    'ffmpeg': 'ffmpeg.nodes',
+    'sqlalchemy': 'sqlalchemy.orm',
+}
+
+BOOT_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, sys.argv[3])
+started = time.perf_counter()
+from app_factory import create_app
+create_app(sys.argv[1])
+boot_ms = (time.perf_counter() - started) * 1000
+markers = json.loads(sys.argv[2])
+print(json.dumps({'boot_ms': boot_ms, 'loaded': [name for name, marker in markers.items() if marker in sys.modules]}))
+"""
+
+def parse_importtime(stderr):
+    """Soma o tempo próprio (µs) por pacote raiz a partir das linhas do -X importtime"""
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|', 2)
+        totals[name.strip().split('.')[0]] += int(self_us)
+    return totals
+
+def run_once(mode):
+    env = dict(os.environ, JOB_WORKERS='0')
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT, mode,
+                             json.dumps(LOADED_MARKERS), REPO_DIR], env=env, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'boot do modo {mode} falhou:\n{result.stderr[-2000:]}')
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['wall_ms'] = wall_ms
+    report['imports'] = parse_importtime(result.stderr)
+    return report
+
+def bench_mode(mode, runs, top):
+    reports = [run_once(mode) for _ in range(runs)]
+    boot = statistics.median(r['boot_ms'] for r in reports)
+    wall = statistics.median(r['wall_ms'] for r in reports)
+    packages = {name: statistics.median(r['imports'].get(name, 0) for r in reports)
+                for name in set().union(*(r['imports'] for r in reports))}
+    total_import = sum(packages.values()) / 1000
+
+    print(f"modo {mode}: boot (create_app) {boot:.0f} ms, processo completo {wall:.0f} ms, "
+          f"imports {total_import:.0f} ms (mediana de {runs})")
+    print(f"  dependências pesadas carregadas no boot: {', '.join(reports[-1]['loaded']) or 'nenhuma'}")
+    print(f"  {'pacote':<28}{'ms':>8}{'%':>7}")
+    for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<28}{us / 1000:>8.1f}{us / 1000 / total_import * 100:>7.1f}")
+    print()
+    return boot
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', default='all', choices=['demo', 'full', 'all'])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--max-boot-ms', type=float, help='falha se a mediana de boot passar disso')
+    args = parser.parse_args()
+
+    slow = []
+    for mode in (['demo', 'full'] if args.mode == 'all' else [args.mode]):
+        boot = bench_mode(mode, args.runs, args.top)
+        if args.max_boot_ms is not None and boot > args.max_boot_ms:
+            slow.append(mode)
+    if slow:
+        print(f"boot acima de {args.max_boot_ms:.0f} ms: {', '.join(slow)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
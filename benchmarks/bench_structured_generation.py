@@ -0,0 +1,117 @@
+"""Compara o pipeline de três chamadas com o modo de chamada única (JSON schema) usando um modelo local simulado.
+
+Uso:
+    python benchmarks/bench_structured_generation.py [--runs 20] [--base-latency 0.4] [--ms-per-output-token 2]
+
+O stub responde com conteúdo fixo e simula a latência como
+base + tokens_de_entrada * ms_por_token_de_entrada + tokens_de_saída * ms_por_token_de_saída,
+contando chamadas e tokens de prompt enviados (estimativa de ~4 caracteres por token).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.routes import content_generation  # noqa: E402
+from src.services.openai_client import COMPLETION_TOKENS_ESTIMATE, estimate_tokens  # noqa: E402
+
+ANALYSIS = {
+    "produto": "Fone Bluetooth X", "nicho": "Eletrônicos", "publico_alvo": "Jovens adultos",
+    "beneficios": ["Bateria de 30h", "Cancelamento de ruído"], "tom": "entusiasmado",
+    "palavras_chave": ["fone", "bluetooth", "oferta"]
+}
+DESCRIPTION = "🔥 O fone que dura 30h! Cancelamento de ruído de verdade. 👉 Garanta o seu pelo link!"
+HASHTAGS = "#fone #bluetooth #oferta #achadinhos"
+KEYWORDS = {
+    "palavras_chave": ["fone bluetooth", "fone sem fio", "cancelamento de ruído"] * 5,
+    "dicas_postagem": ["Mostre o produto nos 3 primeiros segundos"] * 5,
+    "melhor_horario": "18h-21h nos dias úteis",
+    "tendencias": ["unboxing", "achadinhos"]
+}
+TRANSCRIPTION = {
+    "text": " ".join(["Olá pessoal, hoje vou mostrar esse fone bluetooth incrível com bateria de 30 horas."] * 20),
+    "words": [{"word": "Olá", "start": 0.0, "end": 0.4}, {"word": "pessoal.", "start": 0.4, "end": 0.9}]
+}
+
+class StubModel:
+    def __init__(self, base_latency, ms_per_input_token, ms_per_output_token):
+        self.base_latency = base_latency
+        self.ms_per_input_token = ms_per_input_token
+        self.ms_per_output_token = ms_per_output_token
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+
+    def _content(self, kwargs):
+        prompt = kwargs['messages'][-1]['content']
+        if kwargs.get('response_format'):
+            return json.dumps({"analysis": ANALYSIS, "description": DESCRIPTION,
+                               "hashtags": HASHTAGS, "keywords": KEYWORDS}, ensure_ascii=False)
+        if 'DESCRIÇÃO:' in prompt:
+            return f"DESCRIÇÃO: {DESCRIPTION}\nHASHTAGS: {HASHTAGS}"
+        if 'DICAS DE POSTAGEM' in prompt:
+            return json.dumps(KEYWORDS, ensure_ascii=False)
+        return json.dumps(ANALYSIS, ensure_ascii=False)
+
+    def create(self, **kwargs):
+        content = self._content(kwargs)
+        prompt_tokens = estimate_tokens(kwargs['messages']) - COMPLETION_TOKENS_ESTIMATE
+        with self.lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+        time.sleep(self.base_latency + prompt_tokens * self.ms_per_input_token / 1000)
+        if kwargs.get('stream'):
+            return self._stream(content)
+        time.sleep(len(content) / 4 * self.ms_per_output_token / 1000)
+        message = types.SimpleNamespace(content=content)
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+    def _stream(self, content):
+        # Trechos de ~4 caracteres (um token), no ritmo de geração do modelo
+        for i in range(0, len(content), 4):
+            time.sleep(self.ms_per_output_token / 1000)
+            delta = types.SimpleNamespace(content=content[i:i + 4])
+            yield types.SimpleNamespace(choices=[types.SimpleNamespace(delta=delta)])
+
+def run(name, pipeline, stub, runs):
+    stub.reset()
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = pipeline(TRANSCRIPTION, 'entusiasmado', use_cache=False)
+        latencies.append(time.perf_counter() - start)
+        assert result['description'] and result['keywords']['palavras_chave']
+    latencies.sort()
+    print(f"{name:<22}{sum(latencies) / runs * 1000:>12.0f}{latencies[len(latencies) // 2] * 1000:>10.0f}"
+          f"{stub.calls / runs:>10.1f}{stub.prompt_tokens / runs:>16.0f}")
+    return sum(latencies) / runs, stub.prompt_tokens / runs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--base-latency', type=float, default=0.4)
+    parser.add_argument('--ms-per-input-token', type=float, default=0.05)
+    parser.add_argument('--ms-per-output-token', type=float, default=2.0)
+    args = parser.parse_args()
+
+    stub = StubModel(args.base_latency, args.ms_per_input_token, args.ms_per_output_token)
+    content_generation.create_chat_completion = stub.create
+
+    print(f"{'modo':<22}{'média (ms)':>12}{'p50 (ms)':>10}{'chamadas':>10}{'tokens prompt':>16}")
+    pipeline_latency, pipeline_tokens = run('pipeline (3 chamadas)', content_generation.run_generation_pipeline,
+                                            stub, args.runs)
+    single_latency, single_tokens = run('single (JSON schema)', content_generation.run_structured_pipeline,
+                                        stub, args.runs)
+    print(f"\nlatência: {1 - single_latency / pipeline_latency:.0%} menor | "
+          f"tokens de prompt: {1 - single_tokens / pipeline_tokens:.0%} menos")
+
+if __name__ == '__main__':
+    main()
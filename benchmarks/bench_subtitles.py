@@ -0,0 +1,68 @@
+"""Mede o motor de legendas (agrupamento + serialização) em transcrições grandes.
+
+Uso:
+    python benchmarks/bench_subtitles.py [--words 100000] [--runs 5]
+
+Gera palavras sintéticas com timestamps (pausas e fins de frase aleatórios, semente fixa)
+e mede build_cues e cada serializador, com entrada em lista de dicts e em colunas.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services import subtitles  # noqa: E402
+
+VOCABULARY = ["olá", "pessoal", "hoje", "vou", "mostrar", "esse", "fone", "bluetooth", "incrível",
+              "com", "bateria", "de", "trinta", "horas", "e", "cancelamento", "ruído", "link", "na", "bio"]
+
+def synthetic_words(count, seed=42):
+    rng = random.Random(seed)
+    words, position = [], 0.0
+    for _ in range(count):
+        text = rng.choice(VOCABULARY)
+        if rng.random() < 0.08:
+            text += rng.choice('.!?')
+        duration = 0.12 + len(text) * 0.045
+        words.append({'word': text, 'start': round(position, 3), 'end': round(position + duration, 3)})
+        position += duration + (rng.uniform(0.4, 1.2) if rng.random() < 0.05 else rng.uniform(0.0, 0.08))
+    return words
+
+def best_of(runs, func, *args):
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    words = synthetic_words(args.words)
+    as_dicts = {'words': words}
+    as_columns = {'words': {'word': [w['word'] for w in words], 'start': [w['start'] for w in words],
+                            'end': [w['end'] for w in words]}}
+
+    print(f"{args.words} palavras, melhor de {args.runs} execuções\n")
+    print(f"{'etapa':<28}{'tempo (ms)':>12}")
+    elapsed, cues = best_of(args.runs, subtitles.build_cues, as_dicts)
+    print(f"{'build_cues (dicts)':<28}{elapsed:>12.1f}")
+    elapsed, _ = best_of(args.runs, subtitles.build_cues, as_columns)
+    print(f"{'build_cues (colunas)':<28}{elapsed:>12.1f}")
+    for name in ('json', 'srt', 'vtt', 'ass'):
+        elapsed, _ = best_of(args.runs, subtitles.SERIALIZERS[name], cues)
+        print(f"{'serializar ' + name:<28}{elapsed:>12.1f}")
+
+    durations = [end - start for start, end, _ in cues]
+    print(f"\n{len(cues)} legendas | duração média {sum(durations) / len(durations):.2f}s | "
+          f"máx {max(durations):.2f}s | mín {min(durations):.2f}s")
+
+if __name__ == '__main__':
+    main()
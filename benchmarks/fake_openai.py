@@ -0,0 +1,157 @@
+"""Servidor local que imita os endpoints da OpenAI usados pelo app (chat e transcrição).
+
+Uso:
+    python benchmarks/fake_openai.py [--port 8090] [--latency lognormal] [--latency-ms 400]
+                                     [--ms-per-token 2] [--error-rate 0.02] [--error-status 429]
+
+Aponte o app para ele com OPENAI_BASE_URL=http://127.0.0.1:8090/v1 (e qualquer OPENAI_API_KEY).
+Respostas são fixas; a latência segue a distribuição escolhida mais o tempo de geração por token
+(entregue aos poucos quando stream=True) e, na transcrição, o tempo por MB de áudio recebido.
+"""
+import argparse
+import json
+import math
+import random
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+ANALYSIS = {
+    "produto": "Fone Bluetooth X", "nicho": "Eletrônicos", "publico_alvo": "Jovens adultos",
+    "beneficios": ["Bateria de 30h", "Cancelamento de ruído"], "tom": "entusiasmado",
+    "palavras_chave": ["fone", "bluetooth", "oferta"]
+}
+DESCRIPTION = "🔥 O fone que dura 30h! Cancelamento de ruído de verdade. 👉 Garanta o seu pelo link!"
+HASHTAGS = "#fone #bluetooth #oferta #achadinhos"
+KEYWORDS = {
+    "palavras_chave": ["fone bluetooth", "fone sem fio", "cancelamento de ruído"],
+    "dicas_postagem": ["Mostre o produto nos 3 primeiros segundos"],
+    "melhor_horario": "18h-21h nos dias úteis",
+    "tendencias": ["unboxing", "achadinhos"]
+}
+TRANSCRIPT = ("Olá pessoal, hoje vou mostrar esse fone bluetooth incrível com bateria de trinta horas. "
+              "Tem cancelamento de ruído de verdade e o link está na bio.")
+WORD_SECONDS = 0.35
+
+app = Flask(__name__)
+settings = argparse.Namespace()
+
+def sample_latency():
+    """Latência base em segundos conforme a distribuição configurada"""
+    mean = settings.latency_ms / 1000
+    if mean <= 0:
+        return 0.0
+    if settings.latency == 'fixed':
+        value = mean
+    elif settings.latency == 'uniform':
+        value = random.uniform(mean * (1 - settings.spread), mean * (1 + settings.spread))
+    elif settings.latency == 'exponential':
+        value = random.expovariate(1 / mean)
+    else:
+        # lognormal com a média pedida: mu = ln(média) - sigma²/2
+        value = random.lognormvariate(math.log(mean) - settings.spread ** 2 / 2, settings.spread)
+    return max(value, 0.0)
+
+def injected_error():
+    """Resposta de erro sorteada conforme --error-rate (429 inclui retry-after-ms)"""
+    if random.random() >= settings.error_rate:
+        return None
+    status = settings.error_status
+    response = jsonify({'error': {'message': 'Erro simulado', 'type': 'fake_error', 'code': status}})
+    response.status_code = status
+    if status == 429:
+        response.headers['retry-after-ms'] = str(settings.retry_after_ms)
+    return response
+
+def chat_content(body):
+    prompt = body['messages'][-1]['content']
+    if body.get('response_format'):
+        return json.dumps({"analysis": ANALYSIS, "description": DESCRIPTION,
+                           "hashtags": HASHTAGS, "keywords": KEYWORDS}, ensure_ascii=False)
+    if 'DESCRIÇÃO:' in prompt:
+        return f"DESCRIÇÃO: {DESCRIPTION}\nHASHTAGS: {HASHTAGS}"
+    if 'DICAS DE POSTAGEM' in prompt:
+        return json.dumps(KEYWORDS, ensure_ascii=False)
+    return json.dumps(ANALYSIS, ensure_ascii=False)
+
+def _chunk(completion_id, model, delta, finish_reason=None):
+    return 'data: ' + json.dumps({
+        'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+        'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+    }, ensure_ascii=False) + '\n\n'
+
+@app.route('/v1/chat/completions', methods=['POST'])
+def chat_completions():
+    body = request.get_json()
+    time.sleep(sample_latency())
+    error = injected_error()
+    if error is not None:
+        return error
+
+    content = chat_content(body)
+    completion_id = f'chatcmpl-{uuid.uuid4().hex}'
+    model = body.get('model', 'gpt-4')
+    # ~4 caracteres por token
+    tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+
+    if body.get('stream'):
+        def events():
+            yield _chunk(completion_id, model, {'role': 'assistant', 'content': ''})
+            for token in tokens:
+                time.sleep(settings.ms_per_token / 1000)
+                yield _chunk(completion_id, model, {'content': token})
+            yield _chunk(completion_id, model, {}, 'stop')
+            yield 'data: [DONE]\n\n'
+        return Response(events(), mimetype='text/event-stream')
+
+    time.sleep(len(tokens) * settings.ms_per_token / 1000)
+    prompt_tokens = sum(len(m.get('content') or '') for m in body['messages']) // 4
+    return jsonify({
+        'id': completion_id, 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens),
+                  'total_tokens': prompt_tokens + len(tokens)}
+    })
+
+@app.route('/v1/audio/transcriptions', methods=['POST'])
+def audio_transcriptions():
+    # Lê o corpo inteiro (inclusive chunked) como o servidor real faria
+    size = len(request.files['file'].read()) if 'file' in request.files else 0
+    time.sleep(sample_latency() + size / (1024 * 1024) * settings.transcription_ms_per_mb / 1000)
+    error = injected_error()
+    if error is not None:
+        return error
+
+    words = [{'word': word, 'start': round(i * WORD_SECONDS, 2), 'end': round((i + 0.9) * WORD_SECONDS, 2)}
+             for i, word in enumerate(TRANSCRIPT.split())]
+    duration = words[-1]['end']
+    return jsonify({
+        'task': 'transcribe', 'language': 'portuguese', 'duration': duration, 'text': TRANSCRIPT,
+        'words': words,
+        'segments': [{'id': 0, 'seek': 0, 'start': 0.0, 'end': duration, 'text': TRANSCRIPT, 'tokens': [],
+                      'temperature': 0.0, 'avg_logprob': -0.1, 'compression_ratio': 1.0, 'no_speech_prob': 0.0}]
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency', default='lognormal', choices=['fixed', 'uniform', 'exponential', 'lognormal'])
+    parser.add_argument('--latency-ms', type=float, default=400, help='latência base média por requisição')
+    parser.add_argument('--spread', type=float, default=0.5,
+                        help='uniform: variação relativa (±); lognormal: sigma')
+    parser.add_argument('--ms-per-token', type=float, default=2.0)
+    parser.add_argument('--transcription-ms-per-mb', type=float, default=500)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=429, choices=[429, 500, 502, 503])
+    parser.add_argument('--retry-after-ms', type=int, default=200)
+    parser.add_argument('--seed', type=int)
+    parser.parse_args(namespace=settings)
+
+    if settings.seed is not None:
+        random.seed(settings.seed)
+    app.run(host=settings.host, port=settings.port, threaded=True)
+
+if __name__ == '__main__':
+    main()
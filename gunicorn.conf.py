@@ -0,0 +1,27 @@
+import os
+
+# Configuração do gunicorn usada no Procfile (gunicorn -c gunicorn.conf.py main:app)
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '1'))
+# gthread nos dois modos: o BEGIN IMMEDIATE do SQLite (limites de requisição, fila, caches) e o
+# flock do upload em partes bloqueiam de verdade e travariam o hub do gevent inteiro.
+# No demo as threads passam quase todo o tempo nos sleeps simulados, então são mais numerosas.
+# gevent continua disponível com GUNICORN_WORKER_CLASS=gevent (sleeps cooperativos no demo).
+_demo = os.environ.get('APP_MODE', 'demo') == 'demo'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '200'))
+threads = int(os.environ.get('GUNICORN_THREADS', '32' if _demo else '8'))
+# Importa o app uma vez no master; os workers nascem por fork e compartilham a memória (copy-on-write)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+if preload_app and worker_class == 'gevent':
+    # O app é importado no master antes do fork: aplicar o monkey patch antes dele,
+    # como o worker gevent faria (senão threading.local e sockets ficam sem patch)
+    from gevent import monkey
+    monkey.patch_all()
+
+def when_ready(server):
+    """Master pronto e workers ainda não criados: carrega as dependências pesadas uma única vez"""
+    if server.cfg.preload_app:
+        from app_factory import warm_up
+        warm_up(server.app.wsgi().config['APP_MODE'])
@@ -0,0 +1,101 @@
+import json
+from datetime import datetime
+
+from .user import db
+
+class Video(db.Model):
+    """Vídeo enviado (o arquivo em si fica em database/videos por VIDEO_RETENTION_SECONDS)"""
+    __tablename__ = 'video'
+
+    id = db.Column(db.String(36), primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)
+    filename = db.Column(db.String(255), nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True, index=True)
+    size_bytes = db.Column(db.BigInteger, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_video_owner_created', 'owner', 'created_at', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<Video {self.id}>'
+
+    def to_dict(self):
+        return {
+            'video_id': self.id,
+            'filename': self.filename,
+            'size_bytes': self.size_bytes,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+class Transcription(db.Model):
+    """Transcrição do Whisper de um vídeo"""
+    __tablename__ = 'transcription'
+
+    id = db.Column(db.Integer, primary_key=True)
+    video_id = db.Column(db.String(36), db.ForeignKey('video.id', ondelete='CASCADE'), nullable=False, index=True)
+    language = db.Column(db.String(20), nullable=True)
+    duration = db.Column(db.Float, nullable=True)
+    text = db.Column(db.Text, nullable=False, default='')
+    data = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Transcription {self.id} video={self.video_id}>'
+
+    def get_data(self):
+        return json.loads(self.data)
+
+class Generation(db.Model):
+    """Conteúdo gerado pelo pipeline (análise, descrição, hashtags, palavras-chave e legendas)"""
+    __tablename__ = 'generation'
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner = db.Column(db.String(64), nullable=False)
+    video_id = db.Column(db.String(36), db.ForeignKey('video.id', ondelete='SET NULL'), nullable=True, index=True)
+    product = db.Column(db.String(200), nullable=True)
+    product_link = db.Column(db.String(1000), nullable=True)
+    platform = db.Column(db.String(50), nullable=True)
+    tone = db.Column(db.String(50), nullable=True)
+    mode = db.Column(db.String(20), nullable=True)
+    analysis = db.Column(db.Text, nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    hashtags = db.Column(db.Text, nullable=True)
+    keywords = db.Column(db.Text, nullable=True)
+    subtitles = db.Column(db.Text, nullable=True)
+    timings = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Paginação por cursor: (owner, created_at, id) cobre o filtro e a ordenação sem OFFSET
+    __table_args__ = (
+        db.Index('ix_generation_owner_created', 'owner', 'created_at', 'id'),
+        db.Index('ix_generation_owner_platform_created', 'owner', 'platform', 'created_at', 'id'),
+        db.Index('ix_generation_owner_product', 'owner', 'product'),
+    )
+
+    def __repr__(self):
+        return f'<Generation {self.id} {self.product}>'
+
+    def to_summary(self):
+        return {
+            'generation_id': self.id,
+            'video_id': self.video_id,
+            'product': self.product,
+            'platform': self.platform,
+            'tone': self.tone,
+            'description': self.description,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def to_dict(self):
+        return {
+            **self.to_summary(),
+            'product_link': self.product_link,
+            'mode': self.mode,
+            'analysis': json.loads(self.analysis) if self.analysis else None,
+            'hashtags': self.hashtags,
+            'keywords': json.loads(self.keywords) if self.keywords else None,
+            'subtitles': json.loads(self.subtitles) if self.subtitles else None,
+            'timings_ms': json.loads(self.timings) if self.timings else None
+        }
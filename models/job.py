@@ -0,0 +1,44 @@
+import json
+from datetime import datetime
+
+from .user import db
+
+class Job(db.Model):
+    """Tarefa em segundo plano persistida no SQLite (extração, transcrição, etc.)"""
+    __tablename__ = 'job'
+
+    id = db.Column(db.String(36), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)
+    stage = db.Column(db.String(50), nullable=True)
+    progress = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker_id = db.Column(db.String(64), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+    def get_payload(self):
+        return json.loads(self.payload) if self.payload else {}
+
+    def get_result(self):
+        return json.loads(self.result) if self.result else None
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from .user import db
+
+class UploadSession(db.Model):
+    """Upload em partes (retomável) gravado diretamente em disco"""
+    __tablename__ = 'upload_session'
+
+    id = db.Column(db.String(36), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    path = db.Column(db.String(500), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='uploading')
+    job_id = db.Column(db.String(36), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received}/{self.total_size}>'
+
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'filename': self.filename,
+            'size': self.total_size,
+            'offset': self.received,
+            'status': self.status,
+            'job_id': self.job_id
+        }
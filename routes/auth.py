@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify, session
 from flask_cors import cross_origin
 import hashlib
 import os
+import uuid
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -30,6 +31,7 @@ def login():
     # Verificar senha
     if password == DEFAULT_PASSWORD:
         session['authenticated'] = True
+        session['sid'] = uuid.uuid4().hex
         session.permanent = True
         
         response = jsonify({
@@ -49,6 +51,7 @@ def login():
 def logout():
     """Endpoint para logout"""
     session.pop('authenticated', None)
+    session.pop('sid', None)
     response = jsonify({
         'success': True,
         'message': 'Logout realizado com sucesso'
@@ -87,4 +90,3 @@ def require_auth(f):
         return f(*args, **kwargs)
     decorated_function.__name__ = f.__name__
     return decorated_function
-
@@ -1,16 +1,112 @@
-import openai
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from flask_cors import cross_origin
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import queue
 import re
 import json
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from src.models.user import db
+from src.services.history import current_owner, record_generation
+from src.services.json_stream import IncrementalJSONParser, parse_json_object
+from src.services.llm_cache import cached_completion, make_cache_key
+from src.services.openai_client import create_chat_completion
+from src.services.rate_limiter import ConcurrencyLimiter
+from src.services.request_limits import rate_limit
+from src.services.subtitles import SUBTITLE_FORMATS, render_subtitles
+from .link_classifier import detect_platform
+from .sse import sse_event, sse_response
 
 content_bp = Blueprint('content', __name__)
 
-def analyze_video_content(transcription_text):
-    """Analisa o conteúdo do vídeo para identificar produto e nicho"""
-    try:
-        client = openai.OpenAI()
+# Pool limitado compartilhado pelas etapas que rodam em paralelo após a análise
+GENERATION_MAX_WORKERS = int(os.environ.get('GENERATION_MAX_WORKERS', '6'))
+_generation_executor = ThreadPoolExecutor(max_workers=GENERATION_MAX_WORKERS,
+                                          thread_name_prefix='generation')
+
+# Lote: itens processados em paralelo por processo e teto global (todos os workers) de pipelines simultâneos
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '200'))
+BATCH_ITEM_WORKERS = int(os.environ.get('BATCH_ITEM_WORKERS', '4'))
+GENERATION_GLOBAL_CONCURRENCY = int(os.environ.get('GENERATION_GLOBAL_CONCURRENCY', '4'))
+# Espera máxima de um item por uma vaga global antes de falhar (só aquele item)
+GENERATION_SLOT_TIMEOUT = float(os.environ.get('GENERATION_SLOT_TIMEOUT', '120'))
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_ITEM_WORKERS, thread_name_prefix='batch')
+_generation_slots = ConcurrencyLimiter('generation', GENERATION_GLOBAL_CONCURRENCY)
+
+STAGE_ERRORS = {
+    'analysis': 'Erro na análise do conteúdo',
+    'description': 'Erro na geração da descrição',
+    'keywords': 'Erro na geração de palavras-chave',
+    'subtitles': 'Erro na formatação de legendas',
+    'structured': 'Erro na geração de conteúdo'
+}
+
+# Modo padrão do generate-all: 'pipeline' (três chamadas) ou 'single' (uma chamada com JSON schema)
+GENERATION_MODE = os.environ.get('GENERATION_MODE', 'pipeline')
+# Saída estruturada (json_schema) exige um modelo que suporte o recurso
+STRUCTURED_MODEL = os.environ.get('STRUCTURED_MODEL', 'gpt-4o')
+
+# Incrementar ao alterar o texto de um prompt para invalidar o cache das respostas antigas
+PROMPT_VERSIONS = {
+    'analysis': 1,
+    'description': 1,
+    'keywords': 1,
+    'structured': 1
+}
+
+class GenerationStageError(Exception):
+    """Falha em uma etapa do pipeline de geração"""
+
+    def __init__(self, stage, timings):
+        super().__init__(STAGE_ERRORS.get(stage, 'Erro na geração de conteúdo'))
+        self.stage = stage
+        self.timings = timings
+
+def _chat_completion(messages, temperature, prompt_name, use_cache=True, model="gpt-4", on_delta=None,
+                     response_format=None):
+    """Chama o chat completions passando pelo cache de respostas e retorna o texto.
+    
+    Com `on_delta`, a resposta é pedida em streaming e cada trecho é repassado ao callback.
+    """
+    streamed = []
+    
+    def request_completion():
+        if on_delta is None:
+            extra = {'response_format': response_format} if response_format else {}
+            response = create_chat_completion(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                **extra
+            )
+            return response.choices[0].message.content
         
+        parts = []
+        for chunk in create_chat_completion(model=model, messages=messages, temperature=temperature, stream=True):
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                streamed.append(delta)
+                on_delta(delta)
+        return ''.join(parts)
+    
+    key = make_cache_key(model, messages, temperature, PROMPT_VERSIONS[prompt_name])
+    content = cached_completion(key, request_completion, bypass=not use_cache)
+    
+    # Resposta veio do cache ou de outra requisição: entregar de uma vez
+    if on_delta is not None and not streamed and content:
+        on_delta(content)
+    
+    return content
+
+def analyze_video_content(transcription_text, use_cache=True, on_field=None):
+    """Analisa o conteúdo do vídeo para identificar produto e nicho.
+    
+    A resposta é lida em streaming; `on_field(chave, valor)` é chamado para cada campo
+    do JSON assim que ele termina de chegar.
+    """
+    try:
         prompt = f"""
         Analise a seguinte transcrição de um vídeo de marketing de afiliados e identifique:
         1. O produto ou serviço sendo promovido
@@ -31,22 +127,22 @@ def analyze_video_content(transcription_text):
         - palavras_chave: lista de palavras-chave relevantes
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um especialista em marketing de afiliados e análise de conteúdo."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.3
-        )
+        parser = IncrementalJSONParser()
         
-        # Tentar extrair JSON da resposta
-        content = response.choices[0].message.content
+        def on_delta(delta):
+            for key, value in parser.feed(delta):
+                if on_field:
+                    on_field(key, value)
         
-        # Procurar por JSON na resposta
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        _chat_completion([
+            {"role": "system", "content": "Você é um especialista em marketing de afiliados e análise de conteúdo."},
+            {"role": "user", "content": prompt}
+        ], temperature=0.3, prompt_name='analysis', use_cache=use_cache, on_delta=on_delta)
+        
+        # JSON extraído durante o streaming, tolerando texto antes e depois
+        analysis = parser.result()
+        if analysis:
+            return analysis
         else:
             # Fallback se não conseguir extrair JSON
             return {
@@ -62,11 +158,9 @@ def analyze_video_content(transcription_text):
         print(f"Erro na análise de conteúdo: {e}")
         return None
 
-def generate_optimized_description(analysis, tone="entusiasmado"):
+def generate_optimized_description(analysis, tone="entusiasmado", use_cache=True, on_delta=None):
     """Gera descrição otimizada para o vídeo"""
     try:
-        client = openai.OpenAI()
-        
         prompt = f"""
         Crie uma descrição otimizada para um vídeo de marketing de afiliados com base na seguinte análise:
         
@@ -90,16 +184,10 @@ def generate_optimized_description(analysis, tone="entusiasmado"):
         HASHTAGS: [lista de hashtags separadas por espaço]
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um especialista em copywriting para marketing de afiliados e redes sociais."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7
-        )
-        
-        content = response.choices[0].message.content
+        content = _chat_completion([
+            {"role": "system", "content": "Você é um especialista em copywriting para marketing de afiliados e redes sociais."},
+            {"role": "user", "content": prompt}
+        ], temperature=0.7, prompt_name='description', use_cache=use_cache, on_delta=on_delta)
         
         # Extrair descrição e hashtags
         description_match = re.search(r'DESCRIÇÃO:\s*(.*?)(?=HASHTAGS:|$)', content, re.DOTALL)
@@ -117,11 +205,45 @@ def generate_optimized_description(analysis, tone="entusiasmado"):
         print(f"Erro na geração de descrição: {e}")
         return None
 
-def generate_keywords_and_tips(analysis):
+class DescriptionStreamFilter:
+    """Repassa apenas o texto da descrição (entre DESCRIÇÃO: e HASHTAGS:) durante o streaming"""
+    
+    START = 'DESCRIÇÃO:'
+    END = 'HASHTAGS:'
+    
+    def __init__(self):
+        self.buffer = ''
+        self.sent = 0
+    
+    def feed(self, delta):
+        self.buffer += delta
+        text = self.buffer
+        
+        start = text.find(self.START)
+        if start >= 0:
+            text = text[start + len(self.START):].lstrip()
+        elif self.START.startswith(text.lstrip()):
+            # Pode ser o rótulo ainda incompleto
+            return ''
+        
+        end = text.find(self.END)
+        if end >= 0:
+            text = text[:end].rstrip()
+        else:
+            # Segura um possível início de "HASHTAGS:" no fim do buffer
+            for size in range(min(len(self.END), len(text)), 0, -1):
+                if self.END.startswith(text[-size:]):
+                    text = text[:-size]
+                    break
+            text = text.rstrip()
+        
+        visible = text[self.sent:]
+        self.sent = max(self.sent, len(text))
+        return visible
+
+def generate_keywords_and_tips(analysis, use_cache=True):
     """Gera palavras-chave e dicas de postagem"""
     try:
-        client = openai.OpenAI()
-        
         prompt = f"""
         Com base na análise do vídeo de marketing de afiliados, gere:
         
@@ -143,21 +265,15 @@ def generate_keywords_and_tips(analysis):
         }}
         """
         
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "Você é um especialista em marketing digital e tendências de redes sociais."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.5
-        )
-        
-        content = response.choices[0].message.content
+        content = _chat_completion([
+            {"role": "system", "content": "Você é um especialista em marketing digital e tendências de redes sociais."},
+            {"role": "user", "content": prompt}
+        ], temperature=0.5, prompt_name='keywords', use_cache=use_cache)
         
         # Tentar extrair JSON da resposta
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            return json.loads(json_match.group())
+        keywords = parse_json_object(content)
+        if keywords:
+            return keywords
         else:
             # Fallback
             return {
@@ -177,64 +293,271 @@ def generate_keywords_and_tips(analysis):
         print(f"Erro na geração de palavras-chave: {e}")
         return None
 
-def format_subtitles(transcription):
-    """Formata a transcrição em legendas com timestamps"""
+def _string_list():
+    return {"type": "array", "items": {"type": "string"}}
+
+def _strict_object(properties):
+    return {"type": "object", "additionalProperties": False,
+            "required": list(properties), "properties": properties}
+
+STRUCTURED_SCHEMA = _strict_object({
+    "analysis": _strict_object({
+        "produto": {"type": "string"},
+        "nicho": {"type": "string"},
+        "publico_alvo": {"type": "string"},
+        "beneficios": _string_list(),
+        "tom": {"type": "string"},
+        "palavras_chave": _string_list()
+    }),
+    "description": {"type": "string"},
+    "hashtags": {"type": "string"},
+    "keywords": _strict_object({
+        "palavras_chave": _string_list(),
+        "dicas_postagem": _string_list(),
+        "melhor_horario": {"type": "string"},
+        "tendencias": _string_list()
+    })
+})
+
+_JSON_TYPES = {'object': dict, 'array': list, 'string': str}
+
+def validate_structured(value, schema=STRUCTURED_SCHEMA, path='$'):
+    """Valida o subconjunto de JSON schema usado em STRUCTURED_SCHEMA; levanta ValueError"""
+    if not isinstance(value, _JSON_TYPES[schema['type']]):
+        raise ValueError(f"{path}: esperado {schema['type']}")
+    if schema['type'] == 'object':
+        for key in schema['required']:
+            if key not in value:
+                raise ValueError(f"{path}.{key}: campo obrigatório ausente")
+            validate_structured(value[key], schema['properties'][key], f"{path}.{key}")
+    elif schema['type'] == 'array':
+        for i, item in enumerate(value):
+            validate_structured(item, schema['items'], f"{path}[{i}]")
+    return value
+
+def generate_all_structured(transcription_text, tone="entusiasmado", use_cache=True):
+    """Gera análise, descrição, hashtags, palavras-chave, dicas e tendências em uma única chamada"""
     try:
-        words = transcription.get('words', [])
-        if not words:
-            # Fallback se não tiver words
-            text = transcription.get('text', '')
-            words_list = text.split()
-            formatted_subtitles = []
-            
-            for i, word in enumerate(words_list):
-                start_time = i * 0.5  # Aproximação
-                end_time = (i + 1) * 0.5
-                formatted_subtitles.append({
-                    "start": start_time,
-                    "end": end_time,
-                    "text": word
-                })
-            
-            return formatted_subtitles
+        prompt = f"""
+        Analise a transcrição de um vídeo de marketing de afiliados e produza, de uma vez:
         
-        # Agrupar palavras em frases de 5-8 palavras
-        formatted_subtitles = []
-        current_group = []
-        group_start = None
+        1. analysis: produto, nicho, publico_alvo, beneficios, tom e palavras_chave do vídeo
+        2. description: descrição de 150-300 caracteres no tom "{tone}", com gancho inicial impactante,
+           principais benefícios, chamada para ação clara e emojis relevantes
+        3. hashtags: hashtags relevantes separadas por espaço
+        4. keywords: palavras_chave (15-20 para SEO e descoberta), dicas_postagem (5 dicas para viralizar),
+           melhor_horario (horários sugeridos para postar) e tendencias (tendências atuais do nicho)
         
-        for word in words:
-            if group_start is None:
-                group_start = word.get('start', 0)
-            
-            current_group.append(word.get('word', ''))
-            
-            # Criar grupo quando atingir 6 palavras ou encontrar pontuação
-            if len(current_group) >= 6 or word.get('word', '').endswith(('.', '!', '?')):
-                formatted_subtitles.append({
-                    "start": group_start,
-                    "end": word.get('end', group_start + 3),
-                    "text": ' '.join(current_group).strip()
-                })
-                current_group = []
-                group_start = None
+        Transcrição:
+        {transcription_text}
+        """
         
-        # Adicionar último grupo se houver
-        if current_group:
-            formatted_subtitles.append({
-                "start": group_start or 0,
-                "end": (group_start or 0) + 3,
-                "text": ' '.join(current_group).strip()
+        content = _chat_completion([
+            {"role": "system", "content": "Você é um especialista em marketing de afiliados, copywriting e tendências de redes sociais."},
+            {"role": "user", "content": prompt}
+        ], temperature=0.5, prompt_name='structured', use_cache=use_cache, model=STRUCTURED_MODEL,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "conteudo_afiliado", "strict": True, "schema": STRUCTURED_SCHEMA}
             })
         
-        return formatted_subtitles
+        return validate_structured(json.loads(content))
+        
+    except Exception as e:
+        print(f"Erro na geração estruturada: {e}")
+        return None
+
+def format_subtitles(transcription, fmt='json', **options):
+    """Formata a transcrição em legendas com timestamps (json, srt, vtt ou ass)"""
+    try:
+        return render_subtitles(transcription, fmt, **options)
         
     except Exception as e:
         print(f"Erro na formatação de legendas: {e}")
-        return []
+        return [] if fmt == 'json' else ''
+
+def _timed(func, *args):
+    """Executa a função e retorna (resultado, duração em ms)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+# Campos da análise usados por cada etapa; a etapa começa assim que eles chegam no streaming
+STAGE_DEPENDENCIES = {
+    'keywords': {'produto', 'nicho'},
+    'description': {'produto', 'nicho', 'publico_alvo', 'beneficios'}
+}
+
+class AnalysisFanOut:
+    """Dispara as etapas dependentes da análise antes do fim da resposta do modelo"""
+    
+    def __init__(self, submit_stage):
+        self.submit_stage = submit_stage
+        self.fields = {}
+        self.started = set()
+    
+    def on_field(self, key, value):
+        self.fields[key] = value
+        self._start_ready(self.fields)
+    
+    def finish(self, analysis):
+        """Inicia as etapas que ainda não começaram usando a análise completa"""
+        self._start_ready(analysis, force=True)
+    
+    def _start_ready(self, analysis, force=False):
+        for stage, required in STAGE_DEPENDENCIES.items():
+            if stage not in self.started and (force or required <= analysis.keys()):
+                self.started.add(stage)
+                self.submit_stage(stage, dict(analysis))
+
+def _submit_stage(futures, stage, analysis, tone, use_cache, on_delta=None):
+    if stage == 'description':
+        future = _generation_executor.submit(_timed, generate_optimized_description, analysis, tone, use_cache, on_delta)
+    else:
+        future = _generation_executor.submit(_timed, generate_keywords_and_tips, analysis, use_cache)
+    futures[future] = stage
+    return future
+
+def run_generation_pipeline(transcription, tone="entusiasmado", use_cache=True):
+    """Executa a análise e, em paralelo, descrição, palavras-chave e legendas"""
+    pipeline_start = time.perf_counter()
+    timings = {}
+    
+    # Legendas não dependem da análise; descrição e palavras-chave começam conforme os campos chegam
+    futures = {_generation_executor.submit(_timed, format_subtitles, transcription): 'subtitles'}
+    fan_out = AnalysisFanOut(lambda stage, analysis: _submit_stage(futures, stage, analysis, tone, use_cache))
+    
+    results = {}
+    try:
+        analysis, timings['analysis'] = _timed(analyze_video_content, transcription.get('text', ''),
+                                               use_cache, fan_out.on_field)
+        if not analysis:
+            raise GenerationStageError('analysis', timings)
+        fan_out.finish(analysis)
+        
+        for future in as_completed(list(futures)):
+            stage = futures[future]
+            results[stage], timings[stage] = future.result()
+            if results[stage] is None:
+                raise GenerationStageError(stage, timings)
+    except Exception:
+        # Cancela as etapas que ainda não começaram; as que já estão rodando são descartadas
+        for future in futures:
+            future.cancel()
+        raise
+    
+    timings['total'] = round((time.perf_counter() - pipeline_start) * 1000, 1)
+    
+    return {
+        'analysis': analysis,
+        'description': results['description']['description'],
+        'hashtags': results['description']['hashtags'],
+        'keywords': results['keywords'],
+        'subtitles': results['subtitles'],
+        'timings_ms': timings
+    }
+
+def _use_cache(data):
+    """O cliente pode ignorar o cache com {"use_cache": false} ou Cache-Control: no-cache"""
+    if 'no-cache' in request.headers.get('Cache-Control', ''):
+        return False
+    return data.get('use_cache', True) is not False
+
+def run_structured_pipeline(transcription, tone="entusiasmado", use_cache=True):
+    """Mesmo resultado de run_generation_pipeline com uma única chamada ao modelo"""
+    pipeline_start = time.perf_counter()
+    timings = {}
+    
+    subtitles_future = _generation_executor.submit(_timed, format_subtitles, transcription)
+    content, timings['structured'] = _timed(generate_all_structured, transcription.get('text', ''), tone, use_cache)
+    if not content:
+        subtitles_future.cancel()
+        raise GenerationStageError('structured', timings)
+    subtitles, timings['subtitles'] = subtitles_future.result()
+    
+    timings['total'] = round((time.perf_counter() - pipeline_start) * 1000, 1)
+    
+    return {
+        'analysis': content['analysis'],
+        'description': content['description'],
+        'hashtags': content['hashtags'],
+        'keywords': content['keywords'],
+        'subtitles': subtitles,
+        'timings_ms': timings
+    }
+
+def stream_generation_pipeline(transcription, tone="entusiasmado", use_cache=True, on_complete=None):
+    """Gera eventos SSE de cada etapa assim que ficam prontas; a descrição chega token a token.
+
+    `on_complete(content)` recebe o conteúdo completo ao final; o dict retornado vai no evento done.
+    """
+    pipeline_start = time.perf_counter()
+    timings = {}
+    content = {}
+    
+    events = queue.Queue()
+    description_filter = DescriptionStreamFilter()
+    
+    def on_delta(delta):
+        visible = description_filter.feed(delta)
+        if visible:
+            events.put(('description_delta', visible))
+    
+    def submit_stage(stage, analysis):
+        future = _submit_stage(futures, stage, analysis, tone, use_cache, on_delta)
+        future.add_done_callback(lambda f: events.put((stage, f)))
+    
+    futures = {_generation_executor.submit(_timed, format_subtitles, transcription): 'subtitles'}
+    for future in futures:
+        future.add_done_callback(lambda f: events.put(('subtitles', f)))
+    fan_out = AnalysisFanOut(submit_stage)
+    
+    analysis, timings['analysis'] = _timed(analyze_video_content, transcription.get('text', ''),
+                                           use_cache, fan_out.on_field)
+    if not analysis:
+        for future in futures:
+            future.cancel()
+        yield sse_event('error', {'error': STAGE_ERRORS['analysis'], 'stage': 'analysis'})
+        return
+    fan_out.finish(analysis)
+    content['analysis'] = analysis
+    yield sse_event('analysis', {'analysis': analysis, 'elapsed_ms': timings['analysis']})
+    
+    pending = set(futures.values())
+    try:
+        while pending:
+            stage, value = events.get()
+            if stage == 'description_delta':
+                yield sse_event('description_delta', {'delta': value})
+                continue
+            
+            pending.discard(stage)
+            result, timings[stage] = value.result()
+            if result is None:
+                yield sse_event('error', {'error': STAGE_ERRORS[stage], 'stage': stage})
+                return
+            
+            if stage == 'description':
+                payload = {'description': result['description'], 'hashtags': result['hashtags']}
+            else:
+                payload = {stage: result}
+            content.update(payload)
+            yield sse_event(stage, {**payload, 'elapsed_ms': timings[stage]})
+        
+        timings['total'] = round((time.perf_counter() - pipeline_start) * 1000, 1)
+        extra = on_complete({**content, 'timings_ms': timings}) if on_complete else None
+        yield sse_event('done', {'success': True, 'timings_ms': timings, **(extra or {})})
+    except Exception as e:
+        print(f"Erro no pipeline de geração: {e}")
+        yield sse_event('error', {'error': 'Erro interno do servidor'})
+    finally:
+        # Cliente desconectou ou uma etapa falhou: descartar o que ainda não começou
+        for future in futures:
+            future.cancel()
 
 @content_bp.route('/analyze', methods=['POST'])
 @cross_origin()
+@rate_limit('content')
 def analyze_content():
     """Analisa o conteúdo transcrito do vídeo"""
     data = request.get_json()
@@ -244,7 +567,7 @@ def analyze_content():
     
     transcription_text = data['transcription']
     
-    analysis = analyze_video_content(transcription_text)
+    analysis = analyze_video_content(transcription_text, _use_cache(data))
     
     if not analysis:
         return jsonify({'error': 'Erro na análise do conteúdo'}), 500
@@ -256,6 +579,7 @@ def analyze_content():
 
 @content_bp.route('/generate-description', methods=['POST'])
 @cross_origin()
+@rate_limit('content')
 def generate_description():
     """Gera descrição otimizada para o vídeo"""
     data = request.get_json()
@@ -266,7 +590,7 @@ def generate_description():
     analysis = data['analysis']
     tone = data.get('tone', 'entusiasmado')
     
-    description_data = generate_optimized_description(analysis, tone)
+    description_data = generate_optimized_description(analysis, tone, _use_cache(data))
     
     if not description_data:
         return jsonify({'error': 'Erro na geração da descrição'}), 500
@@ -279,6 +603,7 @@ def generate_description():
 
 @content_bp.route('/generate-keywords', methods=['POST'])
 @cross_origin()
+@rate_limit('content')
 def generate_keywords():
     """Gera palavras-chave e dicas de postagem"""
     data = request.get_json()
@@ -288,7 +613,7 @@ def generate_keywords():
     
     analysis = data['analysis']
     
-    keywords_data = generate_keywords_and_tips(analysis)
+    keywords_data = generate_keywords_and_tips(analysis, _use_cache(data))
     
     if not keywords_data:
         return jsonify({'error': 'Erro na geração de palavras-chave'}), 500
@@ -298,26 +623,62 @@ def generate_keywords():
         'keywords': keywords_data
     })
 
+# Ajustes de legenda aceitos no corpo de /format-subtitles
+SUBTITLE_OPTIONS = {'max_line_chars': int, 'max_lines': int, 'max_cps': float,
+                    'min_duration': float, 'max_duration': float, 'min_gap': float}
+
 @content_bp.route('/format-subtitles', methods=['POST'])
 @cross_origin()
 def format_subtitles_endpoint():
-    """Formata legendas com timestamps"""
+    """Formata legendas com timestamps; `format` escolhe json (padrão), srt, vtt ou ass"""
     data = request.get_json()
     
     if not data or 'transcription' not in data:
         return jsonify({'error': 'Transcrição não fornecida'}), 400
     
     transcription = data['transcription']
+    fmt = str(data.get('format') or request.args.get('format', 'json')).lower()
+    if fmt not in SUBTITLE_FORMATS:
+        return jsonify({'error': f'Formato inválido. Use: {", ".join(SUBTITLE_FORMATS)}'}), 400
+    
+    try:
+        options = {key: cast(data[key]) for key, cast in SUBTITLE_OPTIONS.items() if data.get(key) is not None}
+    except (TypeError, ValueError):
+        options = None
+    if options is None or any(value <= 0 for key, value in options.items() if key != 'min_gap'):
+        return jsonify({'error': 'Parâmetros de legenda inválidos'}), 400
     
-    subtitles = format_subtitles(transcription)
+    subtitles = format_subtitles(transcription, fmt, **options)
+    
+    if fmt != 'json':
+        return Response(subtitles, mimetype=SUBTITLE_FORMATS[fmt], headers={
+            'Content-Disposition': f'attachment; filename=legendas.{fmt}'
+        })
     
     return jsonify({
         'success': True,
         'subtitles': subtitles
     })
 
+def _save_generation(owner, data, content, tone, mode):
+    """Grava o resultado no histórico; retorna o id ou None (falha no banco não derruba a geração)"""
+    product_link = data.get('product_link') if isinstance(data.get('product_link'), str) else None
+    video_id = data.get('video_id') if isinstance(data.get('video_id'), str) else None
+    try:
+        generation = record_generation(db.session, owner, content, video_id=video_id,
+                                       product_link=product_link,
+                                       platform=detect_platform(product_link) if product_link else None,
+                                       tone=tone, mode=mode)
+        db.session.commit()
+        return generation.id
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        print(f"Erro ao salvar o histórico: {e}")
+        return None
+
 @content_bp.route('/generate-all', methods=['POST'])
 @cross_origin()
+@rate_limit('content')
 def generate_all_content():
     """Gera todo o conteúdo de uma vez (análise, descrição, palavras-chave, legendas)"""
     data = request.get_json()
@@ -328,30 +689,124 @@ def generate_all_content():
     transcription = data['transcription']
     tone = data.get('tone', 'entusiasmado')
     
-    # Análise do conteúdo
-    analysis = analyze_video_content(transcription.get('text', ''))
-    if not analysis:
-        return jsonify({'error': 'Erro na análise do conteúdo'}), 500
+    mode = 'single' if data.get('mode', GENERATION_MODE) == 'single' else 'pipeline'
+    pipeline = run_structured_pipeline if mode == 'single' else run_generation_pipeline
     
-    # Gerar descrição
-    description_data = generate_optimized_description(analysis, tone)
-    if not description_data:
-        return jsonify({'error': 'Erro na geração da descrição'}), 500
-    
-    # Gerar palavras-chave e dicas
-    keywords_data = generate_keywords_and_tips(analysis)
-    if not keywords_data:
-        return jsonify({'error': 'Erro na geração de palavras-chave'}), 500
-    
-    # Formatar legendas
-    subtitles = format_subtitles(transcription)
+    try:
+        content = pipeline(transcription, tone, _use_cache(data))
+    except GenerationStageError as e:
+        return jsonify({'error': str(e), 'stage': e.stage, 'timings_ms': e.timings}), 500
+    except Exception as e:
+        print(f"Erro no pipeline de geração: {e}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
     
     return jsonify({
         'success': True,
-        'analysis': analysis,
-        'description': description_data['description'],
-        'hashtags': description_data['hashtags'],
-        'keywords': keywords_data,
-        'subtitles': subtitles
+        'generation_id': _save_generation(current_owner(), data, content, tone, mode),
+        **content
     })
 
+@content_bp.route('/generate-all/stream', methods=['POST'])
+@cross_origin()
+@rate_limit('content')
+def generate_all_content_stream():
+    """Versão em streaming (text/event-stream) do generate-all: cada seção é enviada quando fica pronta"""
+    data = request.get_json()
+    
+    if not data or 'transcription' not in data:
+        return jsonify({'error': 'Transcrição não fornecida'}), 400
+    
+    transcription = data['transcription']
+    tone = data.get('tone', 'entusiasmado')
+    
+    # O gerador roda depois que a view retorna: guardar app e dono para gravar o histórico no final
+    app = current_app._get_current_object()
+    owner = current_owner()
+    
+    def on_complete(content):
+        with app.app_context():
+            return {'generation_id': _save_generation(owner, data, content, tone, 'pipeline')}
+    
+    return sse_response(stream_generation_pipeline(transcription, tone, _use_cache(data), on_complete))
+
+def _generate_batch_item(index, item, tone, use_cache, mode=GENERATION_MODE):
+    """Processa um item do lote; falhas ficam no resultado do item em vez de abortar o lote"""
+    item_id = item.get('id', index)
+    transcription = item.get('transcription')
+    
+    if not isinstance(transcription, dict):
+        return {'index': index, 'id': item_id, 'success': False, 'error': 'Transcrição não fornecida'}
+    
+    try:
+        pipeline = run_structured_pipeline if item.get('mode', mode) == 'single' else run_generation_pipeline
+        with _generation_slots.slot(timeout=GENERATION_SLOT_TIMEOUT):
+            content = pipeline(transcription, item.get('tone', tone), use_cache)
+        return {'index': index, 'id': item_id, 'success': True, **content}
+    except TimeoutError:
+        return {'index': index, 'id': item_id, 'success': False,
+                'error': 'Servidor ocupado: tempo de espera por uma vaga de geração esgotado'}
+    except GenerationStageError as e:
+        return {'index': index, 'id': item_id, 'success': False, 'error': str(e), 'stage': e.stage}
+    except Exception as e:
+        print(f"Erro no item {item_id} do lote: {e}")
+        return {'index': index, 'id': item_id, 'success': False, 'error': 'Erro interno do servidor'}
+
+def run_batch_generation(items, tone="entusiasmado", use_cache=True, mode=GENERATION_MODE):
+    """Gera o conteúdo de cada item e produz os resultados na ordem em que terminam"""
+    futures = [_batch_executor.submit(_generate_batch_item, index, item, tone, use_cache, mode)
+               for index, item in enumerate(items)]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+def stream_batch_generation(items, tone="entusiasmado", use_cache=True, mode=GENERATION_MODE):
+    """Eventos SSE por item concluído, com progresso acumulado"""
+    completed = failed = 0
+    for result in run_batch_generation(items, tone, use_cache, mode):
+        completed += 1
+        failed += 0 if result['success'] else 1
+        yield sse_event('item', result)
+        yield sse_event('progress', {'completed': completed, 'failed': failed, 'total': len(items)})
+    
+    yield sse_event('done', {'success': True, 'completed': completed, 'failed': failed, 'total': len(items)})
+
+@content_bp.route('/generate-batch', methods=['POST'])
+@cross_origin()
+@rate_limit('content')
+def generate_batch():
+    """Gera conteúdo para várias transcrições; por padrão responde em streaming (text/event-stream)"""
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('items', data.get('transcriptions')), list):
+        return jsonify({'error': 'Lista de itens não fornecida'}), 400
+    
+    # Aceita {"items": [{"id", "transcription", "tone"}]} ou {"transcriptions": [...]}
+    if 'items' in data:
+        items = [item if isinstance(item, dict) else {} for item in data['items']]
+    else:
+        items = [{'transcription': transcription} for transcription in data['transcriptions']]
+    
+    if not items:
+        return jsonify({'error': 'Lista de itens vazia'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'Máximo de {BATCH_MAX_ITEMS} itens por lote'}), 400
+    
+    tone = data.get('tone', 'entusiasmado')
+    use_cache = _use_cache(data)
+    mode = data.get('mode', GENERATION_MODE)
+    
+    if data.get('stream', True) is False or request.args.get('stream') == '0':
+        results = sorted(run_batch_generation(items, tone, use_cache, mode), key=lambda r: r['index'])
+        failed = sum(1 for r in results if not r['success'])
+        return jsonify({
+            'success': True,
+            'results': results,
+            'completed': len(results),
+            'failed': failed,
+            'total': len(items)
+        })
+    
+    return sse_response(stream_batch_generation(items, tone, use_cache, mode))
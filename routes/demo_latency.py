@@ -0,0 +1,80 @@
+import json
+import math
+import os
+import random
+import time
+
+from flask import request
+
+# Perfis de latência simulada do modo demonstração (por etapa, em ms)
+#   dist: fixed | uniform | exponential | lognormal; spread: variação relativa (uniform) ou sigma (lognormal)
+DEMO_LATENCY_PROFILES = {
+    'off': {},
+    # Mesmos tempos fixos usados desde a primeira versão da demo
+    'classic': {
+        'generate_all': {'dist': 'fixed', 'mean_ms': 2000},
+        'analysis': {'dist': 'fixed', 'mean_ms': 800},
+        'description_token': {'dist': 'fixed', 'mean_ms': 20},
+        'keywords': {'dist': 'fixed', 'mean_ms': 300},
+    },
+    # Aproxima os tempos observados no modo completo (GPT-4 + Whisper)
+    'realistic': {
+        'upload': {'dist': 'lognormal', 'mean_ms': 4000, 'spread': 0.5},
+        'generate_all': {'dist': 'lognormal', 'mean_ms': 6000, 'spread': 0.4},
+        'analysis': {'dist': 'lognormal', 'mean_ms': 2500, 'spread': 0.4},
+        'description_token': {'dist': 'exponential', 'mean_ms': 30},
+        'keywords': {'dist': 'lognormal', 'mean_ms': 2000, 'spread': 0.4},
+    },
+}
+
+def load_profile(value):
+    """Nome de um perfil de DEMO_LATENCY_PROFILES ou JSON com as etapas"""
+    if value in DEMO_LATENCY_PROFILES:
+        return DEMO_LATENCY_PROFILES[value]
+    return json.loads(value)
+
+# DEMO_LATENCY=off desativa os atrasos; aceita também um JSON {"etapa": {"dist": ..., "mean_ms": ...}}
+DEMO_LATENCY = load_profile(os.environ.get('DEMO_LATENCY', 'classic'))
+
+def sample_delay(stage, profile=None):
+    """Sorteia o atraso da etapa em segundos (0 se a etapa não estiver no perfil)"""
+    spec = (DEMO_LATENCY if profile is None else profile).get(stage)
+    if not spec:
+        return 0.0
+    mean = spec['mean_ms'] / 1000
+    dist = spec.get('dist', 'fixed')
+    spread = spec.get('spread', 0.5)
+    if dist == 'uniform':
+        value = random.uniform(mean * (1 - spread), mean * (1 + spread))
+    elif dist == 'exponential':
+        value = random.expovariate(1 / mean) if mean > 0 else 0.0
+    elif dist == 'lognormal':
+        value = random.lognormvariate(math.log(mean) - spread ** 2 / 2, spread) if mean > 0 else 0.0
+    else:
+        value = mean
+    return max(value, 0.0)
+
+def cooperative_sleep_enabled():
+    """True quando o time.sleep foi trocado pelo do gevent (gunicorn -k gevent)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('time')
+
+def request_profile():
+    """Perfil da requisição atual; `X-Demo-Latency: off` desativa os atrasos (mede só o servidor)"""
+    if request.headers.get('X-Demo-Latency') == 'off':
+        return DEMO_LATENCY_PROFILES['off']
+    return DEMO_LATENCY
+
+def simulate(stage, profile=None):
+    """Espera o atraso simulado da etapa; retorna os segundos esperados.
+
+    Com o worker gevent o time.sleep é cooperativo: a espera não prende a thread do worker,
+    que continua atendendo outras requisições enquanto esta aguarda.
+    """
+    delay = sample_delay(stage, profile)
+    if delay:
+        time.sleep(delay)
+    return delay
@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify
+from flask_cors import cross_origin
+from src.models.user import db
+from src.services.history import (HISTORY_PAGE_SIZE, CursorError, current_owner, get_generation,
+                                  get_video_history, list_generations)
+
+history_bp = Blueprint('history', __name__)
+
+@history_bp.route('/generations', methods=['GET'])
+@cross_origin()
+def list_generations_endpoint():
+    """Lista o histórico de gerações (mais recentes primeiro) com paginação por cursor"""
+    try:
+        limit = int(request.args.get('limit', HISTORY_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'Parâmetro limit inválido'}), 400
+
+    try:
+        generations, next_cursor = list_generations(
+            db.session, current_owner(),
+            cursor=request.args.get('cursor') or None,
+            limit=limit,
+            platform=request.args.get('platform') or None,
+            product=request.args.get('product') or None,
+            video_id=request.args.get('video_id') or None
+        )
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'success': True,
+        'generations': [generation.to_summary() for generation in generations],
+        'next_cursor': next_cursor
+    })
+
+@history_bp.route('/generations/<int:generation_id>', methods=['GET'])
+@cross_origin()
+def get_generation_endpoint(generation_id):
+    """Conteúdo completo de uma geração salva (sem chamar o GPT novamente)"""
+    generation = get_generation(db.session, current_owner(), generation_id)
+    if not generation:
+        return jsonify({'error': 'Geração não encontrada'}), 404
+
+    return jsonify({
+        'success': True,
+        **generation.to_dict()
+    })
+
+@history_bp.route('/videos/<video_id>', methods=['GET'])
+@cross_origin()
+def get_video_endpoint(video_id):
+    """Dados do vídeo enviado e sua transcrição salva"""
+    found = get_video_history(db.session, current_owner(), video_id)
+    if not found:
+        return jsonify({'error': 'Vídeo não encontrado'}), 404
+
+    video, transcription = found
+    return jsonify({
+        'success': True,
+        **video.to_dict(),
+        'transcription': transcription.get_data() if transcription else None
+    })
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+DEFAULT_PLATFORM = 'Produto Digital'
+LINK_CACHE_SIZE = 4096
+
+# Regras por plataforma: `brands` casa o domínio registrável em qualquer sufixo conhecido
+# (amazon.com, amazon.com.br...), `domains` lista domínios registráveis exatos (encurtadores)
+PLATFORM_RULES = [
+    {'platform': 'Shopee', 'brands': ['shopee'], 'domains': ['shope.ee', 'shp.ee']},
+    {'platform': 'Mercado Livre', 'brands': ['mercadolivre', 'mercadolibre'], 'domains': ['meli.la']},
+    {'platform': 'Amazon', 'brands': ['amazon'], 'domains': ['amzn.to', 'amzn.com', 'a.co', 'amzn.eu']},
+    {'platform': 'AliExpress', 'brands': ['aliexpress'], 'domains': []},
+    {'platform': 'Hotmart', 'brands': ['hotmart'], 'domains': []},
+    {'platform': 'Eduzz', 'brands': ['eduzz'], 'domains': []},
+    {'platform': 'Magazine Luiza', 'brands': ['magazineluiza', 'magalu'], 'domains': []},
+    {'platform': 'Kiwify', 'brands': ['kiwify'], 'domains': []},
+    {'platform': 'Monetizze', 'brands': ['monetizze'], 'domains': []},
+]
+
+# Sufixos públicos relevantes para os mercados atendidos (subconjunto da Public Suffix List)
+PUBLIC_SUFFIXES = frozenset([
+    'com', 'net', 'org', 'io', 'co', 'to', 'ee', 'la', 'eu', 'art', 'ski', 'app', 'link', 'shop', 'store',
+    'br', 'com.br', 'net.br', 'org.br', 'mx', 'com.mx', 'ar', 'com.ar', 'cl', 'com.co', 'pe', 'com.pe',
+    'uy', 'com.uy', 've', 'com.ve', 'ec', 'com.ec', 'us', 'ca', 'uk', 'co.uk', 'de', 'fr', 'es', 'it', 'nl',
+    'pt', 'pl', 'se', 'be', 'ru', 'tr', 'com.tr', 'in', 'co.in', 'jp', 'co.jp', 'au', 'com.au', 'sg', 'com.sg',
+    'my', 'com.my', 'ph', 'com.ph', 'tw', 'com.tw', 'vn', 'com.vn', 'th', 'co.th', 'id', 'co.id', 'sa', 'ae',
+    'eg', 'com.eg', 'cn', 'com.cn',
+])
+_MAX_SUFFIX_LABELS = max(suffix.count('.') + 1 for suffix in PUBLIC_SUFFIXES)
+
+def registrable_domain(host):
+    """Domínio registrável (eTLD+1) do host: loja.amazon.com.br -> amazon.com.br"""
+    labels = host.split('.')
+    # Sufixo conhecido mais longo; sem nenhum, o último rótulo vale como sufixo (regra "*" da PSL)
+    suffix_labels = 1
+    for size in range(min(_MAX_SUFFIX_LABELS, len(labels) - 1), 0, -1):
+        if '.'.join(labels[-size:]) in PUBLIC_SUFFIXES:
+            suffix_labels = size
+            break
+    return '.'.join(labels[-suffix_labels - 1:])
+
+def _build_index(rules):
+    brands, domains = {}, {}
+    for rule in rules:
+        for brand in rule['brands']:
+            brands[brand] = rule['platform']
+        for domain in rule['domains']:
+            domains[domain] = rule['platform']
+    return brands, domains
+
+_BRAND_INDEX, _DOMAIN_INDEX = _build_index(PLATFORM_RULES)
+
+def _host(link):
+    link = link.strip()
+    if '//' not in link:
+        # Links colados sem esquema ("shopee.com.br/produto")
+        link = '//' + link
+    try:
+        host = urlsplit(link).hostname
+    except ValueError:
+        return None
+    return host.rstrip('.') if host else None
+
+@lru_cache(maxsize=LINK_CACHE_SIZE)
+def classify_host(host):
+    """(plataforma ou None, domínio registrável) para um host já normalizado"""
+    domain = registrable_domain(host)
+    platform = _DOMAIN_INDEX.get(domain)
+    if platform is None and '.' in domain:
+        brand, suffix = domain.split('.', 1)
+        # Marca só vale com sufixo conhecido: amazon.xyz não é classificado como Amazon
+        if suffix in PUBLIC_SUFFIXES:
+            platform = _BRAND_INDEX.get(brand)
+    return platform, domain
+
+def classify_link(link):
+    """Identifica a plataforma do link de afiliado; retorna (plataforma ou None, domínio)"""
+    host = _host(link) if isinstance(link, str) else None
+    if not host:
+        return None, None
+    return classify_host(host)
+
+def detect_platform(link, default=DEFAULT_PLATFORM):
+    """Nome da plataforma para exibição (padrão 'Produto Digital')"""
+    return classify_link(link)[0] or default
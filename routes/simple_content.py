@@ -1,29 +1,21 @@
 from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
-import time
+import re
+from services.request_limits import rate_limit
 from .auth import require_auth
+from .demo_latency import request_profile, simulate
+from .sse import sse_event, sse_response
 
 simple_content_bp = Blueprint('simple_content', __name__)
 
-@simple_content_bp.route('/generate-all', methods=['POST'])
-@cross_origin()
-@require_auth
-def generate_all_content():
-    """Gera todo o conteúdo de uma vez (versão demonstração)"""
-    data = request.get_json()
-    
-    if not data or 'transcription' not in data:
-        return jsonify({'error': 'Transcrição não fornecida'}), 400
-    
+def build_demo_content(data):
+    """Monta o conteúdo mockado personalizado a partir do tema e do link do produto"""
     # Obter dados do usuário
     theme = data.get('theme', 'produto digital')
     user_description = data.get('userDescription', '')
     product_link = data.get('productLink', '')
     platform = data.get('platform', 'Produto Digital')
     
-    # Simular tempo de processamento
-    time.sleep(2)
-    
     # Dados mockados personalizados baseados no tema e link
     mock_analysis = {
         "produto": theme.title(),
@@ -122,8 +114,7 @@ Este produto vai REVOLUCIONAR sua estratégia de marketing!
             {"start": 9.5, "end": 12.0, "text": "únicos para seu sucesso!"}
         ]
     
-    return jsonify({
-        'success': True,
+    return {
         'analysis': mock_analysis,
         'description': mock_description,
         'hashtags': mock_hashtags,
@@ -131,11 +122,64 @@ Este produto vai REVOLUCIONAR sua estratégia de marketing!
         'subtitles': mock_subtitles,
         'has_product_link': bool(product_link),
         'platform': platform
+    }
+
+@simple_content_bp.route('/generate-all', methods=['POST'])
+@cross_origin()
+@require_auth
+@rate_limit('content')
+def generate_all_content():
+    """Gera todo o conteúdo de uma vez (versão demonstração)"""
+    data = request.get_json()
+    
+    if not data or 'transcription' not in data:
+        return jsonify({'error': 'Transcrição não fornecida'}), 400
+    
+    # Simular tempo de processamento (DEMO_LATENCY)
+    simulate('generate_all', request_profile())
+    
+    return jsonify({
+        'success': True,
+        **build_demo_content(data)
+    })
+
+def stream_demo_content(content, profile):
+    """Emite as seções mockadas como eventos SSE, simulando o tempo de cada etapa"""
+    simulate('analysis', profile)
+    yield sse_event('analysis', {'analysis': content['analysis']})
+    
+    # Descrição enviada palavra a palavra, como no streaming do modelo
+    for token in re.findall(r'\S+\s*', content['description']):
+        simulate('description_token', profile)
+        yield sse_event('description_delta', {'delta': token})
+    yield sse_event('description', {'description': content['description'], 'hashtags': content['hashtags']})
+    
+    simulate('keywords', profile)
+    yield sse_event('keywords', {'keywords': content['keywords']})
+    yield sse_event('subtitles', {'subtitles': content['subtitles']})
+    yield sse_event('done', {
+        'success': True,
+        'has_product_link': content['has_product_link'],
+        'platform': content['platform']
     })
 
+@simple_content_bp.route('/generate-all/stream', methods=['POST'])
+@cross_origin()
+@require_auth
+@rate_limit('content')
+def generate_all_content_stream():
+    """Versão em streaming do generate-all (versão demonstração)"""
+    data = request.get_json()
+    
+    if not data or 'transcription' not in data:
+        return jsonify({'error': 'Transcrição não fornecida'}), 400
+    
+    return sse_response(stream_demo_content(build_demo_content(data), request_profile()))
+
 @simple_content_bp.route('/generate-description', methods=['POST'])
 @cross_origin()
 @require_auth
+@rate_limit('content')
 def generate_description():
     """Gera descrição otimizada (versão demonstração)"""
     data = request.get_json()
@@ -185,6 +229,7 @@ Link na bio para quem quiser saber mais 👆"""
 @simple_content_bp.route('/generate-keywords', methods=['POST'])
 @cross_origin()
 @require_auth
+@rate_limit('content')
 def generate_keywords():
     """Gera palavras-chave e dicas (versão demonstração)"""
     data = request.get_json()
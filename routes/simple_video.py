@@ -2,10 +2,16 @@ from flask import Blueprint, request, jsonify
 from flask_cors import cross_origin
 import tempfile
 import os
+from services.request_limits import rate_limit
 from .auth import require_auth
+from .demo_latency import request_profile, simulate
+from .link_classifier import DEFAULT_PLATFORM, classify_link, detect_platform
 
 simple_video_bp = Blueprint('simple_video', __name__)
 
+# Máximo de links por requisição em /classify-links
+LINK_BULK_MAX = int(os.environ.get('LINK_BULK_MAX', '10000'))
+
 @simple_video_bp.route('/health', methods=['GET'])
 @cross_origin()
 def health_check():
@@ -19,6 +25,7 @@ def health_check():
 @simple_video_bp.route('/upload', methods=['POST'])
 @cross_origin()
 @require_auth
+@rate_limit('upload')
 def upload_video():
     """Endpoint simplificado para demonstração"""
     
@@ -50,21 +57,11 @@ def upload_video():
         if file.content_length and file.content_length > 100 * 1024 * 1024:
             return jsonify({'error': 'Arquivo muito grande. Máximo 100MB.'}), 400
         
-        # Detectar plataforma do produto
-        platform = 'Produto Digital'
-        if product_link:
-            if 'shopee.com' in product_link:
-                platform = 'Shopee'
-            elif 'mercadolivre.com' in product_link or 'mercadolibre.com' in product_link:
-                platform = 'Mercado Livre'
-            elif 'amazon.com' in product_link:
-                platform = 'Amazon'
-            elif 'aliexpress.com' in product_link:
-                platform = 'AliExpress'
-            elif 'hotmart.com' in product_link:
-                platform = 'Hotmart'
-            elif 'eduzz.com' in product_link:
-                platform = 'Eduzz'
+        # Detectar plataforma do produto pelo domínio do link
+        platform = detect_platform(product_link)
+        
+        # Simular extração de áudio e transcrição (DEMO_LATENCY)
+        simulate('upload', request_profile())
         
         # Simular processamento baseado no tema e link
         base_text = f'Olá pessoal! Hoje vou falar sobre {theme}.'
@@ -106,6 +103,35 @@ def upload_video():
     except Exception as e:
         return jsonify({'error': f'Erro interno: {str(e)}'}), 500
 
+@simple_video_bp.route('/classify-links', methods=['POST'])
+@cross_origin()
+@require_auth
+def classify_links():
+    """Identifica a plataforma de uma lista de links de afiliado (importação de catálogo)"""
+    data = request.get_json(silent=True)
+    
+    links = data.get('links') if isinstance(data, dict) else None
+    if not isinstance(links, list) or not links:
+        return jsonify({'error': 'Lista de links não fornecida'}), 400
+    
+    if len(links) > LINK_BULK_MAX:
+        return jsonify({'error': f'Máximo de {LINK_BULK_MAX} links por requisição'}), 413
+    
+    results = []
+    counts = {}
+    for link in links:
+        platform, domain = classify_link(link)
+        platform = platform or DEFAULT_PLATFORM
+        counts[platform] = counts.get(platform, 0) + 1
+        results.append({'link': link, 'platform': platform, 'domain': domain})
+    
+    return jsonify({
+        'success': True,
+        'total': len(results),
+        'platforms': counts,
+        'results': results
+    })
+
 @simple_video_bp.route('/supported-formats', methods=['GET'])
 @cross_origin()
 def get_supported_formats():
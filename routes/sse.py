@@ -0,0 +1,13 @@
+import json
+from flask import Response
+
+def sse_event(event, data):
+    """Formata um evento Server-Sent Events com payload JSON"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def sse_response(events):
+    """Resposta text/event-stream sem buffer em proxies"""
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
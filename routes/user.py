@@ -1,16 +1,100 @@
-from flask import Blueprint, jsonify, request
+import json
+import os
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import select
 from src.models.user import User, db
+from src.services.user_import import USER_IMPORT_MAX_ROWS, import_users
 
 user_bp = Blueprint('user', __name__)
 
+# Paginação de /users e tamanho dos blocos lidos do banco na exportação
+USER_PAGE_SIZE = int(os.environ.get('USER_PAGE_SIZE', '100'))
+USER_MAX_PAGE_SIZE = int(os.environ.get('USER_MAX_PAGE_SIZE', '1000'))
+USER_EXPORT_BATCH_SIZE = int(os.environ.get('USER_EXPORT_BATCH_SIZE', '1000'))
+
+def _user_rows():
+    """Usuários em ordem de id lidos do cursor em blocos (memória constante)"""
+    result = db.session.execute(
+        select(User.id, User.username, User.email).order_by(User.id)
+        .execution_options(yield_per=USER_EXPORT_BATCH_SIZE)
+    )
+    for rows in result.partitions():
+        yield rows
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """Lista usuários; com `limit`/`cursor` pagina por id, sem eles devolve a lista completa em streaming"""
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        def generate():
+            yield '['
+            first = True
+            for rows in _user_rows():
+                chunk = ','.join(json.dumps({'id': row.id, 'username': row.username, 'email': row.email})
+                                 for row in rows)
+                yield chunk if first else ',' + chunk
+                first = False
+            yield ']'
+        return Response(stream_with_context(generate()), mimetype='application/json')
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', USER_PAGE_SIZE)), USER_MAX_PAGE_SIZE))
+        cursor = int(request.args.get('cursor', 0))
+    except ValueError:
+        return jsonify({'error': 'Parâmetros limit/cursor inválidos'}), 400
+
+    users = db.session.scalars(select(User).where(User.id > cursor).order_by(User.id).limit(limit + 1)).all()
+    next_cursor = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_cursor = str(users[-1].id)
+
+    return jsonify({
+        'users': [user.to_dict() for user in users],
+        'next_cursor': next_cursor
+    })
+
+@user_bp.route('/users/export', methods=['GET'])
+def export_users():
+    """Exporta todos os usuários em NDJSON (um objeto por linha), sem montar a lista em memória"""
+    def generate():
+        for rows in _user_rows():
+            yield ''.join(json.dumps({'id': row.id, 'username': row.username, 'email': row.email}) + '\n'
+                          for row in rows)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename=users.ndjson'
+    })
+
+@user_bp.route('/users/import', methods=['POST'])
+def bulk_import_users():
+    """Importa usuários em lote: JSON {"users": [...]} ou NDJSON; conflitos são reportados por linha"""
+    if request.mimetype == 'application/x-ndjson':
+        rows = []
+        for number, line in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                return jsonify({'error': f'JSON inválido na linha {number}'}), 400
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get('users') if isinstance(data, dict) else data
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify({'error': 'Lista de usuários não fornecida'}), 400
+    if len(rows) > USER_IMPORT_MAX_ROWS:
+        return jsonify({'error': f'Máximo de {USER_IMPORT_MAX_ROWS} usuários por importação'}), 413
+
+    return jsonify({
+        'success': True,
+        **import_users(rows)
+    })
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
-    
+
     data = request.json
     user = User(username=data['username'], email=data['email'])
     db.session.add(user)
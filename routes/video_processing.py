@@ -1,123 +1,723 @@
 import os
-import tempfile
+import re
+import time
 import uuid
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, send_file
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.formparser import parse_form_data
 from werkzeug.utils import secure_filename
-import ffmpeg
-import openai
 from flask_cors import cross_origin
+from sqlalchemy.orm import Session
+from src.models.user import db
+from src.services.audio_pipeline import (AUDIO_CODEC, AUDIO_EXTRACTION_MODE, STREAM_COPY_FORMATS,
+                                         WHISPER_MAX_UPLOAD_BYTES, CountingReader, MediaError,
+                                         audio_filename, check_media, copy_audio_to_file, detect_silences,
+                                         estimate_audio_bytes, extract_audio_to_file, finish_audio_stream,
+                                         open_audio_stream, plan_audio_extraction, probe_duration, probe_media)
+from src.services.caption_render import (RENDER_MAX_CONCURRENCY, RENDER_PRESET, RENDER_PRESETS,
+                                         RENDER_PROGRESS_INTERVAL, RENDER_TIMEOUT, probe_video,
+                                         render_captions)
+from src.services.chunked_upload import (UPLOAD_MAX_CHUNK_SIZE, UploadError, append_chunk,
+                                         complete_upload, create_upload, get_upload)
+from src.services.history import current_owner, record_transcription, record_video
+from src.services.job_queue import JobError, enqueue_job, get_job, register_job_handler
+from src.services.lazy_module import lazy_import
+from src.services.openai_client import call_with_retry, create_transcription
+from src.services.rate_limiter import ConcurrencyLimiter
+from src.services.request_limits import rate_limit
+from src.services.scratch_space import ScratchFullError, get_usage, get_workspace, open_workspace
+from src.services.segmented_transcription import transcribe_in_chunks
+from src.services.sqlite_store import get_stats
+from src.services.subtitles import ASS_STYLE, cues_from_json, to_ass
+from src.services.transcription_cache import (FileTooLargeError, HashingWriter, get_cached_transcription,
+                                              hash_file, store_transcription)
+from src.services.video_export import EXPORT_FIT_MODES, EXPORT_PROFILES, export_profiles
+from src.services.video_store import ensure_space, get_video_path, keep_video, output_path
+
+ffmpeg = lazy_import('ffmpeg')
 
 video_bp = Blueprint('video', __name__)
 
 # Configurações
 ALLOWED_EXTENSIONS = {'mp4', 'mov', 'avi', 'mkv'}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+# Vídeos mais longos que isso são transcritos em trechos paralelos
+SEGMENTED_TRANSCRIPTION_MIN_SECONDS = float(os.environ.get('SEGMENTED_TRANSCRIPTION_MIN_SECONDS', '600'))
+
+# Tamanho estimado de cada MP4 gerado em relação ao original (reservado antes de renderizar/exportar)
+OUTPUT_SIZE_RATIO = 1.5
+
+# Renderizações simultâneas somando todos os workers (o ffmpeg ocupa a CPU inteira)
+_render_slots = ConcurrencyLimiter('render', RENDER_MAX_CONCURRENCY, lease_seconds=RENDER_TIMEOUT)
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_audio_from_video(video_path, audio_path):
+def extract_audio_from_video(video_path, audio_path, codec='wav'):
     """Extrai áudio de um arquivo de vídeo usando FFmpeg"""
     try:
-        (
-            ffmpeg
-            .input(video_path)
-            .output(audio_path, acodec='pcm_s16le', ac=1, ar='16000')
-            .overwrite_output()
-            .run(capture_stdout=True, capture_stderr=True)
-        )
+        extract_audio_to_file(video_path, audio_path, codec)
         return True
     except ffmpeg.Error as e:
         print(f"Erro ao extrair áudio: {e}")
         return False
 
+def copy_audio_track(video_path, audio_path, source_codec):
+    """Copia a trilha de áudio sem recodificar; False se falhar ou passar do limite do Whisper"""
+    try:
+        copy_audio_to_file(video_path, audio_path, source_codec)
+    except ffmpeg.Error as e:
+        print(f"Erro ao copiar áudio: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+        return False
+    # A estimativa do probe pode faltar ou errar (bit rate variável)
+    return os.path.getsize(audio_path) <= WHISPER_MAX_UPLOAD_BYTES
+
+def _as_dict(item):
+    """Converte objetos do SDK (pydantic) em dicts serializáveis"""
+    return item.model_dump() if hasattr(item, 'model_dump') else item
+
+def _request_transcription(audio_file, retry=True):
+    transcript = create_transcription(
+        retry=retry,
+        model="whisper-1",
+        file=audio_file,
+        response_format="verbose_json",
+        timestamp_granularities=["word", "segment"]
+    )
+    
+    return {
+        'text': transcript.text,
+        'words': [_as_dict(w) for w in (getattr(transcript, 'words', None) or [])],
+        'segments': [_as_dict(s) for s in (getattr(transcript, 'segments', None) or [])]
+    }
+
 def transcribe_audio(audio_path):
     """Transcreve áudio usando OpenAI Whisper"""
     try:
-        client = openai.OpenAI()
-        
         with open(audio_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="verbose_json",
-                timestamp_granularities=["word"]
-            )
-        
-        return {
-            'text': transcript.text,
-            'words': transcript.words if hasattr(transcript, 'words') else [],
-            'segments': transcript.segments if hasattr(transcript, 'segments') else []
-        }
+            return _request_transcription(audio_file)
     except Exception as e:
         print(f"Erro na transcrição: {e}")
         return None
 
+def _transcribe_stream_once(video_path, codec, start, duration):
+    """Uma tentativa: o pipe só pode ser lido uma vez, então cada envio inicia um ffmpeg novo"""
+    process = open_audio_stream(video_path, codec, start, duration)
+    try:
+        transcription = _request_transcription((audio_filename('audio', codec), CountingReader(process.stdout)),
+                                               retry=False)
+        finish_audio_stream(process)
+        return transcription
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+
+def transcribe_video_stream(video_path, codec=AUDIO_CODEC, start=None, duration=None):
+    """Transcreve o vídeo enviando a saída do ffmpeg direto para o Whisper, sem arquivo de áudio"""
+    try:
+        # O retry envolve o ffmpeg e o envio: 429/5xx repetem a extração junto com a requisição
+        return call_with_retry(_transcribe_stream_once, video_path, codec, start, duration)
+    except ffmpeg.Error as e:
+        print(f"Erro ao extrair áudio: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+        return None
+    except Exception as e:
+        print(f"Erro na transcrição: {e}")
+        return None
+
+def transcribe_long_video(video_path, duration, codec=AUDIO_CODEC):
+    """Transcreve vídeos longos em trechos cortados nos silêncios, em paralelo"""
+    try:
+        silences = detect_silences(video_path)
+    except ffmpeg.Error as e:
+        print(f"Erro ao detectar silêncios: {e}")
+        silences = []
+    
+    return transcribe_in_chunks(
+        duration, silences,
+        lambda start, length: transcribe_video_stream(video_path, codec, start, length)
+    )
+
 @video_bp.route('/upload', methods=['POST'])
 @cross_origin()
+@rate_limit('upload')
 def upload_video():
     """Endpoint para upload e processamento inicial do vídeo"""
     
-    if 'video' not in request.files:
-        return jsonify({'error': 'Nenhum arquivo de vídeo enviado'}), 400
-    
-    file = request.files['video']
-    
-    if file.filename == '':
-        return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
-    
-    if not allowed_file(file.filename):
-        return jsonify({'error': 'Formato de arquivo não suportado'}), 400
-    
-    # Verificar tamanho do arquivo
-    file.seek(0, os.SEEK_END)
-    file_size = file.tell()
-    file.seek(0)
-    
-    if file_size > MAX_FILE_SIZE:
-        return jsonify({'error': 'Arquivo muito grande. Máximo 100MB'}), 400
-    
     try:
-        # Criar diretório temporário
-        temp_dir = tempfile.mkdtemp()
-        video_id = str(uuid.uuid4())
-        
-        # Salvar arquivo de vídeo
-        filename = secure_filename(file.filename)
-        video_path = os.path.join(temp_dir, f"{video_id}_{filename}")
-        file.save(video_path)
-        
-        # Extrair áudio
-        audio_path = os.path.join(temp_dir, f"{video_id}_audio.wav")
-        
-        if not extract_audio_from_video(video_path, audio_path):
-            return jsonify({'error': 'Erro ao processar o vídeo'}), 500
-        
-        # Transcrever áudio
-        transcription = transcribe_audio(audio_path)
+        # Workspace temporário com a cota reservada; apagado ao sair do bloco, inclusive em erros
+        reserve = min(request.content_length or MAX_FILE_SIZE, MAX_FILE_SIZE)
+        with open_workspace('upload', reserve) as workspace:
+            video_id = str(uuid.uuid4())
+            writers = []
+            
+            def stream_factory(total_content_length, content_type, filename, content_length=None):
+                # O arquivo vai do socket para o workspace, com hash e tamanho calculados durante o envio
+                name = secure_filename(filename or '') or 'arquivo'
+                writer = HashingWriter(workspace.path_for(f"{video_id}_{len(writers)}_{name}"), MAX_FILE_SIZE)
+                writers.append(writer)
+                return writer
+            
+            try:
+                _, _, files = parse_form_data(request.environ, stream_factory=stream_factory,
+                                              max_content_length=current_app.config['MAX_CONTENT_LENGTH'])
+            except (FileTooLargeError, RequestEntityTooLarge):
+                return jsonify({'error': 'Arquivo muito grande. Máximo 100MB'}), 400
+            finally:
+                for writer in writers:
+                    writer.close()
+            
+            if 'video' not in files:
+                return jsonify({'error': 'Nenhum arquivo de vídeo enviado'}), 400
+            
+            file = files['video']
+            
+            if file.filename == '':
+                return jsonify({'error': 'Nenhum arquivo selecionado'}), 400
+            
+            if not allowed_file(file.filename):
+                return jsonify({'error': 'Formato de arquivo não suportado'}), 400
+            
+            writer = file.stream
+            body, status, _ = _start_transcription(video_id, writer.path, writer.hexdigest(),
+                                                   secure_filename(file.filename))
+        return jsonify(body), status
         
-        if not transcription:
-            return jsonify({'error': 'Erro na transcrição do áudio'}), 500
-        
-        # Limpar arquivos temporários
+    except ScratchFullError as e:
+        return _scratch_full(e)
+    except Exception as e:
+        print(f"Erro no processamento: {e}")
+        return jsonify({'error': 'Erro interno do servidor'}), 500
+
+def _scratch_full(error):
+    """503 com Retry-After quando a cota de espaço temporário está esgotada"""
+    response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def _cleanup_temp(paths, temp_dir=None):
+    """Remove arquivos temporários e o diretório, ignorando os que já não existem"""
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if temp_dir:
         try:
-            os.remove(video_path)
-            os.remove(audio_path)
             os.rmdir(temp_dir)
-        except:
+        except OSError:
             pass
-        
-        return jsonify({
+
+def _store_video(video_id, video_path, video_sha256, filename):
+    """Mantém o vídeo (por VIDEO_RETENTION_SECONDS) para a renderização com legendas e o registra"""
+    video_path = keep_video(video_id, video_path)
+    record_video(db.session, video_id, current_owner(), filename, video_sha256, os.path.getsize(video_path))
+    return video_path
+
+def _start_transcription(video_id, video_path, video_sha256, filename=None):
+    """Usa a transcrição em cache ou envia o vídeo para os workers; retorna (corpo, status, tarefa).
+
+    O arquivo recusado fica no workspace de quem chama, que o apaga ao fechar.
+    """
+    # Cache antes do probe: reenvios do mesmo vídeo não iniciam nenhum processo do ffmpeg
+    cached = get_cached_transcription(video_sha256)
+    if cached is not None:
+        _store_video(video_id, video_path, video_sha256, filename)
+        record_transcription(db.session, video_id, cached)
+        db.session.commit()
+        return {
             'success': True,
             'video_id': video_id,
-            'transcription': transcription,
+            'transcription': cached,
+            'cached': True,
             'message': 'Vídeo processado com sucesso'
-        })
+        }, 200, None
+    
+    # Verificação prévia só com o ffprobe: arquivos sem áudio ou longos demais não chegam ao ffmpeg
+    media = None
+    try:
+        media = probe_media(video_path)
+        check_media(media)
+    except MediaError as e:
+        return {'error': str(e), 'media': media}, e.status_code, None
+    
+    video_path = _store_video(video_id, video_path, video_sha256, filename)
+    
+    # Extração e transcrição rodam nos workers em segundo plano
+    extraction = plan_audio_extraction(media, SEGMENTED_TRANSCRIPTION_MIN_SECONDS)
+    job = enqueue_job('transcribe_video', {
+        'video_id': video_id,
+        'video_path': video_path,
+        'video_sha256': video_sha256,
+        'duration': media['duration'],
+        'extraction': extraction
+    })
+    
+    return {
+        'success': True,
+        'job_id': job.id,
+        'video_id': video_id,
+        'media': media,
+        'audio_extraction': extraction,
+        'status': job.status,
+        'message': 'Vídeo recebido. Processamento em andamento'
+    }, 202, job
+
+def _plan_job_extraction(video_path):
+    """Plano para tarefas enfileiradas antes da verificação prévia (payload sem `extraction`)"""
+    try:
+        media = probe_media(video_path)
+        check_media(media)
+    except MediaError as e:
+        raise JobError(str(e))
+    return media['duration'], plan_audio_extraction(media, SEGMENTED_TRANSCRIPTION_MIN_SECONDS)
+
+def run_transcription_job(payload, job):
+    """Tarefa em segundo plano: extrai o áudio pelo caminho escolhido no probe e transcreve o vídeo"""
+    video_path = payload['video_path']
+    if payload.get('extraction'):
+        duration, extraction = payload['duration'], payload['extraction']
+    else:
+        duration, extraction = _plan_job_extraction(video_path)
+    
+    # Diretório de tarefas enfileiradas antes do scratch gerenciado (já vazio)
+    _cleanup_temp([], payload.get('temp_dir'))
+    
+    try:
+        # Intermediários de áudio são pequenos: vão para o tmpfs quando configurado
+        workspace = open_workspace('transcribe', estimate_audio_bytes(extraction, duration), tier='memory')
+    except ScratchFullError:
+        raise JobError('Servidor sem espaço temporário. Tente novamente mais tarde')
+    
+    method = extraction['method']
+    started = time.perf_counter()
+    with workspace:
+        if method == 'copy':
+            job.report(10, 'copying_audio')
+            copy_path = workspace.path_for(f"audio_copy.{STREAM_COPY_FORMATS[extraction['codec']]['extension']}")
+            if copy_audio_track(video_path, copy_path, extraction['codec']):
+                job.report(40, 'transcribing')
+                transcription = transcribe_audio(copy_path)
+            else:
+                # Cópia falhou ou ficou grande demais: volta para a decodificação
+                method = 'pipe' if AUDIO_EXTRACTION_MODE == 'pipe' else 'file'
+                extraction = {'method': method, 'codec': AUDIO_CODEC, 'reason': 'falha na cópia da trilha'}
         
-    except Exception as e:
-        print(f"Erro no processamento: {e}")
-        return jsonify({'error': 'Erro interno do servidor'}), 500
+        if method == 'segmented':
+            job.report(10, 'transcribing')
+            transcription = transcribe_long_video(video_path, duration, AUDIO_CODEC)
+        elif method == 'pipe':
+            job.report(10, 'transcribing')
+            transcription = transcribe_video_stream(video_path, AUDIO_CODEC)
+        elif method == 'file':
+            job.report(10, 'extracting_audio')
+            audio_path = workspace.path_for(audio_filename('audio', AUDIO_CODEC))
+            if not extract_audio_from_video(video_path, audio_path, AUDIO_CODEC):
+                raise JobError('Erro ao processar o vídeo')
+            
+            job.report(40, 'transcribing')
+            transcription = transcribe_audio(audio_path)
+    
+    if not transcription:
+        raise JobError('Erro na transcrição do áudio')
+    
+    if payload.get('video_sha256'):
+        store_transcription(payload['video_sha256'], transcription, time.perf_counter() - started)
+    
+    with Session(job.engine) as session:
+        record_transcription(session, payload['video_id'], transcription)
+        session.commit()
+    
+    return {
+        'video_id': payload['video_id'],
+        'transcription': transcription,
+        'audio_extraction': {
+            **extraction,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000)
+        }
+    }
+
+register_job_handler('transcribe_video', f'{__name__}:run_transcription_job')
+
+def _throttled_progress(job, stage):
+    """Callback de progresso do ffmpeg que grava na tarefa no máximo a cada RENDER_PROGRESS_INTERVAL"""
+    last_report = [0.0]
+    def on_progress(fraction, speed):
+        now = time.monotonic()
+        if now - last_report[0] >= RENDER_PROGRESS_INTERVAL:
+            last_report[0] = now
+            job.report(max(1, min(99, int(fraction * 100))), stage)
+    return on_progress
+
+def run_render_job(payload, job):
+    """Tarefa em segundo plano: queima as legendas no vídeo com o ffmpeg"""
+    video_path = payload['video_path']
+    mp4_path = output_path(payload['video_id'], f"render-{job.job_id}.mp4")
+    
+    if not os.path.exists(video_path):
+        raise JobError('Vídeo não encontrado ou expirado. Envie o vídeo novamente')
+    
+    job.report(0, 'waiting_render_slot')
+    try:
+        with _render_slots.slot(timeout=RENDER_TIMEOUT), open_workspace('render', tier='memory') as workspace:
+            try:
+                duration, width, height = probe_video(video_path)
+            except (ffmpeg.Error, KeyError, StopIteration, ValueError):
+                raise JobError('Erro ao ler o vídeo')
+            
+            ensure_space(int(os.path.getsize(video_path) * OUTPUT_SIZE_RATIO), payload['video_id'])
+            ass_path = workspace.path_for('captions.ass')
+            with open(ass_path, 'w', encoding='utf-8') as f:
+                f.write(to_ass(cues_from_json(payload['subtitles']), payload.get('style'),
+                               payload.get('highlight', True), (width, height)))
+            
+            job.report(1, 'rendering')
+            render_captions(video_path, ass_path, mp4_path, duration, _throttled_progress(job, 'rendering'),
+                            preset=payload.get('preset', RENDER_PRESET))
+    except TimeoutError:
+        raise JobError('Fila de renderização cheia. Tente novamente mais tarde')
+    except ScratchFullError as e:
+        raise JobError(str(e))
+    except ffmpeg.Error as e:
+        print(f"Erro ao renderizar: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+        _cleanup_temp([mp4_path])
+        raise JobError('Erro ao renderizar o vídeo')
+    
+    return {
+        'video_id': payload['video_id'],
+        'render_id': job.job_id,
+        'download_url': f"/api/video/renders/{job.job_id}",
+        'size_bytes': os.path.getsize(mp4_path)
+    }
+
+register_job_handler('render_captions', f'{__name__}:run_render_job')
+
+def run_export_job(payload, job):
+    """Tarefa em segundo plano: exporta o vídeo em vários formatos com uma única decodificação"""
+    video_path = payload['video_path']
+    outputs = {name: output_path(payload['video_id'], f"export-{job.job_id}-{name}.mp4")
+               for name in payload['profiles']}
+    
+    if not os.path.exists(video_path):
+        raise JobError('Vídeo não encontrado ou expirado. Envie o vídeo novamente')
+    
+    job.report(0, 'waiting_render_slot')
+    try:
+        with _render_slots.slot(timeout=RENDER_TIMEOUT):
+            try:
+                duration = probe_duration(video_path)
+            except (ffmpeg.Error, KeyError, ValueError):
+                raise JobError('Erro ao ler o vídeo')
+            
+            ensure_space(int(os.path.getsize(video_path) * OUTPUT_SIZE_RATIO * len(outputs)), payload['video_id'])
+            job.report(1, 'exporting')
+            export_profiles(video_path, outputs, duration, payload.get('fit', 'crop'),
+                            _throttled_progress(job, 'exporting'), preset=payload.get('preset', RENDER_PRESET))
+    except TimeoutError:
+        raise JobError('Fila de renderização cheia. Tente novamente mais tarde')
+    except ScratchFullError as e:
+        raise JobError(str(e))
+    except ffmpeg.Error as e:
+        print(f"Erro ao exportar: {e.stderr.decode(errors='ignore') if e.stderr else e}")
+        _cleanup_temp(list(outputs.values()))
+        raise JobError('Erro ao exportar o vídeo')
+    
+    return {
+        'video_id': payload['video_id'],
+        'exports': [{
+            'profile': name,
+            'aspect': EXPORT_PROFILES[name]['aspect'],
+            'platforms': EXPORT_PROFILES[name]['platforms'],
+            'download_url': f"/api/video/exports/{job.job_id}/{name}",
+            'size_bytes': os.path.getsize(path)
+        } for name, path in outputs.items()]
+    }
+
+register_job_handler('export_video', f'{__name__}:run_export_job')
+
+@video_bp.route('/uploads', methods=['POST'])
+@cross_origin()
+@rate_limit('upload')
+def init_chunked_upload():
+    """Inicia um upload em partes retomável"""
+    data = request.get_json()
+    
+    if not data or 'filename' not in data or 'size' not in data:
+        return jsonify({'error': 'Nome e tamanho do arquivo são obrigatórios'}), 400
+    
+    filename = secure_filename(data['filename'])
+    if not allowed_file(filename):
+        return jsonify({'error': 'Formato de arquivo não suportado'}), 400
+    
+    try:
+        upload = create_upload(filename, int(data['size']), MAX_FILE_SIZE)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Tamanho do arquivo inválido'}), 400
+    except UploadError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except ScratchFullError as e:
+        return _scratch_full(e)
+    
+    return jsonify({
+        'success': True,
+        **upload.to_dict(),
+        'max_chunk_size': UPLOAD_MAX_CHUNK_SIZE
+    }), 201
+
+@video_bp.route('/uploads/<upload_id>', methods=['GET'])
+@cross_origin()
+def chunked_upload_status(upload_id):
+    """Retorna o último offset confirmado para retomar o envio"""
+    upload = get_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload não encontrado'}), 404
+    
+    return jsonify(upload.to_dict())
+
+@video_bp.route('/uploads/<upload_id>', methods=['PUT'])
+@cross_origin()
+def append_chunked_upload(upload_id):
+    """Recebe uma parte (corpo bruto) a partir do offset informado em Upload-Offset"""
+    upload = get_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload não encontrado'}), 404
+    
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.args.get('offset', '')))
+    except ValueError:
+        return jsonify({'error': 'Offset não informado', 'offset': upload.received}), 400
+    
+    try:
+        append_chunk(upload, offset, request.stream, request.content_length)
+    except UploadError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except ScratchFullError as e:
+        return _scratch_full(e)
+    
+    return jsonify({
+        'success': True,
+        **upload.to_dict()
+    })
+
+@video_bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@cross_origin()
+def finalize_chunked_upload(upload_id):
+    """Conclui o upload e envia o vídeo para processamento em segundo plano"""
+    upload = get_upload(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload não encontrado'}), 404
+    
+    try:
+        complete_upload(upload)
+    except UploadError as e:
+        return jsonify(e.to_dict()), e.status_code
+    
+    try:
+        body, status, job = _start_transcription(upload.id, upload.path, hash_file(upload.path), upload.filename)
+    except ScratchFullError as e:
+        return _scratch_full(e)
+    finally:
+        # O vídeo já foi movido para o armazenamento (ou recusado): libera o workspace do upload
+        workspace = get_workspace(upload.id)
+        if workspace:
+            workspace.close()
+        else:
+            # Uploads iniciados antes do scratch gerenciado
+            _cleanup_temp([upload.path], os.path.dirname(upload.path))
+    
+    # Em caso de acerto no cache a resposta já traz a transcrição (sem tarefa)
+    if job:
+        upload.job_id = job.id
+        db.session.commit()
+    
+    return jsonify(body), status
+
+@video_bp.route('/jobs/<job_id>', methods=['GET'])
+@cross_origin()
+def job_status(job_id):
+    """Retorna status e progresso de uma tarefa"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Tarefa não encontrada'}), 404
+    
+    return jsonify(job.to_dict())
+
+@video_bp.route('/jobs/<job_id>/result', methods=['GET'])
+@cross_origin()
+def job_result(job_id):
+    """Retorna o resultado de uma tarefa concluída"""
+    job = get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Tarefa não encontrada'}), 404
+    
+    if job.status == 'failed':
+        return jsonify({'error': job.error, **job.to_dict()}), 500
+    
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    
+    return jsonify({
+        'success': True,
+        **job.get_result(),
+        'message': 'Vídeo processado com sucesso'
+    })
+
+def _render_style(data):
+    """Valida o estilo enviado; None se algum campo for inválido"""
+    style = data.get('style') or {}
+    if not isinstance(style, dict) or set(style) - set(ASS_STYLE):
+        return None
+    try:
+        for key in ('color', 'highlight_color'):
+            if key in style and not re.fullmatch(r'#?[0-9a-fA-F]{6}', str(style[key])):
+                return None
+        for key in ('font_size', 'outline', 'margin_v'):
+            if key in style:
+                style[key] = float(style[key])
+    except (TypeError, ValueError):
+        return None
+    # Vírgulas e quebras de linha quebrariam a linha de estilo do ASS
+    if 'font' in style and not re.fullmatch(r'[\w \-]{1,64}', str(style['font'])):
+        return None
+    return style
+
+@video_bp.route('/render', methods=['POST'])
+@cross_origin()
+def render_video():
+    """Gera um MP4 com as legendas queimadas no vídeo enviado (tarefa em segundo plano)"""
+    data = request.get_json()
+    
+    if not data or 'video_id' not in data or not data.get('subtitles'):
+        return jsonify({'error': 'video_id e legendas são obrigatórios'}), 400
+    
+    video_path = get_video_path(data['video_id'])
+    if not video_path:
+        return jsonify({'error': 'Vídeo não encontrado ou expirado. Envie o vídeo novamente'}), 404
+    
+    try:
+        cues_from_json(data['subtitles'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Legendas inválidas'}), 400
+    
+    style = _render_style(data)
+    if style is None:
+        return jsonify({'error': 'Estilo de legenda inválido'}), 400
+    
+    preset = data.get('preset', RENDER_PRESET)
+    if preset not in RENDER_PRESETS:
+        return jsonify({'error': f'Preset inválido. Use: {", ".join(RENDER_PRESETS)}'}), 400
+    
+    job = enqueue_job('render_captions', {
+        'video_id': data['video_id'],
+        'video_path': video_path,
+        'subtitles': data['subtitles'],
+        'style': style,
+        'highlight': data.get('highlight', True) is not False,
+        'preset': preset
+    })
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'video_id': data['video_id'],
+        'status': job.status,
+        'message': 'Renderização em andamento'
+    }), 202
+
+@video_bp.route('/renders/<job_id>', methods=['GET'])
+@cross_origin()
+def download_render(job_id):
+    """Baixa o MP4 legendado de uma renderização concluída"""
+    job = get_job(job_id)
+    if not job or job.kind != 'render_captions':
+        return jsonify({'error': 'Renderização não encontrada'}), 404
+    
+    if job.status == 'failed':
+        return jsonify({'error': job.error, **job.to_dict()}), 500
+    
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    
+    path = output_path(job.get_payload()['video_id'], f'render-{job.id}.mp4')
+    if not os.path.exists(path):
+        return jsonify({'error': 'Arquivo expirado. Renderize novamente'}), 410
+    
+    return send_file(path, mimetype='video/mp4', as_attachment=True, download_name='video_legendado.mp4')
+
+@video_bp.route('/export', methods=['POST'])
+@cross_origin()
+def export_video():
+    """Exporta o vídeo em vários formatos (9:16, 1:1, 16:9) em uma única tarefa"""
+    data = request.get_json() or {}
+    
+    video_path = get_video_path(data.get('video_id'))
+    if not video_path:
+        return jsonify({'error': 'Vídeo não encontrado ou expirado. Envie o vídeo novamente'}), 404
+    
+    # Aceita o nome do perfil ou a proporção ("9:16")
+    by_aspect = {profile['aspect']: name for name, profile in EXPORT_PROFILES.items()}
+    profiles = data.get('profiles') or list(EXPORT_PROFILES)
+    valid = isinstance(profiles, list) and all(isinstance(name, str) for name in profiles)
+    if not valid or not {by_aspect.get(name, name) for name in profiles} <= set(EXPORT_PROFILES):
+        return jsonify({'error': f'Perfis inválidos. Use: {", ".join(EXPORT_PROFILES)}'}), 400
+    
+    fit = data.get('fit', 'crop')
+    if fit not in EXPORT_FIT_MODES:
+        return jsonify({'error': f'Modo inválido. Use: {", ".join(EXPORT_FIT_MODES)}'}), 400
+    
+    preset = data.get('preset', RENDER_PRESET)
+    if preset not in RENDER_PRESETS:
+        return jsonify({'error': f'Preset inválido. Use: {", ".join(RENDER_PRESETS)}'}), 400
+    
+    job = enqueue_job('export_video', {
+        'video_id': data['video_id'],
+        'video_path': video_path,
+        'profiles': list(dict.fromkeys(by_aspect.get(name, name) for name in profiles)),
+        'fit': fit,
+        'preset': preset
+    })
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'video_id': data['video_id'],
+        'status': job.status,
+        'message': 'Exportação em andamento'
+    }), 202
+
+@video_bp.route('/exports/<job_id>/<profile>', methods=['GET'])
+@cross_origin()
+def download_export(job_id, profile):
+    """Baixa um dos formatos de uma exportação concluída"""
+    job = get_job(job_id)
+    if not job or job.kind != 'export_video' or profile not in job.get_payload()['profiles']:
+        return jsonify({'error': 'Exportação não encontrada'}), 404
+    
+    if job.status == 'failed':
+        return jsonify({'error': job.error, **job.to_dict()}), 500
+    
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    
+    path = output_path(job.get_payload()['video_id'], f'export-{job.id}-{profile}.mp4')
+    if not os.path.exists(path):
+        return jsonify({'error': 'Arquivo expirado. Exporte novamente'}), 410
+    
+    return send_file(path, mimetype='video/mp4', as_attachment=True, download_name=f'video_{profile}.mp4')
+
+@video_bp.route('/cache/stats', methods=['GET'])
+@cross_origin()
+def cache_stats():
+    """Contadores de acerto/erro dos caches e segundos de processamento economizados"""
+    return jsonify(get_stats())
+
+@video_bp.route('/scratch/stats', methods=['GET'])
+@cross_origin()
+def scratch_stats():
+    """Uso do espaço temporário por tier (cota, reservado, em disco) e contadores do janitor"""
+    return jsonify(get_usage())
 
 @video_bp.route('/health', methods=['GET'])
 @cross_origin()
@@ -0,0 +1,240 @@
+import io
+import os
+import re
+
+from .lazy_module import lazy_import
+
+ffmpeg = lazy_import('ffmpeg')
+
+# Formatos de saída aceitos pelo Whisper; os comprimidos podem ser enviados direto do pipe
+AUDIO_FORMATS = {
+    'wav': {'format': 'wav', 'acodec': 'pcm_s16le', 'extension': 'wav', 'bytes_per_second': 32000},
+    'opus': {'format': 'ogg', 'acodec': 'libopus', 'audio_bitrate': '24k', 'extension': 'ogg',
+             'bytes_per_second': 3000},
+    'mp3': {'format': 'mp3', 'acodec': 'libmp3lame', 'audio_bitrate': '32k', 'extension': 'mp3',
+            'bytes_per_second': 4000},
+}
+
+# Codecs que o Whisper aceita como estão: a trilha é copiada para o contêiner indicado, sem decodificar
+STREAM_COPY_FORMATS = {
+    'aac': {'format': 'ipod', 'extension': 'm4a'},
+    'mp3': {'format': 'mp3', 'extension': 'mp3'},
+    'opus': {'format': 'ogg', 'extension': 'ogg'},
+    'vorbis': {'format': 'ogg', 'extension': 'ogg'},
+    'flac': {'format': 'flac', 'extension': 'flac'},
+}
+
+# Configurações
+AUDIO_CODEC = os.environ.get('AUDIO_CODEC', 'opus')
+AUDIO_EXTRACTION_MODE = os.environ.get('AUDIO_EXTRACTION_MODE', 'pipe')  # 'pipe' ou 'file'
+AUDIO_STREAM_COPY = os.environ.get('AUDIO_STREAM_COPY', '1') == '1'
+MEDIA_MIN_DURATION_SECONDS = float(os.environ.get('MEDIA_MIN_DURATION_SECONDS', '0.5'))
+MEDIA_MAX_DURATION_SECONDS = float(os.environ.get('MEDIA_MAX_DURATION_SECONDS', '7200'))
+# Limite de tamanho de arquivo da API de transcrição
+WHISPER_MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+def _output_args(codec):
+    spec = AUDIO_FORMATS[codec]
+    args = {'format': spec['format'], 'acodec': spec['acodec'], 'ac': 1, 'ar': '16000'}
+    if 'audio_bitrate' in spec:
+        args['audio_bitrate'] = spec['audio_bitrate']
+    return args
+
+def audio_filename(name, codec):
+    return f"{name}.{AUDIO_FORMATS[codec]['extension']}"
+
+def extract_audio_to_file(video_path, audio_path, codec='wav'):
+    """Extrai o áudio (mono, 16 kHz) para um arquivo no codec escolhido"""
+    (
+        ffmpeg
+        .input(video_path)
+        .output(audio_path, vn=None, **_output_args(codec))
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+def open_audio_stream(video_path, codec='opus', start=None, duration=None):
+    """Inicia o ffmpeg escrevendo o áudio no stdout, sem arquivo intermediário"""
+    input_args = {}
+    if start is not None:
+        input_args['ss'] = f'{start:.3f}'
+    if duration is not None:
+        input_args['t'] = f'{duration:.3f}'
+
+    return (
+        ffmpeg
+        .input(video_path, **input_args)
+        .output('pipe:', vn=None, **_output_args(codec))
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+
+def finish_audio_stream(process):
+    """Aguarda o fim do ffmpeg e levanta ffmpeg.Error se ele falhou"""
+    process.stdout.close()
+    stderr = process.stderr.read()
+    process.stderr.close()
+    if process.wait() != 0:
+        raise ffmpeg.Error('ffmpeg', None, stderr)
+
+class CountingReader(io.RawIOBase):
+    """Envolve o stdout do ffmpeg contando os bytes lidos.
+
+    Não expõe fileno/seek: o httpx não consegue medir o tamanho e envia o
+    multipart em chunked transfer, lendo o pipe aos poucos.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def probe_duration(video_path):
+    """Duração do arquivo em segundos (ffprobe)"""
+    return float(ffmpeg.probe(video_path)['format']['duration'])
+
+class MediaError(Exception):
+    """Arquivo recusado na verificação prévia (mensagem exibida ao usuário)"""
+
+    def __init__(self, message, status_code=422):
+        super().__init__(message)
+        self.status_code = status_code
+
+def _number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+def _frame_rate(value):
+    numerator, _, denominator = str(value or '').partition('/')
+    numerator, denominator = _number(numerator), _number(denominator or 1)
+    return round(numerator / denominator, 3) if numerator and denominator else None
+
+def probe_media(video_path):
+    """Duração, contêiner e streams do arquivo (só o ffprobe, sem decodificar nada)"""
+    try:
+        info = ffmpeg.probe(video_path)
+    except ffmpeg.Error:
+        raise MediaError('Arquivo de vídeo inválido ou corrompido')
+
+    streams = info.get('streams', [])
+    fmt = info.get('format', {})
+    # Capas embutidas (attached_pic) aparecem como stream de vídeo
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+
+    duration = _number(fmt.get('duration')) or _number((audio or video or {}).get('duration'))
+    media = {
+        'duration': round(duration, 3) if duration else None,
+        'container': fmt.get('format_name'),
+        'size_bytes': _number(fmt.get('size'), int),
+        'bit_rate': _number(fmt.get('bit_rate'), int),
+        'video': None,
+        'audio': None,
+    }
+    if video:
+        media['video'] = {
+            'codec': video.get('codec_name'),
+            'width': _number(video.get('width'), int),
+            'height': _number(video.get('height'), int),
+            'fps': _frame_rate(video.get('avg_frame_rate') or video.get('r_frame_rate')),
+        }
+    if audio:
+        # Sem bit_rate no stream (ex.: mkv), o do contêiner serve de limite superior quando não há vídeo
+        bit_rate = _number(audio.get('bit_rate'), int)
+        if bit_rate is None and not video:
+            bit_rate = media['bit_rate']
+        media['audio'] = {
+            'codec': audio.get('codec_name'),
+            'sample_rate': _number(audio.get('sample_rate'), int),
+            'channels': _number(audio.get('channels'), int),
+            'bit_rate': bit_rate,
+        }
+    return media
+
+def check_media(media, max_duration=MEDIA_MAX_DURATION_SECONDS):
+    """Recusa arquivos que não podem ser transcritos antes de gastar CPU com o ffmpeg"""
+    if not media['audio']:
+        raise MediaError('O vídeo não tem trilha de áudio')
+    if not media['duration'] or media['duration'] < MEDIA_MIN_DURATION_SECONDS:
+        raise MediaError('Não foi possível ler a duração do vídeo ou ele é curto demais')
+    if media['duration'] > max_duration:
+        raise MediaError(f'Vídeo muito longo. Máximo {max_duration / 60:g} minutos', 413)
+
+def plan_audio_extraction(media, segmented_min_seconds=None, codec=AUDIO_CODEC,
+                          extraction_mode=AUDIO_EXTRACTION_MODE, stream_copy=AUDIO_STREAM_COPY):
+    """Escolhe a forma mais barata de entregar o áudio ao Whisper.
+
+    - segmented: vídeo longo, transcrito em trechos paralelos (decodificados)
+    - copy: o codec já é aceito; a trilha é copiada sem recodificar (só I/O)
+    - pipe/file: decodifica e recodifica em `codec` (mono, 16 kHz)
+    """
+    audio = media['audio']
+    if segmented_min_seconds is not None and media['duration'] > segmented_min_seconds:
+        return {'method': 'segmented', 'codec': codec, 'reason': 'duração acima do limite de um envio'}
+
+    copy = STREAM_COPY_FORMATS.get(audio['codec'])
+    if stream_copy and copy:
+        estimated = int(audio['bit_rate'] * media['duration'] / 8) if audio['bit_rate'] else None
+        if estimated is None or estimated <= WHISPER_MAX_UPLOAD_BYTES:
+            return {'method': 'copy', 'codec': audio['codec'], 'extension': copy['extension'],
+                    'estimated_bytes': estimated, 'reason': f"{audio['codec']} aceito pelo Whisper"}
+        reason = f"trilha {audio['codec']} maior que o limite de envio"
+    elif copy:
+        reason = 'cópia direta desativada'
+    else:
+        reason = f"codec {audio['codec']} exige recodificação"
+    return {'method': 'pipe' if extraction_mode == 'pipe' else 'file', 'codec': codec, 'reason': reason}
+
+def estimate_audio_bytes(extraction, duration):
+    """Bytes de áudio gravados em disco pelo plano (pipe e trechos não geram arquivo)"""
+    if extraction['method'] == 'copy':
+        return extraction.get('estimated_bytes') or WHISPER_MAX_UPLOAD_BYTES
+    if extraction['method'] == 'file':
+        return int(AUDIO_FORMATS[extraction['codec']]['bytes_per_second'] * duration * 1.1)
+    return 0
+
+def copy_audio_to_file(video_path, audio_path, source_codec):
+    """Copia a primeira trilha de áudio para um contêiner aceito, sem decodificar"""
+    (
+        ffmpeg
+        .input(video_path)['a:0']
+        .output(audio_path, acodec='copy', format=STREAM_COPY_FORMATS[source_codec]['format'])
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+_SILENCE_RE = re.compile(r'silence_(start|end): (-?[\d.]+)')
+
+def detect_silences(video_path, noise='-35dB', min_silence=0.4):
+    """Retorna os intervalos de silêncio [(início, fim)] usando o filtro silencedetect"""
+    _, stderr = (
+        ffmpeg
+        .input(video_path)
+        .output('-', format='null', vn=None, af=f'silencedetect=noise={noise}:d={min_silence}')
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(stderr.decode(errors='ignore')):
+        if kind == 'start':
+            start = max(float(value), 0.0)
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
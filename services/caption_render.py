@@ -0,0 +1,77 @@
+import os
+import threading
+
+from .lazy_module import lazy_import
+
+ffmpeg = lazy_import('ffmpeg')
+
+# Configurações (somente codificação em CPU)
+RENDER_FFMPEG_THREADS = int(os.environ.get('RENDER_FFMPEG_THREADS', '2'))
+RENDER_PRESET = os.environ.get('RENDER_PRESET', 'veryfast')
+RENDER_CRF = int(os.environ.get('RENDER_CRF', '23'))
+RENDER_MAX_CONCURRENCY = int(os.environ.get('RENDER_MAX_CONCURRENCY', '1'))
+RENDER_TIMEOUT = int(os.environ.get('RENDER_TIMEOUT', '3600'))
+RENDER_PROGRESS_INTERVAL = 1.0  # segundos entre atualizações de progresso gravadas na tarefa
+
+# Presets do libx264, do mais rápido ao mais eficiente
+RENDER_PRESETS = ('ultrafast', 'superfast', 'veryfast', 'faster', 'fast', 'medium', 'slow', 'slower', 'veryslow')
+
+def probe_video(video_path):
+    """Duração (s), largura e altura do primeiro stream de vídeo"""
+    info = ffmpeg.probe(video_path)
+    stream = next(s for s in info['streams'] if s.get('codec_type') == 'video')
+    return float(info['format']['duration']), int(stream['width']), int(stream['height'])
+
+def read_progress(stream, duration, on_progress):
+    """Lê a saída de `-progress` (chave=valor) e chama on_progress(fração 0-1, velocidade)"""
+    out_time = 0.0
+    speed = None
+    for raw in stream:
+        key, _, value = raw.decode(errors='ignore').strip().partition('=')
+        if key in ('out_time_us', 'out_time_ms') and value.isdigit():
+            # out_time_ms também é em microssegundos (nome histórico do ffmpeg)
+            out_time = int(value) / 1_000_000
+        elif key == 'speed':
+            speed = value.rstrip('x') if value != 'N/A' else None
+        elif key == 'progress':
+            fraction = 1.0 if value == 'end' else min(out_time / duration, 1.0) if duration else 0.0
+            on_progress(fraction, float(speed) if speed else None)
+
+def run_ffmpeg(stream_spec, duration, on_progress=None, threads=RENDER_FFMPEG_THREADS):
+    """Executa o ffmpeg repassando o progresso de `-progress`; levanta ffmpeg.Error se falhar"""
+    process = (
+        stream_spec
+        .global_args('-filter_threads', str(threads), '-progress', 'pipe:1', '-nostats', '-loglevel', 'error')
+        .overwrite_output()
+        .run_async(pipe_stdout=True, pipe_stderr=True)
+    )
+
+    # stderr é drenado em paralelo para o ffmpeg não travar com o pipe cheio
+    stderr = []
+    drain = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+    drain.start()
+    try:
+        read_progress(process.stdout, duration, on_progress or (lambda fraction, speed: None))
+        returncode = process.wait(timeout=RENDER_TIMEOUT)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        drain.join(timeout=5)
+
+    if returncode != 0:
+        raise ffmpeg.Error('ffmpeg', None, b''.join(stderr))
+
+def encoder_args(preset=RENDER_PRESET, crf=RENDER_CRF, threads=RENDER_FFMPEG_THREADS):
+    """Opções de saída H.264 + AAC para MP4; map 0:a? inclui o áudio só se existir"""
+    return {'vcodec': 'libx264', 'preset': preset, 'crf': crf, 'pix_fmt': 'yuv420p', 'acodec': 'aac',
+            'audio_bitrate': '128k', 'threads': threads, 'movflags': '+faststart', 'map': '0:a?'}
+
+def render_captions(video_path, ass_path, output_path, duration, on_progress=None,
+                    preset=RENDER_PRESET, crf=RENDER_CRF, threads=RENDER_FFMPEG_THREADS):
+    """Queima as legendas ASS no vídeo em uma única decodificação, gerando MP4 (H.264 + AAC)"""
+    video = ffmpeg.input(video_path)
+    captioned = video.video.filter('ass', ass_path)  # o ffmpeg-python já escapa o caminho
+    run_ffmpeg(ffmpeg.output(captioned, output_path, **encoder_args(preset, crf, threads)),
+               duration, on_progress, threads)
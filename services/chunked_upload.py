@@ -0,0 +1,132 @@
+import fcntl
+import os
+import uuid
+from datetime import datetime
+
+from sqlalchemy import update
+from werkzeug.exceptions import ClientDisconnected
+
+from ..models.upload import UploadSession
+from ..models.user import db
+from .scratch_space import get_workspace, open_workspace
+
+# Configurações
+UPLOAD_BUFFER_SIZE = 64 * 1024  # bytes lidos do socket por vez (memória constante)
+UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get('UPLOAD_MAX_CHUNK_SIZE', 8 * 1024 * 1024))
+
+class UploadError(Exception):
+    """Erro de upload com status HTTP e offset atual para o cliente retomar"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+    def to_dict(self):
+        data = {'error': str(self)}
+        if self.offset is not None:
+            data['offset'] = self.offset
+        return data
+
+def create_upload(filename, total_size, max_size):
+    """Inicia um upload em partes e cria o arquivo de destino"""
+    if total_size <= 0:
+        raise UploadError('Tamanho do arquivo inválido')
+    if total_size > max_size:
+        raise UploadError(f'Arquivo muito grande. Máximo {max_size // (1024 * 1024)}MB', 413)
+
+    upload_id = str(uuid.uuid4())
+    # A cota é reservada parte a parte em append_chunk: inits abandonados não prendem espaço.
+    # O workspace vive até o finalize (ou até o janitor)
+    workspace = open_workspace('upload', 0, workspace_id=upload_id)
+    path = workspace.path_for(f"{upload_id}_{filename}")
+    open(path, 'wb').close()
+
+    upload = UploadSession(id=upload_id, filename=filename, total_size=total_size,
+                           received=0, path=path, status='uploading')
+    db.session.add(upload)
+    db.session.commit()
+    return upload
+
+def get_upload(upload_id):
+    return db.session.get(UploadSession, upload_id)
+
+def _require_file(upload):
+    """Uploads abandonados são apagados pelo janitor do scratch"""
+    if not os.path.exists(upload.path):
+        raise UploadError('Upload expirado. Envie o arquivo novamente', 410)
+
+def _acknowledge(upload, offset, written):
+    """Confirma os bytes gravados; falha se outro request avançou o offset antes"""
+    result = db.session.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload.id, UploadSession.received == offset)
+        .values(received=offset + written, updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    db.session.refresh(upload)
+    return result.rowcount == 1
+
+def append_chunk(upload, offset, stream, content_length=None):
+    """Grava uma parte a partir de `offset`, lendo o corpo do request em blocos"""
+    if upload.status != 'uploading':
+        raise UploadError('Upload já finalizado', 409, upload.received)
+    if content_length is not None and content_length > UPLOAD_MAX_CHUNK_SIZE:
+        raise UploadError(f'Parte muito grande. Máximo {UPLOAD_MAX_CHUNK_SIZE} bytes', 413, upload.received)
+    _require_file(upload)
+
+    # Reserva na cota os bytes desta parte antes de lê-los (ScratchFullError se não couberem).
+    # Uploads criados antes do scratch gerenciado não têm workspace
+    workspace = get_workspace(upload.id)
+    if workspace:
+        workspace.reserve(min(upload.total_size, upload.received + (content_length or UPLOAD_MAX_CHUNK_SIZE)))
+
+    with open(upload.path, 'r+b') as f:
+        # Serializa escritas concorrentes no mesmo upload
+        fcntl.flock(f, fcntl.LOCK_EX)
+        db.session.refresh(upload)
+
+        if offset != upload.received:
+            raise UploadError('Offset não confere com o último byte confirmado', 409, upload.received)
+
+        # Descarta bytes não confirmados de uma tentativa anterior
+        f.seek(offset)
+        f.truncate()
+
+        written = 0
+        try:
+            while True:
+                block = stream.read(UPLOAD_BUFFER_SIZE)
+                if not block:
+                    break
+                if offset + written + len(block) > upload.total_size:
+                    f.truncate(offset)
+                    raise UploadError('Dados excedem o tamanho declarado do arquivo', 413, offset)
+                f.write(block)
+                written += len(block)
+        except ClientDisconnected:
+            # Conexão caiu no meio da parte: o prefixo recebido continua válido
+            f.flush()
+            _acknowledge(upload, offset, written)
+            raise UploadError('Conexão interrompida durante o envio', 400, upload.received)
+
+        f.flush()
+        os.fsync(f.fileno())
+
+        if not _acknowledge(upload, offset, written):
+            raise UploadError('Offset não confere com o último byte confirmado', 409, upload.received)
+
+    return upload
+
+def complete_upload(upload):
+    """Marca o upload como completo; exige que todos os bytes tenham sido recebidos"""
+    if upload.status != 'uploading':
+        raise UploadError('Upload já finalizado', 409, upload.received)
+    if upload.received != upload.total_size:
+        raise UploadError('Upload incompleto', 409, upload.received)
+    _require_file(upload)
+
+    upload.status = 'complete'
+    upload.updated_at = datetime.utcnow()
+    db.session.commit()
+    return upload
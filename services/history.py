@@ -0,0 +1,142 @@
+import base64
+import hmac
+import json
+import os
+import uuid
+from datetime import datetime
+
+from flask import request, session
+from sqlalchemy import select, tuple_
+
+from ..models.history import Generation, Transcription, Video
+
+# Configurações
+HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', '20'))
+HISTORY_MAX_PAGE_SIZE = int(os.environ.get('HISTORY_MAX_PAGE_SIZE', '100'))
+# Credencial das integrações que informam o dono em X-Owner-Id; vazio desativa o cabeçalho
+HISTORY_INTEGRATION_TOKEN = os.environ.get('HISTORY_INTEGRATION_TOKEN', '')
+
+class CursorError(ValueError):
+    """Cursor de paginação inválido"""
+
+def _trusted_integration():
+    """Requisição com `Authorization: Bearer <HISTORY_INTEGRATION_TOKEN>`"""
+    if not HISTORY_INTEGRATION_TOKEN:
+        return False
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.strip().encode(), HISTORY_INTEGRATION_TOKEN.encode())
+
+def current_owner():
+    """Dono dos registros: id anônimo guardado na sessão, ou X-Owner-Id de uma integração autenticada"""
+    owner = request.headers.get('X-Owner-Id', '').strip()
+    if owner and _trusted_integration():
+        return owner[:64]
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+        session.permanent = True
+    return session['sid']
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """(created_at, id) do último item da página anterior"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise CursorError('Cursor inválido')
+
+def record_video(db_session, video_id, owner, filename=None, sha256=None, size_bytes=None):
+    """Registra o vídeo enviado (commit fica com quem chama)"""
+    video = Video(id=video_id, owner=owner, filename=filename, sha256=sha256, size_bytes=size_bytes)
+    db_session.add(video)
+    return video
+
+def record_transcription(db_session, video_id, transcription):
+    """Guarda a transcrição do vídeo; ignora vídeos sem registro (ex.: enviados antes do histórico)"""
+    if db_session.get(Video, video_id) is None:
+        return None
+    record = Transcription(
+        video_id=video_id,
+        language=transcription.get('language'),
+        duration=transcription.get('duration'),
+        text=transcription.get('text') or '',
+        data=json.dumps(transcription, ensure_ascii=False)
+    )
+    db_session.add(record)
+    return record
+
+def record_generation(db_session, owner, content, video_id=None, product_link=None, platform=None,
+                      tone=None, mode=None):
+    """Guarda o resultado do pipeline de geração (commit fica com quem chama)"""
+    analysis = content.get('analysis') or {}
+    product = analysis.get('produto') if isinstance(analysis, dict) else None
+    if video_id is not None and db_session.get(Video, video_id) is None:
+        video_id = None
+
+    generation = Generation(
+        owner=owner,
+        video_id=video_id,
+        product=str(product)[:200] if product else None,
+        product_link=product_link[:1000] if product_link else None,
+        platform=platform,
+        tone=tone,
+        mode=mode,
+        analysis=json.dumps(analysis, ensure_ascii=False),
+        description=content.get('description'),
+        hashtags=content.get('hashtags'),
+        keywords=json.dumps(content.get('keywords'), ensure_ascii=False),
+        subtitles=json.dumps(content.get('subtitles'), ensure_ascii=False),
+        timings=json.dumps(content.get('timings_ms')) if content.get('timings_ms') else None
+    )
+    db_session.add(generation)
+    return generation
+
+def list_generations(db_session, owner, cursor=None, limit=HISTORY_PAGE_SIZE, platform=None, product=None,
+                     video_id=None):
+    """Página do histórico (mais recentes primeiro) e o cursor da próxima, se houver.
+
+    Paginação por chave (created_at, id) em vez de OFFSET: cada página é uma busca no índice
+    ix_generation_owner_created, com custo constante mesmo com milhões de linhas.
+    """
+    limit = max(1, min(limit, HISTORY_MAX_PAGE_SIZE))
+    query = select(Generation).where(Generation.owner == owner)
+    if platform:
+        query = query.where(Generation.platform == platform)
+    if product:
+        query = query.where(Generation.product == product)
+    if video_id:
+        query = query.where(Generation.video_id == video_id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(Generation.created_at, Generation.id) < (created_at, row_id))
+
+    rows = db_session.scalars(
+        query.order_by(Generation.created_at.desc(), Generation.id.desc()).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, next_cursor
+
+def get_generation(db_session, owner, generation_id):
+    generation = db_session.get(Generation, generation_id)
+    if generation is None or generation.owner != owner:
+        return None
+    return generation
+
+def get_video_history(db_session, owner, video_id):
+    """Vídeo com a transcrição mais recente; None se não existir ou for de outro dono"""
+    video = db_session.get(Video, video_id)
+    if video is None or video.owner != owner:
+        return None
+    transcription = db_session.scalars(
+        select(Transcription).where(Transcription.video_id == video_id)
+        .order_by(Transcription.id.desc()).limit(1)
+    ).first()
+    return video, transcription
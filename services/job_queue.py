@@ -0,0 +1,208 @@
+import atexit
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+
+from ..models.job import Job
+from ..models.user import db
+from .sqlite_store import enable_wal
+
+# Configurações
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1.0'))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', '120'))  # segundos sem heartbeat
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '2'))
+
+# tipo da tarefa -> "modulo:funcao" executada pelo worker
+_handlers = {}
+_worker_processes = []
+_worker_pool_pid = None
+
+class JobError(Exception):
+    """Erro esperado durante a execução de uma tarefa (mensagem exibida ao usuário)"""
+
+def register_job_handler(kind, target):
+    """Registra a função ("modulo:funcao") que processa tarefas de um tipo"""
+    _handlers[kind] = target
+
+# --- Lado da aplicação Flask (usa db.session) ---
+
+def enqueue_job(kind, payload):
+    """Cria uma tarefa na fila e retorna o registro"""
+    if kind not in _handlers:
+        raise ValueError(f'Tipo de tarefa desconhecido: {kind}')
+
+    job = Job(id=str(uuid.uuid4()), kind=kind, status='queued', stage='queued',
+              progress=0, payload=json.dumps(payload))
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def get_job(job_id):
+    return db.session.get(Job, job_id)
+
+# --- Lado do worker (sessão SQLAlchemy própria, sem contexto Flask) ---
+
+class JobContext:
+    """Permite ao handler reportar progresso e manter o heartbeat da tarefa"""
+
+    def __init__(self, engine, job_id):
+        self.engine = engine
+        self.job_id = job_id
+
+    def report(self, progress, stage=None):
+        now = datetime.utcnow()
+        values = {'progress': int(progress), 'updated_at': now, 'heartbeat_at': now}
+        if stage:
+            values['stage'] = stage
+        with Session(self.engine) as session:
+            session.execute(update(Job).where(Job.id == self.job_id).values(**values))
+            session.commit()
+
+    def heartbeat(self):
+        with Session(self.engine) as session:
+            session.execute(update(Job).where(Job.id == self.job_id).values(heartbeat_at=datetime.utcnow()))
+            session.commit()
+
+def claim_next_job(engine, worker_id):
+    """Reserva atomicamente a tarefa mais antiga da fila"""
+    with Session(engine) as session:
+        job_id = session.scalar(
+            select(Job.id).where(Job.status == 'queued').order_by(Job.created_at).limit(1)
+        )
+        if job_id is None:
+            return None
+
+        now = datetime.utcnow()
+        claimed = session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', stage='starting', worker_id=worker_id,
+                    attempts=Job.attempts + 1, updated_at=now, heartbeat_at=now)
+        )
+        session.commit()
+
+        # Outro worker pode ter reservado a mesma tarefa entre o select e o update
+        if claimed.rowcount != 1:
+            return None
+        return session.get(Job, job_id)
+
+def finish_job(engine, job_id, result=None, error=None):
+    now = datetime.utcnow()
+    if error is None:
+        values = {'status': 'done', 'stage': 'done', 'progress': 100,
+                  'result': json.dumps(result), 'error': None}
+    else:
+        values = {'status': 'failed', 'stage': 'failed', 'error': str(error)[:500]}
+
+    with Session(engine) as session:
+        session.execute(update(Job).where(Job.id == job_id).values(updated_at=now, **values))
+        session.commit()
+
+def requeue_stale_jobs(engine, stale_after=JOB_STALE_AFTER):
+    """Devolve à fila tarefas cujo worker morreu (heartbeat antigo)"""
+    limit = datetime.utcnow() - timedelta(seconds=stale_after)
+    with Session(engine) as session:
+        stale = Job.status == 'running'
+        stale = stale & ((Job.heartbeat_at == None) | (Job.heartbeat_at < limit))  # noqa: E711
+        session.execute(
+            update(Job).where(stale, Job.attempts < JOB_MAX_ATTEMPTS)
+            .values(status='queued', stage='queued', progress=0, worker_id=None)
+        )
+        session.execute(
+            update(Job).where(stale, Job.attempts >= JOB_MAX_ATTEMPTS)
+            .values(status='failed', stage='failed', error='Worker interrompido durante o processamento')
+        )
+        session.commit()
+
+def _load_handler(target):
+    module_name, func_name = target.split(':')
+    return getattr(importlib.import_module(module_name), func_name)
+
+def run_job(engine, job, handlers):
+    """Executa uma tarefa já reservada e grava o resultado"""
+    context = JobContext(engine, job.id)
+
+    # Mantém o heartbeat enquanto o handler bloqueia (ex.: chamada longa ao Whisper)
+    stop = threading.Event()
+    def beat():
+        while not stop.wait(JOB_STALE_AFTER / 4):
+            context.heartbeat()
+    threading.Thread(target=beat, daemon=True).start()
+
+    try:
+        handler = _load_handler(handlers[job.kind])
+        result = handler(job.get_payload(), context)
+    except JobError as e:
+        finish_job(engine, job.id, error=e)
+    except Exception as e:
+        print(f"Erro na tarefa {job.id}: {e}")
+        traceback.print_exc()
+        finish_job(engine, job.id, error='Erro interno do servidor')
+    else:
+        finish_job(engine, job.id, result=result)
+    finally:
+        stop.set()
+
+def run_worker(db_uri, handlers, worker_id=None):
+    """Loop principal de um processo worker"""
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    engine = create_engine(db_uri, connect_args={'timeout': 30})
+    enable_wal(engine)
+    last_recovery = 0
+
+    while True:
+        if time.monotonic() - last_recovery > JOB_STALE_AFTER / 2:
+            requeue_stale_jobs(engine)
+            last_recovery = time.monotonic()
+
+        job = claim_next_job(engine, worker_id)
+        if job is None:
+            time.sleep(JOB_POLL_INTERVAL)
+            continue
+
+        run_job(engine, job, handlers)
+
+def start_worker_pool(app, count):
+    """Inicia `count` processos worker locais (uma única vez por processo)"""
+    global _worker_pool_pid
+    # Processos filhos (spawn) reimportam o módulo principal; não iniciar workers recursivamente
+    if _worker_processes or count <= 0 or multiprocessing.parent_process() is not None:
+        return _worker_processes
+
+    _worker_pool_pid = os.getpid()
+    db_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    context = multiprocessing.get_context('spawn')
+
+    for i in range(count):
+        process = context.Process(
+            target=run_worker,
+            args=(db_uri, dict(_handlers), f'{socket.gethostname()}-{os.getpid()}-{i}'),
+            name=f'job-worker-{i}',
+            daemon=True
+        )
+        process.start()
+        _worker_processes.append(process)
+
+    atexit.register(stop_worker_pool)
+    return _worker_processes
+
+def stop_worker_pool():
+    # Com gunicorn --preload os workers HTTP herdam a lista pelo fork; só o processo que iniciou encerra
+    if _worker_pool_pid != os.getpid():
+        return
+    for process in _worker_processes:
+        if process.is_alive():
+            process.terminate()
+    for process in _worker_processes:
+        process.join(timeout=5)
+    _worker_processes.clear()
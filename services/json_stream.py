@@ -0,0 +1,85 @@
+import json
+
+class IncrementalJSONParser:
+    """Extrai um objeto JSON de texto recebido aos poucos (deltas do streaming do modelo).
+
+    Ignora texto antes do primeiro `{` e depois do `}` final e devolve cada campo
+    de primeiro nível assim que o valor dele termina, sem esperar o resto da resposta.
+    """
+
+    def __init__(self):
+        self.fields = {}
+        self.started = False
+        self.complete = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member = []
+
+    def feed(self, text):
+        """Consome mais texto; retorna a lista de (chave, valor) concluídos neste trecho"""
+        completed = []
+        for char in text:
+            if self.complete:
+                break
+
+            if not self.started:
+                # Texto antes do objeto (ex.: "Aqui está o JSON:" ou ```json)
+                if char == '{':
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+
+            # Vírgula ou chave de fechamento no primeiro nível encerram um campo
+            if self._depth == 1 and char == ',' or self._depth == 0:
+                item = self._finish_member()
+                if item is not None:
+                    completed.append(item)
+                if self._depth == 0:
+                    self.complete = True
+                continue
+
+            self._member.append(char)
+
+        return completed
+
+    def _finish_member(self):
+        member = ''.join(self._member).strip()
+        self._member = []
+        if not member:
+            return None
+        try:
+            parsed = json.loads('{' + member + '}')
+        except ValueError:
+            # Campo malformado: descarta e segue com os próximos
+            return None
+        key, value = next(iter(parsed.items()))
+        self.fields[key] = value
+        return key, value
+
+    def result(self):
+        """Campos extraídos até agora (None se nenhum)"""
+        return dict(self.fields) if self.fields else None
+
+def parse_json_object(text):
+    """Extrai o primeiro objeto JSON do texto, tolerando prosa antes e depois"""
+    parser = IncrementalJSONParser()
+    parser.feed(text)
+    return parser.result()
@@ -0,0 +1,21 @@
+import importlib.util
+import sys
+
+def lazy_import(name):
+    """Módulo carregado só no primeiro acesso a um atributo (ex.: `openai.OpenAI`).
+
+    Reduz o tempo de boot dos workers: dependências pesadas (openai/pydantic, ffmpeg) só são
+    importadas quando a primeira requisição precisa delas.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f'Módulo não encontrado: {name}', name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
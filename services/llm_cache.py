@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from .sqlite_store import connect, record_stat
+
+# Configurações
+LLM_CACHE_TTL = int(os.environ.get('LLM_CACHE_TTL', 7 * 24 * 3600))
+LLM_CACHE_MEMORY_ENTRIES = int(os.environ.get('LLM_CACHE_MEMORY_ENTRIES', '256'))
+LLM_CACHE_LEASE_SECONDS = 120  # tempo máximo que outro processo espera por um cálculo em andamento
+LLM_CACHE_POLL_INTERVAL = 0.25
+# Intervalo entre as limpezas das entradas expiradas (por processo)
+LLM_CACHE_PRUNE_INTERVAL = int(os.environ.get('LLM_CACHE_PRUNE_INTERVAL', '3600'))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_expires ON llm_cache (expires_at);
+CREATE TABLE IF NOT EXISTS llm_cache_lease (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+);
+"""
+
+_initialized = False
+
+def _db():
+    global _initialized
+    conn = connect()
+    if not _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized = True
+    return conn
+
+class _MemoryLRU:
+    """Camada em memória do processo, com expiração"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self.lock:
+            self.entries[key] = (value, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+_memory = _MemoryLRU(LLM_CACHE_MEMORY_ENTRIES)
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _normalize_content(content):
+    # Indentação e espaços das f-strings não mudam o prompt
+    return '\n'.join(line.strip() for line in content.strip().splitlines())
+
+def make_cache_key(model, messages, temperature, prompt_version):
+    """Chave estável para (modelo, temperatura, mensagens normalizadas, versão do template)"""
+    normalized = [{'role': m['role'], 'content': _normalize_content(m['content'])} for m in messages]
+    raw = json.dumps({'model': model, 'temperature': temperature, 'messages': normalized,
+                      'version': prompt_version}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+def _sqlite_get(key):
+    row = _db().execute("SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                        (key, time.time())).fetchone()
+    if row is None:
+        return None
+    _memory.set(key, row['value'], row['expires_at'])
+    return row['value']
+
+_last_prune = 0.0
+
+def _prune_expired():
+    """Apaga de tempos em tempos as entradas e reservas expiradas (a leitura só as ignora)"""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < LLM_CACHE_PRUNE_INTERVAL:
+        return
+    _last_prune = now
+    conn = _db()
+    conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+    conn.execute("DELETE FROM llm_cache_lease WHERE expires_at < ?", (time.time(),))
+
+def _store(key, value):
+    expires_at = time.time() + LLM_CACHE_TTL
+    _db().execute("INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                  (key, value, expires_at))
+    _memory.set(key, value, expires_at)
+    _prune_expired()
+
+def _acquire_lease(key):
+    """Reserva o cálculo da chave entre processos; False se outro processo já está calculando"""
+    conn = _db()
+    now = time.time()
+    conn.execute("DELETE FROM llm_cache_lease WHERE key = ? AND expires_at < ?", (key, now))
+    cursor = conn.execute("INSERT OR IGNORE INTO llm_cache_lease (key, expires_at) VALUES (?, ?)",
+                          (key, now + LLM_CACHE_LEASE_SECONDS))
+    return cursor.rowcount == 1
+
+def _release_lease(key):
+    _db().execute("DELETE FROM llm_cache_lease WHERE key = ?", (key,))
+
+def _compute_across_processes(key, compute):
+    """Calcula o valor ou espera o processo que já está calculando a mesma chave"""
+    while not _acquire_lease(key):
+        time.sleep(LLM_CACHE_POLL_INTERVAL)
+        value = _sqlite_get(key)
+        if value is not None:
+            return value, True
+
+    try:
+        # O outro processo pode ter terminado entre a última consulta e a reserva
+        value = _sqlite_get(key)
+        if value is not None:
+            return value, True
+
+        value = compute()
+        if value is not None:
+            _store(key, value)
+        return value, False
+    finally:
+        _release_lease(key)
+
+def cached_completion(key, compute, bypass=False):
+    """Retorna o valor em cache para `key` ou executa `compute()` uma única vez (single-flight)"""
+    if bypass:
+        return compute()
+
+    value = _memory.get(key)
+    if value is None:
+        value = _sqlite_get(key)
+    if value is not None:
+        record_stat('llm', hit=True)
+        return value
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+
+    # Outra thread deste processo já está chamando a API para a mesma chave
+    if not leader:
+        value = future.result()
+        record_stat('llm', hit=True)
+        return value
+
+    try:
+        value, hit = _compute_across_processes(key, compute)
+        record_stat('llm', hit=hit)
+        future.set_result(value)
+        return value
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
@@ -0,0 +1,117 @@
+import os
+import random
+import threading
+import time
+
+from .lazy_module import lazy_import
+from .rate_limiter import bucket_from_env
+
+# openai (com pydantic e httpx) só é importado na primeira chamada
+httpx = lazy_import('httpx')
+openai = lazy_import('openai')
+
+# Configurações (variáveis de ambiente)
+OPENAI_MAX_CONNECTIONS = int(os.environ.get('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_MAX_KEEPALIVE = int(os.environ.get('OPENAI_MAX_KEEPALIVE', '10'))
+OPENAI_KEEPALIVE_EXPIRY = float(os.environ.get('OPENAI_KEEPALIVE_EXPIRY', '60'))
+OPENAI_CONNECT_TIMEOUT = float(os.environ.get('OPENAI_CONNECT_TIMEOUT', '5'))
+OPENAI_CHAT_TIMEOUT = float(os.environ.get('OPENAI_CHAT_TIMEOUT', '90'))
+OPENAI_TRANSCRIPTION_TIMEOUT = float(os.environ.get('OPENAI_TRANSCRIPTION_TIMEOUT', '300'))
+OPENAI_MAX_RETRIES = int(os.environ.get('OPENAI_MAX_RETRIES', '3'))
+OPENAI_BACKOFF_BASE = float(os.environ.get('OPENAI_BACKOFF_BASE', '0.5'))
+OPENAI_BACKOFF_MAX = float(os.environ.get('OPENAI_BACKOFF_MAX', '20'))
+OPENAI_RATE_LIMIT_TIMEOUT = float(os.environ.get('OPENAI_RATE_LIMIT_TIMEOUT', '120'))
+COMPLETION_TOKENS_ESTIMATE = 800  # reserva de tokens de saída por chamada de chat
+
+# Orçamento de requisições/tokens por minuto, compartilhado entre os workers (0 desativa)
+_chat_requests = bucket_from_env('openai_chat_rpm', 'OPENAI_RPM_LIMIT', 500)
+_chat_tokens = bucket_from_env('openai_chat_tpm', 'OPENAI_TPM_LIMIT', 40000)
+_audio_requests = bucket_from_env('openai_audio_rpm', 'OPENAI_AUDIO_RPM_LIMIT', 50)
+
+# Timeout de leitura por endpoint; conexão/escrita/pool usam o mesmo valor curto
+ENDPOINT_TIMEOUTS = {
+    'chat': OPENAI_CHAT_TIMEOUT,
+    'transcription': OPENAI_TRANSCRIPTION_TIMEOUT,
+}
+
+def endpoint_timeout(endpoint):
+    return httpx.Timeout(ENDPOINT_TIMEOUTS[endpoint], connect=OPENAI_CONNECT_TIMEOUT)
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def get_openai_client():
+    """Cliente OpenAI único por processo, com pool de conexões keep-alive"""
+    global _client, _client_pid
+    # Após um fork (gunicorn --preload) o pool herdado não pode ser reutilizado
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                http_client = httpx.Client(
+                    limits=httpx.Limits(max_connections=OPENAI_MAX_CONNECTIONS,
+                                        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+                                        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY),
+                    timeout=endpoint_timeout('chat')
+                )
+                # Os retries ficam por conta de call_with_retry
+                _client = openai.OpenAI(http_client=http_client, max_retries=0)
+                _client_pid = os.getpid()
+    return _client
+
+def _retry_after(error):
+    """Segundos pedidos pelo servidor em Retry-After / retry-after-ms, se houver"""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        if 'retry-after-ms' in response.headers:
+            return float(response.headers['retry-after-ms']) / 1000
+        if 'retry-after' in response.headers:
+            return float(response.headers['retry-after'])
+    except ValueError:
+        return None
+    return None
+
+def _is_retryable(error):
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def call_with_retry(func, *args, max_retries=OPENAI_MAX_RETRIES, **kwargs):
+    """Executa a chamada com backoff exponencial com jitter em 429, 5xx e falhas de conexão"""
+    attempt = 0
+    while True:
+        try:
+            return func(*args, **kwargs)
+        except openai.APIError as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = random.uniform(0, min(OPENAI_BACKOFF_MAX, OPENAI_BACKOFF_BASE * 2 ** attempt))
+            requested = _retry_after(e)
+            if requested is not None:
+                delay = max(delay, min(requested, OPENAI_BACKOFF_MAX))
+            print(f"Erro temporário na OpenAI ({e.__class__.__name__}), nova tentativa em {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+def estimate_tokens(messages):
+    """Estimativa grosseira (~4 caracteres por token) usada só para o orçamento de TPM"""
+    return sum(len(m.get('content') or '') for m in messages) // 4 + COMPLETION_TOKENS_ESTIMATE
+
+def _wait_for_budget(bucket, amount=1):
+    if bucket is not None and not bucket.acquire(amount, timeout=OPENAI_RATE_LIMIT_TIMEOUT):
+        raise TimeoutError(f'Orçamento de requisições esgotado ({bucket.name})')
+
+def create_chat_completion(**kwargs):
+    _wait_for_budget(_chat_requests)
+    _wait_for_budget(_chat_tokens, estimate_tokens(kwargs.get('messages', [])))
+    client = get_openai_client()
+    return call_with_retry(client.chat.completions.create, timeout=endpoint_timeout('chat'), **kwargs)
+
+def create_transcription(retry=True, **kwargs):
+    """Transcrição no Whisper; use retry=False quando o arquivo não pode ser relido (pipe)"""
+    _wait_for_budget(_audio_requests)
+    client = get_openai_client()
+    return call_with_retry(client.audio.transcriptions.create, max_retries=OPENAI_MAX_RETRIES if retry else 0,
+                           timeout=endpoint_timeout('transcription'), **kwargs)
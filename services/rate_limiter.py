@@ -0,0 +1,153 @@
+import os
+import time
+import uuid
+
+from .sqlite_store import connect
+
+# Estado compartilhado entre workers do gunicorn via SQLite (database/cache.db)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS concurrency_lease (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_concurrency_lease_name ON concurrency_lease (name, expires_at);
+"""
+
+_initialized = False
+
+def _db():
+    global _initialized
+    conn = connect()
+    if not _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized = True
+    return conn
+
+class _Transaction:
+    """BEGIN IMMEDIATE: serializa leitura e escrita entre processos"""
+
+    def __enter__(self):
+        self.conn = _db()
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+class TokenBucket:
+    """Token bucket compartilhado: `capacity` tokens, reabastecido a `rate` tokens por segundo"""
+
+    def __init__(self, name, capacity, rate):
+        self.name = name
+        self.capacity = float(capacity)
+        self.rate = float(rate)
+
+    def _balance(self, conn, now):
+        row = conn.execute("SELECT tokens, updated_at FROM token_bucket WHERE name = ?", (self.name,)).fetchone()
+        if row is None:
+            return self.capacity
+        return min(self.capacity, row['tokens'] + (now - row['updated_at']) * self.rate)
+
+    def _store(self, conn, tokens, now):
+        conn.execute("INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES (?, ?, ?)",
+                     (self.name, tokens, now))
+
+    def try_acquire(self, amount=1.0):
+        """Consome `amount` tokens se houver; retorna (ok, segundos até haver saldo)"""
+        return try_acquire_all([self], amount)
+
+    def acquire(self, amount=1.0, timeout=None):
+        """Bloqueia até conseguir os tokens; False se estourar o timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            ok, wait = self.try_acquire(amount)
+            if ok:
+                return True
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(min(max(wait, 0.05), 5.0))
+
+def try_acquire_all(buckets, amount=1.0):
+    """Consome `amount` de todos os buckets ou de nenhum (ex.: sessão e IP); retorna (ok, maior espera)"""
+    now = time.time()
+    with _Transaction() as conn:
+        balances = [(bucket, bucket._balance(conn, now), min(float(amount), bucket.capacity)) for bucket in buckets]
+        waits = [(needed - tokens) / bucket.rate for bucket, tokens, needed in balances if tokens < needed]
+        ok = not waits
+        for bucket, tokens, needed in balances:
+            bucket._store(conn, tokens - needed if ok else tokens, now)
+
+    return ok, 0.0 if ok else max(waits)
+
+class ConcurrencyLimiter:
+    """Limite de execuções simultâneas entre processos, com leases que expiram se o processo morrer"""
+
+    def __init__(self, name, limit, lease_seconds=600):
+        self.name = name
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+
+    def try_acquire(self):
+        """Retorna o id do lease ou None se o limite foi atingido"""
+        now = time.time()
+        with _Transaction() as conn:
+            conn.execute("DELETE FROM concurrency_lease WHERE name = ? AND expires_at < ?", (self.name, now))
+            active = conn.execute("SELECT COUNT(*) FROM concurrency_lease WHERE name = ?",
+                                  (self.name,)).fetchone()[0]
+            if active >= self.limit:
+                return None
+            lease_id = str(uuid.uuid4())
+            conn.execute("INSERT INTO concurrency_lease (id, name, expires_at) VALUES (?, ?, ?)",
+                         (lease_id, self.name, now + self.lease_seconds))
+        return lease_id
+
+    def acquire(self, timeout=None, poll_interval=0.2):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            lease_id = self.try_acquire()
+            if lease_id is not None:
+                return lease_id
+            if deadline is not None and time.monotonic() > deadline:
+                return None
+            time.sleep(poll_interval)
+
+    def release(self, lease_id):
+        _db().execute("DELETE FROM concurrency_lease WHERE id = ?", (lease_id,))
+
+    def slot(self, timeout=None):
+        return _Slot(self, timeout)
+
+class _Slot:
+    def __init__(self, limiter, timeout):
+        self.limiter = limiter
+        self.timeout = timeout
+        self.lease_id = None
+
+    def __enter__(self):
+        self.lease_id = self.limiter.acquire(self.timeout)
+        if self.lease_id is None:
+            raise TimeoutError(f'Limite de concorrência atingido: {self.limiter.name}')
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.limiter.release(self.lease_id)
+
+def bucket_from_env(name, env_var, default_per_minute):
+    """Bucket com limite por minuto configurável; None se o limite for 0 (desativado)"""
+    per_minute = float(os.environ.get(env_var, default_per_minute))
+    if per_minute <= 0:
+        return None
+    return TokenBucket(name, capacity=per_minute, rate=per_minute / 60.0)
+
+def prune_idle_buckets(prefix, idle_seconds):
+    """Remove buckets `prefix*` sem uso há `idle_seconds` (já estariam cheios); retorna quantos"""
+    cutoff = time.time() - idle_seconds
+    pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return _db().execute("DELETE FROM token_bucket WHERE name LIKE ? ESCAPE '\\' AND updated_at < ?",
+                         (pattern, cutoff)).rowcount
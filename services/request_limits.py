@@ -0,0 +1,114 @@
+import math
+import os
+import time
+import uuid
+
+from flask import jsonify, make_response, request, session
+
+from .rate_limiter import ConcurrencyLimiter, TokenBucket, prune_idle_buckets, try_acquire_all
+
+def _limit_from_env(scope, key, default):
+    return float(os.environ.get(f'RATE_LIMIT_{scope.upper()}_{key.upper()}', default))
+
+# Limites das rotas caras, por sessão e por IP (RATE_LIMIT_<ESCOPO>_<CHAVE>; 0 desativa)
+#   *_per_minute: token bucket (rajada = limite do minuto); *_concurrency: requisições em andamento
+RATE_LIMITS = {
+    scope: {key: _limit_from_env(scope, key, default) for key, default in limits.items()}
+    for scope, limits in {
+        'upload': {'session_per_minute': 10, 'ip_per_minute': 30, 'session_concurrency': 2, 'ip_concurrency': 6},
+        'content': {'session_per_minute': 30, 'ip_per_minute': 90, 'session_concurrency': 4, 'ip_concurrency': 12},
+    }.items()
+}
+# Lease de concorrência expira sozinho se o worker morrer no meio da requisição
+RATE_LIMIT_LEASE_SECONDS = int(os.environ.get('RATE_LIMIT_LEASE_SECONDS', '600'))
+# Retry-After sugerido quando o limite de concorrência estoura
+RATE_LIMIT_BUSY_RETRY_SECONDS = int(os.environ.get('RATE_LIMIT_BUSY_RETRY_SECONDS', '2'))
+
+def _session_id():
+    """Identificador da sessão para os limites (sessões anteriores a ele recebem um agora)"""
+    if 'sid' not in session:
+        session['sid'] = uuid.uuid4().hex
+    return session['sid']
+
+def _client_ip():
+    # Com o ProxyFix (TRUSTED_PROXY_HOPS) só contam os itens de X-Forwarded-For acrescentados pelos nossos proxies
+    return request.remote_addr or 'desconhecido'
+
+def _too_many_requests(retry_after):
+    retry_after = max(1, math.ceil(retry_after))
+    response = jsonify({
+        'error': f'Muitas requisições. Tente novamente em {retry_after}s.',
+        'retry_after': retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+_last_prune = 0.0
+
+def _prune_buckets():
+    """Apaga de tempos em tempos os buckets de sessões/IPs inativos (um por processo a cada minuto)"""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+    # Parado por 1 minuto o bucket já se reabasteceu por completo
+    prune_idle_buckets('limit:', 60)
+
+def _acquire_limits(scope):
+    """Reserva concorrência e tokens da requisição; retorna (leases, None) ou (None, resposta 429)"""
+    limits = RATE_LIMITS[scope]
+    keys = {'session': _session_id(), 'ip': _client_ip()}
+    _prune_buckets()
+
+    leases = []
+    for kind, key in keys.items():
+        limit = int(limits[f'{kind}_concurrency'])
+        if limit <= 0:
+            continue
+        limiter = ConcurrencyLimiter(f'limit:{scope}:{kind}:{key}', limit, lease_seconds=RATE_LIMIT_LEASE_SECONDS)
+        lease_id = limiter.try_acquire()
+        if lease_id is None:
+            _release(leases)
+            return None, _too_many_requests(RATE_LIMIT_BUSY_RETRY_SECONDS)
+        leases.append((limiter, lease_id))
+
+    buckets = [TokenBucket(f'limit:{scope}:{kind}:{key}', capacity=limits[f'{kind}_per_minute'],
+                           rate=limits[f'{kind}_per_minute'] / 60.0)
+               for kind, key in keys.items() if limits[f'{kind}_per_minute'] > 0]
+    # Sessão e IP na mesma transação: uma recusa do IP não gasta o token da sessão
+    ok, wait = try_acquire_all(buckets) if buckets else (True, 0.0)
+    if not ok:
+        _release(leases)
+        return None, _too_many_requests(wait)
+
+    return leases, None
+
+def _release(leases):
+    for limiter, lease_id in leases:
+        limiter.release(lease_id)
+
+def rate_limit(scope):
+    """Decorator com os limites de RATE_LIMITS[scope]; responde 429 com Retry-After ao estourar.
+
+    Em respostas em streaming (SSE) a concorrência só é liberada quando o envio termina.
+    """
+    def decorator(f):
+        def decorated_function(*args, **kwargs):
+            leases, refused = _acquire_limits(scope)
+            if refused is not None:
+                return refused
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                _release(leases)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: _release(leases))
+            else:
+                _release(leases)
+            return response
+        decorated_function.__name__ = f.__name__
+        return decorated_function
+    return decorator
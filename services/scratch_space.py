@@ -0,0 +1,299 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from .sqlite_store import connect
+
+# Configurações
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR', os.path.join(tempfile.gettempdir(), 'viralaffiliateai-scratch'))
+SCRATCH_QUOTA_BYTES = int(os.environ.get('SCRATCH_QUOTA_BYTES', 2 * 1024 * 1024 * 1024))
+# tmpfs (ex.: /dev/shm/viralaffiliateai) para os intermediários pequenos de áudio; vazio usa o disco
+SCRATCH_TMPFS_DIR = os.environ.get('SCRATCH_TMPFS_DIR', '')
+SCRATCH_TMPFS_QUOTA_BYTES = int(os.environ.get('SCRATCH_TMPFS_QUOTA_BYTES', 256 * 1024 * 1024))
+# Espaço livre mínimo mantido no sistema de arquivos além da cota
+SCRATCH_MIN_FREE_BYTES = int(os.environ.get('SCRATCH_MIN_FREE_BYTES', 256 * 1024 * 1024))
+SCRATCH_RESERVE_TIMEOUT = float(os.environ.get('SCRATCH_RESERVE_TIMEOUT', '30'))
+SCRATCH_ORPHAN_SECONDS = int(os.environ.get('SCRATCH_ORPHAN_SECONDS', 6 * 3600))
+SCRATCH_JANITOR_INTERVAL = int(os.environ.get('SCRATCH_JANITOR_INTERVAL', '300'))
+SCRATCH_POLL_INTERVAL = 0.5
+
+# Nome dos diretórios criados por _try_reserve ({kind}-{uuid}); o janitor não toca em mais nada da raiz
+_WORKSPACE_NAME = re.compile(r'^[a-z_]+-[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scratch_workspace (
+    id TEXT PRIMARY KEY,
+    tier TEXT NOT NULL,
+    path TEXT NOT NULL,
+    reserved_bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_scratch_workspace_tier ON scratch_workspace (tier, created_at);
+CREATE TABLE IF NOT EXISTS scratch_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_initialized = False
+_janitor = None
+
+class ScratchFullError(Exception):
+    """Cota de espaço temporário esgotada (o cliente deve tentar mais tarde)"""
+
+    def __init__(self, message='Servidor sem espaço temporário. Tente novamente em instantes', retry_after=30):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def _db():
+    global _initialized
+    conn = connect()
+    if not _initialized:
+        conn.executescript(_SCHEMA)
+        _initialized = True
+    return conn
+
+def _tiers():
+    """tier -> (diretório raiz, cota em bytes); 'memory' só existe com SCRATCH_TMPFS_DIR"""
+    tiers = {'disk': (SCRATCH_DIR, SCRATCH_QUOTA_BYTES)}
+    if SCRATCH_TMPFS_DIR:
+        tiers['memory'] = (SCRATCH_TMPFS_DIR, SCRATCH_TMPFS_QUOTA_BYTES)
+    return tiers
+
+def _count(conn, name, amount=1):
+    conn.execute("INSERT INTO scratch_stats (name, value) VALUES (?, ?) "
+                 "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+class Workspace:
+    """Diretório temporário de um upload ou tarefa; `close()` (ou o `with`) apaga tudo e libera a cota"""
+
+    def __init__(self, workspace_id, tier, path, reserved_bytes):
+        self.id = workspace_id
+        self.tier = tier
+        self.path = path
+        self.reserved_bytes = reserved_bytes
+
+    def path_for(self, name):
+        return os.path.join(self.path, os.path.basename(name))
+
+    def reserve(self, total_bytes, timeout=SCRATCH_RESERVE_TIMEOUT):
+        """Aumenta a reserva para `total_bytes` (ex.: a cada parte de um upload), esperando espaço na cota"""
+        total_bytes = int(total_bytes)
+        if total_bytes <= self.reserved_bytes:
+            return
+        _wait_for(lambda: _try_grow(self, total_bytes), timeout)
+        self.reserved_bytes = total_bytes
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        conn = _db()
+        if conn.execute("DELETE FROM scratch_workspace WHERE id = ?", (self.id,)).rowcount:
+            _count(conn, 'released')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __repr__(self):
+        return f'<Workspace {self.id} {self.tier} {self.reserved_bytes}B>'
+
+def _fits(conn, tier, extra_bytes):
+    """Cabe mais `extra_bytes` na cota do tier e no espaço livre do sistema de arquivos?"""
+    root, quota = _tiers()[tier]
+    reserved = conn.execute("SELECT COALESCE(SUM(reserved_bytes), 0) FROM scratch_workspace WHERE tier = ?",
+                            (tier,)).fetchone()[0]
+    free = shutil.disk_usage(root).free
+    return reserved + extra_bytes <= quota and free - extra_bytes >= SCRATCH_MIN_FREE_BYTES
+
+def _try_reserve(tier, kind, reserve_bytes, workspace_id):
+    """Registra o workspace se couber na cota e no espaço livre; None se não couber"""
+    root, _ = _tiers()[tier]
+    os.makedirs(root, exist_ok=True)
+    conn = _db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if not _fits(conn, tier, reserve_bytes):
+            conn.execute('ROLLBACK')
+            return None
+
+        path = os.path.join(root, f'{kind}-{workspace_id}')
+        os.makedirs(path, exist_ok=True)
+        conn.execute("INSERT INTO scratch_workspace (id, tier, path, reserved_bytes, created_at) "
+                     "VALUES (?, ?, ?, ?, ?)", (workspace_id, tier, path, reserve_bytes, time.time()))
+        _count(conn, 'created')
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return Workspace(workspace_id, tier, path, reserve_bytes)
+
+def _try_grow(workspace, total_bytes):
+    """Leva a reserva do workspace a `total_bytes` se o acréscimo couber; False se não couber"""
+    conn = _db()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Lê a reserva atual na transação: duas partes simultâneas não reservam em dobro
+        row = conn.execute("SELECT reserved_bytes FROM scratch_workspace WHERE id = ?", (workspace.id,)).fetchone()
+        current = row[0] if row else total_bytes
+        if total_bytes > current and not _fits(conn, workspace.tier, total_bytes - current):
+            conn.execute('ROLLBACK')
+            return False
+        conn.execute("UPDATE scratch_workspace SET reserved_bytes = MAX(reserved_bytes, ?) WHERE id = ?",
+                     (total_bytes, workspace.id))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+def _wait_for(attempt, timeout):
+    """Repete `attempt` até ele retornar algo verdadeiro (backpressure); ScratchFullError no timeout"""
+    deadline = time.monotonic() + timeout
+    waited = False
+    while True:
+        result = attempt()
+        if result:
+            return result
+        if not waited:
+            waited = True
+            _count(_db(), 'waits')
+        if time.monotonic() >= deadline:
+            _count(_db(), 'rejected')
+            raise ScratchFullError()
+        time.sleep(SCRATCH_POLL_INTERVAL)
+
+def open_workspace(kind, reserve_bytes=0, tier='disk', timeout=SCRATCH_RESERVE_TIMEOUT, workspace_id=None):
+    """Cria um workspace reservando `reserve_bytes` da cota do tier.
+
+    Com a cota cheia aguarda até `timeout` segundos a liberação de espaço (backpressure)
+    e então levanta ScratchFullError. O tier 'memory' (tmpfs) não espera: sem espaço, ou
+    sem SCRATCH_TMPFS_DIR configurado, o workspace vai para o disco.
+    """
+    workspace_id = workspace_id or str(uuid.uuid4())
+    reserve_bytes = max(int(reserve_bytes or 0), 0)
+
+    if tier == 'memory':
+        if 'memory' in _tiers():
+            workspace = _try_reserve('memory', kind, reserve_bytes, workspace_id)
+            if workspace:
+                return workspace
+            _count(_db(), 'memory_fallbacks')
+        tier = 'disk'
+
+    return _wait_for(lambda: _try_reserve(tier, kind, reserve_bytes, workspace_id), timeout)
+
+def get_workspace(workspace_id):
+    """Workspace já criado (ex.: upload em partes retomado em outra requisição); None se não existir"""
+    row = _db().execute("SELECT id, tier, path, reserved_bytes FROM scratch_workspace WHERE id = ?",
+                        (workspace_id,)).fetchone()
+    if row is None:
+        return None
+    return Workspace(row['id'], row['tier'], row['path'], row['reserved_bytes'])
+
+def _disk_usage(path):
+    """(bytes, mtime mais recente) do diretório e dos arquivos dentro dele"""
+    total, newest = 0, 0.0
+    for directory, _, files in os.walk(path):
+        try:
+            newest = max(newest, os.stat(directory).st_mtime)
+        except OSError:
+            continue
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            total += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return total, newest
+
+def sweep_orphans(max_age=SCRATCH_ORPHAN_SECONDS):
+    """Remove workspaces sem atividade há mais de `max_age` segundos e diretórios sem registro.
+
+    A idade é a da modificação mais recente dentro do workspace, então uploads em partes
+    que continuam recebendo dados não são apagados. Retorna (workspaces removidos, bytes).
+    """
+    conn = _db()
+    limit = time.time() - max_age
+    removed = freed = 0
+
+    for row in conn.execute("SELECT id, path FROM scratch_workspace").fetchall():
+        if not os.path.isdir(row['path']):
+            # Diretório já apagado sem passar por close(): só libera a cota
+            conn.execute("DELETE FROM scratch_workspace WHERE id = ?", (row['id'],))
+            continue
+        size, newest = _disk_usage(row['path'])
+        if newest < limit:
+            shutil.rmtree(row['path'], ignore_errors=True)
+            conn.execute("DELETE FROM scratch_workspace WHERE id = ?", (row['id'],))
+            removed, freed = removed + 1, freed + size
+
+    # Sobras de processos que morreram entre criar o diretório e registrá-lo (ou de um cache.db apagado).
+    # Só nomes no formato dos workspaces: a raiz pode ser compartilhada (ex.: /dev/shm)
+    known = {row['path'] for row in conn.execute("SELECT path FROM scratch_workspace").fetchall()}
+    for root, _ in _tiers().values():
+        if not os.path.isdir(root):
+            continue
+        for entry in os.scandir(root):
+            if entry.path in known or not _WORKSPACE_NAME.match(entry.name) or \
+                    not entry.is_dir(follow_symlinks=False):
+                continue
+            size, newest = _disk_usage(entry.path)
+            if newest < limit:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed, freed = removed + 1, freed + size
+
+    if removed:
+        _count(conn, 'swept', removed)
+        _count(conn, 'swept_bytes', freed)
+    return removed, freed
+
+def get_usage():
+    """Métricas por tier (cota, reservado, em uso no disco) e contadores acumulados"""
+    conn = _db()
+    now = time.time()
+    tiers = {}
+    for tier, (root, quota) in _tiers().items():
+        rows = conn.execute("SELECT path, reserved_bytes, created_at FROM scratch_workspace WHERE tier = ?",
+                            (tier,)).fetchall()
+        used = sum(_disk_usage(row['path'])[0] for row in rows)
+        reserved = sum(row['reserved_bytes'] for row in rows)
+        tiers[tier] = {
+            'root': root,
+            'quota_bytes': quota,
+            'reserved_bytes': reserved,
+            'used_bytes': used,
+            'available_bytes': max(quota - reserved, 0),
+            'free_disk_bytes': shutil.disk_usage(root).free if os.path.isdir(root) else None,
+            'workspaces': len(rows),
+            'oldest_seconds': round(now - min(row['created_at'] for row in rows)) if rows else None
+        }
+
+    counters = {row['name']: row['value'] for row in conn.execute("SELECT name, value FROM scratch_stats")}
+    return {'tiers': tiers, 'counters': counters}
+
+def start_janitor(interval=SCRATCH_JANITOR_INTERVAL, max_age=SCRATCH_ORPHAN_SECONDS):
+    """Thread que varre workspaces órfãos periodicamente (uma por processo; a primeira varredura é imediata)"""
+    global _janitor
+    if _janitor is not None or interval <= 0:
+        return _janitor
+
+    def run():
+        while True:
+            try:
+                removed, freed = sweep_orphans(max_age)
+                if removed:
+                    print(f"Scratch: {removed} workspaces órfãos removidos ({freed} bytes)")
+            except Exception as e:
+                print(f"Erro na limpeza do scratch: {e}")
+            time.sleep(interval)
+
+    _janitor = threading.Thread(target=run, name='scratch-janitor', daemon=True)
+    _janitor.start()
+    return _janitor
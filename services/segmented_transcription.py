@@ -0,0 +1,119 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Configurações
+TRANSCRIBE_CHUNK_SECONDS = float(os.environ.get('TRANSCRIBE_CHUNK_SECONDS', '300'))
+TRANSCRIBE_CONCURRENCY = int(os.environ.get('TRANSCRIBE_CONCURRENCY', '4'))
+# Sobreposição usada apenas quando não há silêncio perto do ponto de corte
+TRANSCRIBE_CHUNK_OVERLAP = 1.0
+SEAM_TOLERANCE = 0.3
+
+def plan_chunks(duration, silences, target=TRANSCRIBE_CHUNK_SECONDS, overlap=TRANSCRIBE_CHUNK_OVERLAP):
+    """Divide [0, duration] em trechos de ~target segundos cortando no meio de silêncios.
+
+    Retorna dicts com `start`/`end` (trecho enviado ao Whisper) e `boundary`
+    (início da região que pertence a este trecho, usado para remover duplicatas).
+    """
+    cut_points = [(s + e) / 2 for s, e in silences]
+    chunks = []
+    boundary = 0.0
+
+    while duration - boundary > target * 1.25:
+        desired = boundary + target
+        window = [p for p in cut_points if boundary + target * 0.5 <= p <= boundary + target * 1.25]
+        if window:
+            cut, padding = min(window, key=lambda p: abs(p - desired)), 0.0
+        else:
+            cut, padding = desired, overlap
+
+        start = max(boundary - (chunks[-1]['padding'] if chunks else 0.0), 0.0)
+        chunks.append({'start': start, 'end': min(cut + padding, duration), 'boundary': boundary,
+                       'padding': padding})
+        boundary = cut
+
+    start = max(boundary - (chunks[-1]['padding'] if chunks else 0.0), 0.0)
+    chunks.append({'start': start, 'end': duration, 'boundary': boundary, 'padding': 0.0})
+    return chunks
+
+def _normalize_word(word):
+    return re.sub(r'[^\w]', '', word.lower())
+
+def _shift(item, offset):
+    shifted = dict(item)
+    for key in ('start', 'end'):
+        if shifted.get(key) is not None:
+            shifted[key] = round(shifted[key] + offset, 3)
+    return shifted
+
+def _owned(item, boundary, next_boundary):
+    """O item pertence ao trecho cuja região contém o seu ponto médio"""
+    end = item.get('end') if item.get('end') is not None else item['start']
+    return boundary <= (item['start'] + end) / 2 < next_boundary
+
+def merge_transcriptions(chunks, transcriptions):
+    """Junta as transcrições dos trechos no formato de `transcribe_audio`, com tempos absolutos"""
+    words, segments, texts = [], [], []
+
+    for index, (chunk, transcription) in enumerate(zip(chunks, transcriptions)):
+        offset = chunk['start']
+        boundary = chunk['boundary']
+        next_boundary = chunks[index + 1]['boundary'] if index + 1 < len(chunks) else float('inf')
+
+        chunk_words = []
+        for word in transcription.get('words', []):
+            word = _shift(word, offset)
+            if not _owned(word, boundary, next_boundary):
+                continue
+            # Mesmo dentro da região, descarta a repetição da última palavra da costura
+            if words and word['start'] < words[-1]['end'] + SEAM_TOLERANCE and \
+                    _normalize_word(word['word']) == _normalize_word(words[-1]['word']):
+                continue
+            words.append(word)
+            chunk_words.append(word)
+
+        chunk_segments = []
+        for segment in transcription.get('segments', []):
+            segment = _shift(segment, offset)
+            if not _owned(segment, boundary, next_boundary):
+                continue
+            # Segmentos que atravessam a costura ficam recortados na região do trecho
+            segment['start'] = max(segment['start'], boundary)
+            if segment.get('end') is not None:
+                segment['end'] = min(segment['end'], next_boundary)
+            segment['id'] = len(segments) + len(chunk_segments)
+            chunk_segments.append(segment)
+        segments.extend(chunk_segments)
+
+        # Com sobreposição o texto completo do trecho repetiria a costura e os segmentos podem
+        # perder fala perto dela; as palavras já sem duplicatas cobrem a região inteira
+        overlapped = chunk['start'] < boundary or chunk['padding']
+        if overlapped and chunk_words:
+            texts.append(' '.join(w['word'].strip() for w in chunk_words))
+        elif overlapped and chunk_segments:
+            texts.append(' '.join(s.get('text', '').strip() for s in chunk_segments))
+        else:
+            texts.append(transcription.get('text', '').strip())
+
+    return {
+        'text': ' '.join(t for t in texts if t),
+        'words': words,
+        'segments': segments
+    }
+
+def transcribe_in_chunks(duration, silences, transcribe_chunk, max_workers=TRANSCRIBE_CONCURRENCY):
+    """Transcreve os trechos em paralelo; `transcribe_chunk(start, length)` retorna dict ou None"""
+    chunks = plan_chunks(duration, silences)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='transcribe') as executor:
+        futures = [executor.submit(transcribe_chunk, c['start'], c['end'] - c['start']) for c in chunks]
+        transcriptions = []
+        for future in futures:
+            result = future.result()
+            if result is None:
+                for pending in futures:
+                    pending.cancel()
+                return None
+            transcriptions.append(result)
+
+    return merge_transcriptions(chunks, transcriptions)
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import threading
+
+# Banco local para caches e contadores compartilhados entre processos (fora do app.db)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DB_PATH = os.environ.get('CACHE_DB_PATH', os.path.join(BASE_DIR, 'database', 'cache.db'))
+
+_local = threading.local()
+
+def connect(path=CACHE_DB_PATH):
+    """Conexão SQLite por thread, em modo WAL e autocommit"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        connections[path] = conn
+    return conn
+
+_stats_initialized = False
+
+def _stats_db():
+    global _stats_initialized
+    conn = connect()
+    if not _stats_initialized:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_stats (name TEXT PRIMARY KEY, hits INTEGER NOT NULL DEFAULT 0, "
+            "misses INTEGER NOT NULL DEFAULT 0, saved_seconds REAL NOT NULL DEFAULT 0)"
+        )
+        _stats_initialized = True
+    return conn
+
+def record_stat(name, hit, saved_seconds=0.0):
+    """Incrementa os contadores de acerto/erro de um cache"""
+    _stats_db().execute(
+        "INSERT INTO cache_stats (name, hits, misses, saved_seconds) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses, "
+        "saved_seconds = saved_seconds + excluded.saved_seconds",
+        (name, int(hit), int(not hit), saved_seconds)
+    )
+
+def get_stats():
+    rows = _stats_db().execute("SELECT name, hits, misses, saved_seconds FROM cache_stats").fetchall()
+    return {row['name']: {'hits': row['hits'], 'misses': row['misses'],
+                          'saved_seconds': round(row['saved_seconds'], 1)} for row in rows}
+
+def enable_wal(engine):
+    """WAL + synchronous=NORMAL em cada conexão SQLite do engine SQLAlchemy (app.db)"""
+    from sqlalchemy import event  # o modo demonstração usa este módulo sem SQLAlchemy
+
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, _record):
+        cursor = dbapi_connection.cursor()
+        # Leitores não bloqueiam o escritor (API + workers de tarefas no mesmo arquivo)
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
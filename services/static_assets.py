@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # está nos requirements; sem ele (instalação mínima) só há variantes gzip
+    brotli = None
+
+# Configurações
+# Gera na inicialização as variantes .gz/.br que faltarem (o build pode gerá-las antes com `python -m`)
+STATIC_PRECOMPRESS = os.environ.get('STATIC_PRECOMPRESS', '1') == '1'
+# Arquivos com hash no nome (build do Vite) nunca mudam de conteúdo
+STATIC_IMMUTABLE_PATTERN = re.compile(os.environ.get('STATIC_IMMUTABLE_PATTERN',
+                                                     r'^assets/.+-[A-Za-z0-9_-]{8,}\.\w+$'))
+STATIC_IMMUTABLE_MAX_AGE = int(os.environ.get('STATIC_IMMUTABLE_MAX_AGE', 365 * 24 * 3600))
+STATIC_DEFAULT_MAX_AGE = int(os.environ.get('STATIC_DEFAULT_MAX_AGE', 3600))
+# Acima disso o arquivo é lido do disco a cada requisição em vez de ficar em memória
+STATIC_MEMORY_MAX_BYTES = int(os.environ.get('STATIC_MEMORY_MAX_BYTES', 2 * 1024 * 1024))
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'image/svg+xml', 'application/xml', 'application/manifest+json', 'image/x-icon',
+                      'image/vnd.microsoft.icon', 'font/ttf', 'font/otf', 'application/wasm')
+# Ordem de preferência na negociação e extensão do arquivo pré-comprimido
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Variante só vale a pena se economizar pelo menos 10%
+MIN_COMPRESSION_RATIO = 0.9
+
+INDEX_FILE = 'index.html'
+
+def _compress(encoding, data):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11)
+    # mtime=0: mesmo conteúdo gera sempre o mesmo .gz (e o mesmo ETag)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+def _is_compressible(mimetype):
+    return mimetype.startswith(COMPRESSIBLE_TYPES)
+
+def _write_atomic(path, data):
+    # Vários workers podem gerar a mesma variante ao mesmo tempo
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _source_files(static_folder):
+    """(caminho relativo com '/', caminho absoluto) de cada arquivo original da pasta"""
+    suffixes = tuple(suffix for _, suffix in ENCODINGS)
+    for root, _, names in os.walk(static_folder):
+        for name in names:
+            if name.endswith(suffixes) or name.endswith('.tmp'):
+                continue
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_folder).replace(os.sep, '/'), path
+
+def precompress(static_folder, force=False):
+    """Gera as variantes .br/.gz dos arquivos compressíveis; retorna os caminhos gerados"""
+    created = []
+    for rel_path, path in _source_files(static_folder):
+        mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+        if not _is_compressible(mimetype):
+            continue
+        data = None
+        for encoding, suffix in ENCODINGS:
+            if encoding == 'br' and brotli is None:
+                continue
+            variant_path = path + suffix
+            if not force and os.path.exists(variant_path) and \
+                    os.path.getmtime(variant_path) >= os.path.getmtime(path):
+                continue
+            try:
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                _write_atomic(variant_path, _compress(encoding, data))
+            except OSError as e:
+                # Pasta somente leitura ou sem permissão: os arquivos são servidos sem compressão
+                print(f"Pré-compressão interrompida em {variant_path}: {e}")
+                return created
+            created.append(variant_path)
+    return created
+
+class _Variant:
+    __slots__ = ('path', 'size', 'etag', 'data')
+
+    def __init__(self, path, data, etag_suffix=''):
+        self.path = path
+        self.size = len(data)
+        # ETag forte: hash do conteúdo entregue (cada codificação tem o seu)
+        self.etag = hashlib.sha256(data).hexdigest()[:32] + etag_suffix
+        self.data = data if self.size <= STATIC_MEMORY_MAX_BYTES else None
+
+class _Asset:
+    __slots__ = ('mimetype', 'last_modified', 'cache_control', 'variants')
+
+    def __init__(self, rel_path, path):
+        self.mimetype = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+        self.last_modified = os.path.getmtime(path)
+        if STATIC_IMMUTABLE_PATTERN.match(rel_path):
+            self.cache_control = f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable'
+        elif rel_path == INDEX_FILE:
+            # index.html referencia os bundles do build atual: sempre revalidar
+            self.cache_control = 'no-cache'
+        else:
+            self.cache_control = f'public, max-age={STATIC_DEFAULT_MAX_AGE}'
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        # {codificação: variante}; None é o arquivo original
+        self.variants = {None: _Variant(path, data)}
+        for encoding, suffix in ENCODINGS:
+            variant_path = path + suffix
+            if not os.path.exists(variant_path) or os.path.getmtime(variant_path) < self.last_modified:
+                continue
+            with open(variant_path, 'rb') as f:
+                variant_data = f.read()
+            if len(variant_data) <= len(data) * MIN_COMPRESSION_RATIO:
+                self.variants[encoding] = _Variant(variant_path, variant_data, f'-{encoding}')
+
+    def negotiate(self, accept_encodings):
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and accept_encodings.quality(encoding) > 0:
+                return encoding
+        return None
+
+class StaticManifest:
+    """Índice da pasta static montado na inicialização: evita stat por requisição e serve as
+    variantes pré-comprimidas com ETag forte e Cache-Control conforme o tipo de arquivo"""
+
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.assets = {}
+        if static_folder and os.path.isdir(static_folder):
+            if STATIC_PRECOMPRESS:
+                precompress(static_folder)
+            for rel_path, path in _source_files(static_folder):
+                self.assets[rel_path] = _Asset(rel_path, path)
+
+    def response(self, path):
+        """Resposta para `path`; caminhos desconhecidos recebem o index.html (rotas do SPA)"""
+        if self.static_folder is None:
+            return Response('Static folder not configured', 404)
+        asset = self.assets.get(path) or self.assets.get(INDEX_FILE)
+        if asset is None:
+            return Response('index.html not found', 404)
+
+        encoding = asset.negotiate(request.accept_encodings)
+        variant = asset.variants[encoding]
+        if variant.data is not None:
+            response = Response(variant.data, mimetype=asset.mimetype)
+        else:
+            response = Response(open(variant.path, 'rb'), mimetype=asset.mimetype, direct_passthrough=True)
+            response.content_length = variant.size
+        if encoding:
+            response.content_encoding = encoding
+        if len(asset.variants) > 1:
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = asset.cache_control
+        response.set_etag(variant.etag)
+        response.last_modified = asset.last_modified
+        # 304 para If-None-Match/If-Modified-Since que batem
+        return response.make_conditional(request)
+
+if __name__ == '__main__':
+    # Uso no build: python -m services.static_assets static [--force]
+    folder = sys.argv[1] if len(sys.argv) > 1 else 'static'
+    for created_path in precompress(folder, force='--force' in sys.argv):
+        print(created_path)
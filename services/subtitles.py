@@ -0,0 +1,221 @@
+import os
+
+# Configurações (padrões próximos aos guias de legendagem para vídeos curtos)
+SUBTITLE_MAX_LINE_CHARS = int(os.environ.get('SUBTITLE_MAX_LINE_CHARS', '42'))
+SUBTITLE_MAX_LINES = int(os.environ.get('SUBTITLE_MAX_LINES', '2'))
+SUBTITLE_MAX_CPS = float(os.environ.get('SUBTITLE_MAX_CPS', '17'))  # caracteres por segundo de leitura
+SUBTITLE_MIN_DURATION = float(os.environ.get('SUBTITLE_MIN_DURATION', '0.8'))
+SUBTITLE_MAX_DURATION = float(os.environ.get('SUBTITLE_MAX_DURATION', '6.0'))
+SUBTITLE_MIN_GAP = float(os.environ.get('SUBTITLE_MIN_GAP', '0.08'))
+SUBTITLE_PAUSE_BREAK = 0.6  # pausa na fala que sempre inicia uma nova legenda
+SPEECH_CPS = 14.0  # ritmo de fala estimado quando não há timestamps de palavras
+
+SENTENCE_END = ('.', '!', '?', '…')
+
+SUBTITLE_FORMATS = {
+    'json': 'application/json',
+    'srt': 'application/x-subrip',
+    'vtt': 'text/vtt',
+    'ass': 'text/x-ssa',
+}
+
+def word_columns(transcription):
+    """Retorna (textos, inícios, fins) a partir de `words` em lista de dicts ou em colunas.
+
+    Aceita `words` como lista de {"word", "start", "end"} (formato do Whisper) ou como
+    {"word": [...], "start": [...], "end": [...]} (listas ou arrays). Sem timestamps de palavras,
+    distribui o texto dos `segments` (ou do texto inteiro sobre `duration`) pelo número de caracteres.
+    """
+    words = transcription.get('words')
+    if isinstance(words, dict):
+        return list(words['word']), list(words['start']), list(words['end'])
+    if words:
+        return ([w.get('word', '') for w in words], [w.get('start', 0.0) for w in words],
+                [w.get('end', 0.0) for w in words])
+
+    segments = transcription.get('segments') or []
+    if not segments:
+        text = transcription.get('text', '')
+        duration = transcription.get('duration') or len(text) / SPEECH_CPS
+        segments = [{'start': 0.0, 'end': duration, 'text': text}]
+
+    texts, starts, ends = [], [], []
+    for segment in segments:
+        tokens = segment.get('text', '').split()
+        if not tokens:
+            continue
+        start, end = segment.get('start', 0.0), segment.get('end', 0.0)
+        # Tempo proporcional ao tamanho de cada palavra (+1 pelo espaço)
+        per_char = (end - start) / sum(len(t) + 1 for t in tokens)
+        position = start
+        for token in tokens:
+            texts.append(token)
+            starts.append(position)
+            position += (len(token) + 1) * per_char
+            ends.append(position)
+    return texts, starts, ends
+
+def build_cues(transcription, max_line_chars=SUBTITLE_MAX_LINE_CHARS, max_lines=SUBTITLE_MAX_LINES,
+               max_cps=SUBTITLE_MAX_CPS, min_duration=SUBTITLE_MIN_DURATION,
+               max_duration=SUBTITLE_MAX_DURATION, min_gap=SUBTITLE_MIN_GAP):
+    """Agrupa as palavras em legendas numa única passada.
+
+    Cada linha tem no máximo `max_line_chars` caracteres e cada legenda no máximo `max_lines`
+    linhas e `max_duration` segundos. A legenda fecha em pausas e fins de frase, e o fim é
+    estendido (sem invadir a próxima legenda) até durar o suficiente para ler a `max_cps`.
+    Retorna tuplas (início, fim, [linhas]).
+    """
+    texts, starts, ends = word_columns(transcription)
+    cues = []
+    lines = []
+    line = ''
+    cue_start = cue_end = 0.0
+    cue_chars = 0
+
+    def close(next_start):
+        # Tempo mínimo de leitura, limitado pela próxima legenda e pela duração máxima
+        end = max(cue_end, cue_start + max(min_duration, cue_chars / max_cps))
+        end = min(end, max(cue_end, cue_start + max_duration))
+        if next_start is not None:
+            # O intervalo mínimo entre legendas tem prioridade sobre o fim da última palavra
+            end = max(min(end, next_start - min_gap), cue_start + min_gap)
+        cues.append((cue_start, end, lines + [line]))
+
+    for i in range(len(texts)):
+        word = texts[i].strip()
+        if not word:
+            continue
+        start, end = starts[i], ends[i]
+
+        if line:
+            fits_line = len(line) + 1 + len(word) <= max_line_chars
+            new_cue = (
+                start - cue_end >= SUBTITLE_PAUSE_BREAK
+                or end - cue_start > max_duration
+                or (not fits_line and len(lines) + 1 >= max_lines)
+                or (line[-1] in SENTENCE_END and cue_chars >= max_line_chars // 2)
+            )
+            if new_cue:
+                close(start)
+                lines, line, cue_start, cue_chars = [], word, start, len(word)
+            elif fits_line:
+                line = f'{line} {word}'
+                cue_chars += len(word) + 1
+            else:
+                lines.append(line)
+                line = word
+                cue_chars += len(word) + 1
+        else:
+            line, cue_start, cue_chars = word, start, len(word)
+        cue_end = end
+
+    if line:
+        close(None)
+    return cues
+
+def _timestamp(seconds, separator):
+    ms = int(round(seconds * 1000))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    secs, ms = divmod(ms, 1000)
+    return f'{hours:02d}:{minutes:02d}:{secs:02d}{separator}{ms:03d}'
+
+def _ass_timestamp(seconds):
+    cs = int(round(seconds * 100))
+    hours, cs = divmod(cs, 360000)
+    minutes, cs = divmod(cs, 6000)
+    secs, cs = divmod(cs, 100)
+    return f'{hours:d}:{minutes:02d}:{secs:02d}.{cs:02d}'
+
+def to_json(cues):
+    return [{'start': round(start, 3), 'end': round(end, 3), 'text': '\n'.join(lines)}
+            for start, end, lines in cues]
+
+def to_srt(cues):
+    return '\n'.join(f'{index}\n{_timestamp(start, ",")} --> {_timestamp(end, ",")}\n' + '\n'.join(lines) + '\n'
+                     for index, (start, end, lines) in enumerate(cues, 1))
+
+def to_vtt(cues):
+    body = '\n'.join(f'{_timestamp(start, ".")} --> {_timestamp(end, ".")}\n' + '\n'.join(lines) + '\n'
+                     for start, end, lines in cues)
+    return 'WEBVTT\n\n' + body
+
+ASS_STYLE = {
+    'font': 'Arial',
+    'font_size': 64,
+    'color': '#FFFFFF',
+    'highlight_color': '#FFD400',
+    'outline': 4,
+    'margin_v': 220,
+}
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: {width}
+PlayResY: {height}
+WrapStyle: 2
+ScaledBorderAndShadow: yes
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{font},{font_size},{primary},{secondary},&H00000000,&H80000000,-1,0,0,0,100,100,0,0,1,{outline},1,2,60,60,{margin_v},1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def _ass_color(value):
+    """#RRGGBB -> &H00BBGGRR (ordem de cor do ASS)"""
+    value = value.lstrip('#')
+    if len(value) != 6:
+        raise ValueError(f'Cor inválida: {value}')
+    int(value, 16)
+    return f'&H00{value[4:6]}{value[2:4]}{value[0:2]}'.upper()
+
+def _ass_escape(text):
+    # Chaves abrem blocos de override no ASS
+    return text.replace('{', '(').replace('}', ')')
+
+def _ass_text(lines):
+    return r'\N'.join(_ass_escape(line) for line in lines)
+
+def _ass_karaoke(start, end, lines):
+    """Marca cada palavra com {\\k} (centésimos), dividindo a legenda pelo tamanho das palavras"""
+    total_cs = int(round((end - start) * 100))
+    total_chars = sum(len(word) + 1 for line in lines for word in line.split()) or 1
+    elapsed_chars = assigned_cs = 0
+    parts = []
+    for line in lines:
+        words = []
+        for word in line.split():
+            elapsed_chars += len(word) + 1
+            cs = int(round(total_cs * elapsed_chars / total_chars)) - assigned_cs
+            assigned_cs += cs
+            words.append(f'{{\\k{cs}}}{_ass_escape(word)}')
+        parts.append(' '.join(words))
+    return r'\N'.join(parts)
+
+def to_ass(cues, style=None, highlight=False, play_res=(1080, 1920)):
+    """ASS com estilo configurável; `highlight` destaca cada palavra no momento em que é falada"""
+    style = {**ASS_STYLE, **(style or {})}
+    color = _ass_color(style['color'])
+    # No karaokê a cor secundária vale antes da palavra ser falada e a primária depois
+    primary, secondary = (_ass_color(style['highlight_color']), color) if highlight else (color, color)
+    header = ASS_HEADER.format(width=play_res[0], height=play_res[1], font=style['font'],
+                               font_size=int(style['font_size']), primary=primary, secondary=secondary,
+                               outline=float(style['outline']), margin_v=int(style['margin_v']))
+    text = _ass_karaoke if highlight else lambda start, end, lines: _ass_text(lines)
+    return header + ''.join(
+        f'Dialogue: 0,{_ass_timestamp(start)},{_ass_timestamp(end)},Default,,0,0,0,,{text(start, end, lines)}\n'
+        for start, end, lines in cues)
+
+def cues_from_json(subtitles):
+    """Converte a lista [{"start", "end", "text"}] devolvida pela API de volta em cues"""
+    return [(float(item['start']), float(item['end']), str(item['text']).split('\n'))
+            for item in subtitles if str(item.get('text', '')).strip()]
+
+SERIALIZERS = {'json': to_json, 'srt': to_srt, 'vtt': to_vtt, 'ass': to_ass}
+
+def render_subtitles(transcription, fmt='json', **options):
+    """Gera as legendas no formato pedido (json, srt, vtt ou ass)"""
+    return SERIALIZERS[fmt](build_cues(transcription, **options))
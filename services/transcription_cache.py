@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import time
+
+from .sqlite_store import BASE_DIR, connect, record_stat
+
+# Configurações
+TRANSCRIPTION_CACHE_DIR = os.environ.get('TRANSCRIPTION_CACHE_DIR',
+                                         os.path.join(BASE_DIR, 'database', 'transcription_cache'))
+TRANSCRIPTION_CACHE_MAX_BYTES = int(os.environ.get('TRANSCRIPTION_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+TRANSCRIPTION_CACHE_TTL = int(os.environ.get('TRANSCRIPTION_CACHE_TTL', 30 * 24 * 3600))
+HASH_BUFFER_SIZE = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcription_cache (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    processing_seconds REAL NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transcription_cache_last_access ON transcription_cache (last_access);
+"""
+
+_initialized = False
+
+def _db():
+    global _initialized
+    conn = connect()
+    if not _initialized:
+        conn.executescript(_SCHEMA)
+        os.makedirs(TRANSCRIPTION_CACHE_DIR, exist_ok=True)
+        _initialized = True
+    return conn
+
+class FileTooLargeError(Exception):
+    """Arquivo enviado passou do limite durante a gravação"""
+
+class HashingWriter:
+    """Destino de um arquivo do parser multipart: grava em disco calculando o SHA-256 e o tamanho.
+
+    Usado como `stream_factory` do werkzeug, o corpo vai do socket direto para `path`
+    (sem o spool temporário padrão) e o hash fica pronto quando o parse termina.
+    """
+
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self.file = open(path, 'w+b')
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise FileTooLargeError(f'Arquivo maior que {self.max_size} bytes')
+        self.digest.update(data)
+        return self.file.write(data)
+
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+    def __getattr__(self, name):
+        # seek/read/close do arquivo, usados pelo FileStorage
+        return getattr(self.file, name)
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _remove_entry(conn, sha256, path):
+    conn.execute("DELETE FROM transcription_cache WHERE sha256 = ?", (sha256,))
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def get_cached_transcription(sha256):
+    """Busca a transcrição do vídeo pelo hash; registra hit/miss"""
+    conn = _db()
+    row = conn.execute("SELECT path, processing_seconds, created_at FROM transcription_cache WHERE sha256 = ?",
+                       (sha256,)).fetchone()
+    now = time.time()
+
+    transcription = None
+    if row and now - row['created_at'] <= TRANSCRIPTION_CACHE_TTL:
+        try:
+            with open(row['path']) as f:
+                transcription = json.load(f)
+        except (OSError, ValueError):
+            transcription = None
+
+    if transcription is None:
+        if row:
+            _remove_entry(conn, sha256, row['path'])
+        record_stat('transcription', hit=False)
+        return None
+
+    conn.execute("UPDATE transcription_cache SET last_access = ? WHERE sha256 = ?", (now, sha256))
+    record_stat('transcription', hit=True, saved_seconds=row['processing_seconds'])
+    return transcription
+
+def store_transcription(sha256, transcription, processing_seconds):
+    """Grava a transcrição no disco e no índice, removendo as menos usadas se passar do limite"""
+    conn = _db()
+    path = os.path.join(TRANSCRIPTION_CACHE_DIR, f'{sha256}.json')
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(transcription, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+    now = time.time()
+    conn.execute(
+        "INSERT OR REPLACE INTO transcription_cache (sha256, path, size, processing_seconds, created_at, last_access) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (sha256, path, os.path.getsize(path), processing_seconds, now, now)
+    )
+    evict()
+
+def evict():
+    """Remove entradas expiradas e, depois, as menos acessadas até caber no limite de bytes"""
+    conn = _db()
+    for row in conn.execute("SELECT sha256, path FROM transcription_cache WHERE created_at < ?",
+                            (time.time() - TRANSCRIPTION_CACHE_TTL,)).fetchall():
+        _remove_entry(conn, row['sha256'], row['path'])
+
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcription_cache").fetchone()[0]
+    if total <= TRANSCRIPTION_CACHE_MAX_BYTES:
+        return
+
+    for row in conn.execute("SELECT sha256, path, size FROM transcription_cache ORDER BY last_access").fetchall():
+        _remove_entry(conn, row['sha256'], row['path'])
+        total -= row['size']
+        if total <= TRANSCRIPTION_CACHE_MAX_BYTES:
+            break
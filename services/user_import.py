@@ -0,0 +1,111 @@
+import os
+import re
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from ..models.user import User, db
+
+# Configurações
+USER_IMPORT_MAX_ROWS = int(os.environ.get('USER_IMPORT_MAX_ROWS', '10000'))
+USER_IMPORT_BATCH_SIZE = int(os.environ.get('USER_IMPORT_BATCH_SIZE', '500'))
+# Limite de parâmetros por consulta IN (SQLite antigo aceita no máximo 999)
+LOOKUP_CHUNK_SIZE = 500
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+UNIQUE_FIELDS = ('username', 'email')
+MAX_LENGTHS = {'username': 80, 'email': 120}
+
+def validate_row(row):
+    """Normaliza a linha importada; retorna (dados, None) ou (None, mensagem de erro)"""
+    if not isinstance(row, dict):
+        return None, 'Linha deve ser um objeto'
+    values = {}
+    for field in UNIQUE_FIELDS:
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None, f'Campo obrigatório: {field}'
+        value = value.strip()
+        if len(value) > MAX_LENGTHS[field]:
+            return None, f'{field} excede {MAX_LENGTHS[field]} caracteres'
+        values[field] = value
+    if not EMAIL_RE.match(values['email']):
+        return None, 'E-mail inválido'
+    return values, None
+
+def _existing_values(field, values):
+    """Valores de `field` que já existem no banco (consultas IN em blocos)"""
+    column = getattr(User, field)
+    found = set()
+    values = list(values)
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(db.session.scalars(select(column).where(column.in_(chunk))))
+    return found
+
+def _insert_batch(batch):
+    """Insere o lote com executemany numa transação; em conflito concorrente, refaz linha a linha"""
+    try:
+        db.session.execute(insert(User), [values for _, values in batch])
+        db.session.commit()
+        return [], len(batch)
+    except IntegrityError:
+        db.session.rollback()
+
+    # Outra requisição gravou um dos valores entre a verificação e o insert
+    conflicts, inserted = [], 0
+    for index, values in batch:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(User), [values])
+            inserted += 1
+        except IntegrityError:
+            field = next((field for field in UNIQUE_FIELDS if _existing_values(field, [values[field]])), None)
+            conflicts.append({'index': index, 'field': field, 'value': values.get(field),
+                              'error': f'{field or "username ou email"} já cadastrado'})
+    db.session.commit()
+    return conflicts, inserted
+
+def import_users(rows, batch_size=USER_IMPORT_BATCH_SIZE):
+    """Valida e insere usuários em lotes; conflitos e erros são reportados por linha (índice da entrada)"""
+    errors, conflicts, valid = [], [], []
+    seen = {field: set() for field in UNIQUE_FIELDS}
+
+    for index, row in enumerate(rows):
+        values, error = validate_row(row)
+        if error:
+            errors.append({'index': index, 'error': error})
+            continue
+        # Duplicado dentro do próprio arquivo: vale a primeira ocorrência
+        duplicate = next((field for field in UNIQUE_FIELDS if values[field] in seen[field]), None)
+        if duplicate:
+            conflicts.append({'index': index, 'field': duplicate, 'value': values[duplicate],
+                              'error': f'{duplicate} repetido na importação'})
+            continue
+        for field in UNIQUE_FIELDS:
+            seen[field].add(values[field])
+        valid.append((index, values))
+
+    existing = {field: _existing_values(field, seen[field]) for field in UNIQUE_FIELDS}
+    to_insert = []
+    for index, values in valid:
+        duplicate = next((field for field in UNIQUE_FIELDS if values[field] in existing[field]), None)
+        if duplicate:
+            conflicts.append({'index': index, 'field': duplicate, 'value': values[duplicate],
+                              'error': f'{duplicate} já cadastrado'})
+        else:
+            to_insert.append((index, values))
+
+    inserted = 0
+    for start in range(0, len(to_insert), batch_size):
+        batch_conflicts, batch_inserted = _insert_batch(to_insert[start:start + batch_size])
+        conflicts.extend(batch_conflicts)
+        inserted += batch_inserted
+
+    conflicts.sort(key=lambda conflict: conflict['index'])
+    return {
+        'total': len(rows),
+        'inserted': inserted,
+        'conflicts': conflicts,
+        'errors': errors
+    }
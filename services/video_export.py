@@ -0,0 +1,49 @@
+from .caption_render import RENDER_CRF, RENDER_FFMPEG_THREADS, RENDER_PRESET, encoder_args, run_ffmpeg
+from .lazy_module import lazy_import
+
+ffmpeg = lazy_import('ffmpeg')
+
+# Perfis de exportação por proporção e as plataformas que usam cada um
+EXPORT_PROFILES = {
+    'vertical': {'aspect': '9:16', 'width': 1080, 'height': 1920,
+                 'platforms': ['Instagram Reels', 'TikTok', 'YouTube Shorts']},
+    'square': {'aspect': '1:1', 'width': 1080, 'height': 1080,
+               'platforms': ['Instagram Feed', 'Facebook']},
+    'landscape': {'aspect': '16:9', 'width': 1920, 'height': 1080,
+                  'platforms': ['YouTube', 'Facebook']},
+}
+
+# crop preenche o quadro cortando as bordas; pad mantém o vídeo inteiro com barras
+EXPORT_FIT_MODES = ('crop', 'pad')
+
+def _fit(stream, width, height, fit):
+    if fit == 'crop':
+        stream = stream.filter('scale', width, height, force_original_aspect_ratio='increase')
+        stream = stream.filter('crop', width, height)
+    else:
+        stream = stream.filter('scale', width, height, force_original_aspect_ratio='decrease')
+        stream = stream.filter('pad', width, height, '(ow-iw)/2', '(oh-ih)/2', color='black')
+    return stream.filter('setsar', 1)
+
+def export_profiles(video_path, outputs, duration, fit='crop', on_progress=None,
+                    preset=RENDER_PRESET, crf=RENDER_CRF, threads=RENDER_FFMPEG_THREADS):
+    """Gera vários formatos em um único processo ffmpeg: decodifica uma vez e divide com `split`.
+
+    `outputs` mapeia nome do perfil -> caminho do MP4. Os encoders de cada saída rodam em paralelo
+    dentro do mesmo processo, cada um com `threads` threads.
+    """
+    video = ffmpeg.input(video_path)
+    branches = video.video.filter_multi_output('split', len(outputs))
+    streams = [
+        ffmpeg.output(_fit(branches.stream(i), EXPORT_PROFILES[name]['width'], EXPORT_PROFILES[name]['height'], fit),
+                      path, **encoder_args(preset, crf, threads))
+        for i, (name, path) in enumerate(outputs.items())
+    ]
+    run_ffmpeg(ffmpeg.merge_outputs(*streams), duration, on_progress, threads)
+
+def export_profile(video_path, name, path, duration, fit='crop', on_progress=None,
+                   preset=RENDER_PRESET, crf=RENDER_CRF, threads=RENDER_FFMPEG_THREADS):
+    """Um único formato por processo (decodifica o vídeo de novo a cada chamada)"""
+    profile = EXPORT_PROFILES[name]
+    stream = _fit(ffmpeg.input(video_path).video, profile['width'], profile['height'], fit)
+    run_ffmpeg(ffmpeg.output(stream, path, **encoder_args(preset, crf, threads)), duration, on_progress, threads)
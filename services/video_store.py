@@ -0,0 +1,102 @@
+import os
+import shutil
+import time
+import uuid
+
+from .scratch_space import ScratchFullError
+from .sqlite_store import BASE_DIR
+
+# Configurações
+VIDEO_STORAGE_DIR = os.environ.get('VIDEO_STORAGE_DIR', os.path.join(BASE_DIR, 'database', 'videos'))
+VIDEO_RETENTION_SECONDS = int(os.environ.get('VIDEO_RETENTION_SECONDS', 24 * 3600))
+# Teto do armazenamento (originais + renderizações + exportações); os vídeos menos recentes saem antes
+VIDEO_STORAGE_MAX_BYTES = int(os.environ.get('VIDEO_STORAGE_MAX_BYTES', 5 * 1024 * 1024 * 1024))
+# Vídeos modificados há menos que isso podem ter renderização em andamento: não são removidos por espaço
+VIDEO_ACTIVE_SECONDS = int(os.environ.get('VIDEO_ACTIVE_SECONDS', 3600))
+
+def video_dir(video_id):
+    """Diretório do vídeo; None se o id não for um UUID (evita path traversal)"""
+    try:
+        video_id = str(uuid.UUID(str(video_id)))
+    except ValueError:
+        return None
+    return os.path.join(VIDEO_STORAGE_DIR, video_id)
+
+def keep_video(video_id, path):
+    """Move o upload para o armazenamento de vídeos e retorna o novo caminho"""
+    ensure_space(os.path.getsize(path))
+    directory = video_dir(video_id)
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(path)[1].lower()
+    stored_path = os.path.join(directory, f'source{extension}')
+    shutil.move(path, stored_path)
+    return stored_path
+
+def get_video_path(video_id):
+    """Caminho do vídeo original enviado; None se não existir ou já tiver expirado"""
+    directory = video_dir(video_id)
+    if directory is None or not os.path.isdir(directory):
+        return None
+    for name in os.listdir(directory):
+        if name.startswith('source.'):
+            return os.path.join(directory, name)
+    return None
+
+def output_path(video_id, name):
+    """Caminho para um arquivo gerado a partir do vídeo (ex.: renderizações)"""
+    return os.path.join(video_dir(video_id), name)
+
+def evict_expired(retention=VIDEO_RETENTION_SECONDS):
+    """Remove vídeos (e arquivos gerados) sem modificação há mais de `retention` segundos"""
+    if not os.path.isdir(VIDEO_STORAGE_DIR):
+        return
+    limit = time.time() - retention
+    for entry in os.scandir(VIDEO_STORAGE_DIR):
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < limit:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+
+def _usage():
+    """[(mtime mais recente, bytes, diretório)] de cada vídeo armazenado"""
+    entries = []
+    for entry in os.scandir(VIDEO_STORAGE_DIR):
+        if not entry.is_dir():
+            continue
+        size, newest = 0, 0.0
+        try:
+            newest = entry.stat().st_mtime
+            for name in os.listdir(entry.path):
+                stat = os.stat(os.path.join(entry.path, name))
+                size += stat.st_size
+                newest = max(newest, stat.st_mtime)
+        except OSError:
+            continue
+        entries.append((newest, size, entry.path))
+    return entries
+
+def ensure_space(needed_bytes, keep_video_id=None, max_bytes=VIDEO_STORAGE_MAX_BYTES):
+    """Garante espaço para gravar `needed_bytes`, removendo os vídeos menos recentes.
+
+    O vídeo `keep_video_id` (origem da renderização) nunca é removido. Levanta
+    ScratchFullError se, mesmo assim, não couber (todos os restantes em uso).
+    """
+    evict_expired()
+    if not os.path.isdir(VIDEO_STORAGE_DIR):
+        return
+    entries = sorted(_usage())
+    total = sum(size for _, size, _ in entries)
+    active_limit = time.time() - VIDEO_ACTIVE_SECONDS
+    keep = video_dir(keep_video_id) if keep_video_id else None
+
+    for newest, size, path in entries:
+        if total + needed_bytes <= max_bytes or newest >= active_limit:
+            break
+        if path == keep:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+
+    if total + needed_bytes > max_bytes:
+        raise ScratchFullError('Armazenamento de vídeos cheio. Tente novamente mais tarde')
@@ -0,0 +1,48 @@
+from services.segmented_transcription import merge_transcriptions, plan_chunks
+
+WORD_SECONDS = 0.5
+
+def _transcribe_stub(duration, chunk):
+    """Whisper simulado: uma palavra a cada 0,5s e segmentos de 5 palavras a partir do início do trecho"""
+    words = []
+    index = 0
+    while index * WORD_SECONDS < duration:
+        start = index * WORD_SECONDS
+        if chunk['start'] <= start and start + 0.4 <= chunk['end']:
+            words.append({'word': f'w{index}', 'start': round(start - chunk['start'], 3),
+                          'end': round(start + 0.4 - chunk['start'], 3)})
+        index += 1
+
+    segments = []
+    for i in range(0, len(words), 5):
+        group = words[i:i + 5]
+        segments.append({'id': len(segments), 'start': group[0]['start'], 'end': group[-1]['end'],
+                         'text': ' '.join(w['word'] for w in group)})
+    return {'text': ' '.join(w['word'] for w in words), 'words': words, 'segments': segments}
+
+def _merge(duration, silences):
+    chunks = plan_chunks(duration, silences, target=300)
+    return chunks, merge_transcriptions(chunks, [_transcribe_stub(duration, c) for c in chunks])
+
+def test_overlap_seam_keeps_every_word_once():
+    chunks, merged = _merge(1000, [])
+    expected = [f'w{i}' for i in range(2000)]
+
+    assert any(c['start'] < c['boundary'] for c in chunks)
+    assert merged['text'].split() == expected
+    assert [w['word'] for w in merged['words']] == expected
+
+def test_overlap_seam_segments_cover_speech_without_overlapping():
+    chunks, merged = _merge(1000, [])
+    covered = {word for segment in merged['segments'] for word in segment['text'].split()}
+
+    assert covered == {f'w{i}' for i in range(2000)}
+    for previous, current in zip(merged['segments'], merged['segments'][1:]):
+        assert previous['end'] <= current['start']
+    assert [s['id'] for s in merged['segments']] == list(range(len(merged['segments'])))
+
+def test_silence_cut_uses_chunk_text():
+    chunks, merged = _merge(1000, [(299.9, 300.0), (599.9, 600.0), (899.9, 900.0)])
+
+    assert all(c['start'] == c['boundary'] and not c['padding'] for c in chunks)
+    assert merged['text'].split() == [f'w{i}' for i in range(2000)]